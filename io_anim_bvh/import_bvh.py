@@ -20,10 +20,12 @@
 
 # Script copyright (C) Campbell Barton
 
-from math import radians, ceil
+from math import ceil
+
+import numpy as np
 
 import bpy
-from mathutils import Vector, Euler, Matrix
+from mathutils import Vector, Matrix
 
 
 class BVH_Node:
@@ -51,8 +53,9 @@ class BVH_Node:
         'rot_order',
         # Same as above but a string 'XYZ' format..
         'rot_order_str',
-        # A list one tuple's one for each frame: (locx, locy, locz, rotx, roty, rotz),
+        # An array with one row for each frame: (locx, locy, locz, rotx, roty, rotz),
         # euler rotation ALWAYS stored xyz order, even when native used.
+        # First row is the rest pose (zeros).
         'anim_data',
         # Convenience function, bool, same as: (channels[0] != -1 or channels[1] != -1 or channels[2] != -1).
         'has_loc',
@@ -92,9 +95,9 @@ class BVH_Node:
 
         self.children = []
 
-        # List of 6 length tuples: (lx, ly, lz, rx, ry, rz)
+        # Rows of 6 values: (lx, ly, lz, rx, ry, rz)
         # even if the channels aren't used they will just be zero.
-        self.anim_data = [(0, 0, 0, 0, 0, 0)]
+        self.anim_data = np.zeros((1, 6))
 
     def __repr__(self):
         return (
@@ -112,19 +115,49 @@ def sorted_nodes(bvh_nodes):
     return bvh_nodes_list
 
 
+def _read_motion(lines, nbr_channels):
+    """Parse the frame lines of the MOTION section into a (frames, channels) float array."""
+    motion = np.array(" ".join(lines).split(), dtype=np.float64)
+    if len(motion) == len(lines) * nbr_channels:
+        return motion.reshape(len(lines), nbr_channels)
+
+    # Some lines have extra (ignored) values, or are missing some.
+    motion = []
+    for i, line in enumerate(lines):
+        values = line.split()
+        if len(values) < nbr_channels:
+            raise ValueError("BVH motion frame %d has %d values, %d channels expected" %
+                             (i, len(values), nbr_channels))
+        motion.append(values[:nbr_channels])
+    return np.array(motion, dtype=np.float64)
+
+
 def read_bvh(context, file_path, rotate_mode='XYZ', global_scale=1.0):
     # File loading stuff
     # Open the file for importing
-    file = open(file_path, 'rU')
-
-    # Separate into a list of lists, each line a list of words.
-    file_lines = file.readlines()
+    with open(file_path, 'r') as file:
+        file_lines = file.readlines()
     # Non standard carrage returns?
     if len(file_lines) == 1:
         file_lines = file_lines[0].split('\r')
 
-    # Split by whitespace.
-    file_lines = [ll for ll in [l.split() for l in file_lines] if ll]
+    # Separate the hierarchy (up to the MOTION line and the 2 following ones) into a list of lists,
+    # each line a list of words, motion lines are parsed at once.
+    motion_lines = iter(file_lines)
+    nbr_header_lines = None
+    hierarchy_lines = []
+    for line in motion_lines:
+        words = line.split()
+        if words:
+            hierarchy_lines.append(words)
+            if nbr_header_lines is not None:
+                nbr_header_lines -= 1
+            elif len(words) == 1 and words[0].lower() == 'motion':
+                nbr_header_lines = 2
+            if nbr_header_lines == 0:
+                break
+    file_lines = hierarchy_lines
+    motion_lines = [line for line in motion_lines if line.strip()]
 
     # Create hierarchy as empties
     if file_lines[0][0].lower() == 'hierarchy':
@@ -274,31 +307,19 @@ def read_bvh(context, file_path, rotate_mode='XYZ', global_scale=1.0):
     # second life expects it, which isn't to spec.
     bvh_nodes_list = sorted_nodes(bvh_nodes)
 
-    while lineIdx < len(file_lines):
-        line = file_lines[lineIdx]
-        for bvh_node in bvh_nodes_list:
-            # for bvh_node in bvh_nodes_serial:
-            lx = ly = lz = rx = ry = rz = 0.0
-            channels = bvh_node.channels
-            anim_data = bvh_node.anim_data
-            if channels[0] != -1:
-                lx = global_scale * float(line[channels[0]])
-
-            if channels[1] != -1:
-                ly = global_scale * float(line[channels[1]])
-
-            if channels[2] != -1:
-                lz = global_scale * float(line[channels[2]])
-
-            if channels[3] != -1 or channels[4] != -1 or channels[5] != -1:
+    # The last non-motion lines, when there is no MOTION section.
+    motion_lines[:0] = [' '.join(words) for words in file_lines[lineIdx:]]
+    motion = _read_motion(motion_lines, channelIndex + 1)
 
-                rx = radians(float(line[channels[3]]))
-                ry = radians(float(line[channels[4]]))
-                rz = radians(float(line[channels[5]]))
+    for bvh_node in bvh_nodes_list:
+        channels = bvh_node.channels
+        anim_data = bvh_node.anim_data = np.zeros((len(motion) + 1, 6))
+        for i in range(3):
+            if channels[i] != -1:
+                anim_data[1:, i] = global_scale * motion[:, channels[i]]
 
-            # Done importing motion data #
-            anim_data.append((lx, ly, lz, rx, ry, rz))
-        lineIdx += 1
+        if bvh_node.has_rot:
+            anim_data[1:, 3:] = np.radians(motion[:, channels[3:]])
 
     # Assign children
     for bvh_node in bvh_nodes_list:
@@ -404,6 +425,142 @@ def bvh_node_dict2objects(context, bvh_name, bvh_nodes, rotate_mode='NATIVE', fr
     return objects
 
 
+# Axes (in application order) and parity of each euler rotation order, as in Blender's rotation code.
+_EULER_ORDER_INFO = {
+    'XYZ': ((0, 1, 2), False),
+    'XZY': ((0, 2, 1), True),
+    'YXZ': ((1, 0, 2), True),
+    'YZX': ((1, 2, 0), False),
+    'ZXY': ((2, 0, 1), False),
+    'ZYX': ((2, 1, 0), True),
+}
+
+
+def _eulers_to_matrices(eulers, order):
+    """Convert (n, 3) euler angles (x, y, z) of given rotation order to (n, 3, 3) rotation matrices."""
+    matrices = np.broadcast_to(np.identity(3), (len(eulers), 3, 3))
+    for i in _EULER_ORDER_INFO[order][0]:
+        j, k = (i + 1) % 3, (i + 2) % 3
+        cos, sin = np.cos(eulers[:, i]), np.sin(eulers[:, i])
+        rotation = np.zeros((len(eulers), 3, 3))
+        rotation[:, i, i] = 1.0
+        rotation[:, j, j] = rotation[:, k, k] = cos
+        rotation[:, j, k] = -sin
+        rotation[:, k, j] = sin
+        matrices = rotation @ matrices
+    return matrices
+
+
+def _matrices_to_quaternions(matrices):
+    """Convert (n, 3, 3) rotation matrices to (n, 4) quaternions (w, x, y, z), like Matrix.to_quaternion()."""
+    m = matrices
+    quats = np.empty((len(m), 4))
+    trace = 0.25 * (1.0 + m[:, 0, 0] + m[:, 1, 1] + m[:, 2, 2])
+
+    # Use the largest of w, x, y, z for numerical stability.
+    is_w = trace > 1e-4
+    is_x = ~is_w & (m[:, 0, 0] > m[:, 1, 1]) & (m[:, 0, 0] > m[:, 2, 2])
+    is_y = ~is_w & ~is_x & (m[:, 1, 1] > m[:, 2, 2])
+    is_z = ~is_w & ~is_x & ~is_y
+
+    w = m[is_w]
+    s = np.sqrt(trace[is_w])
+    quats[is_w, 0] = s
+    s = 1.0 / (4.0 * s)
+    quats[is_w, 1] = (w[:, 2, 1] - w[:, 1, 2]) * s
+    quats[is_w, 2] = (w[:, 0, 2] - w[:, 2, 0]) * s
+    quats[is_w, 3] = (w[:, 1, 0] - w[:, 0, 1]) * s
+
+    for is_axis, (i, j, k) in ((is_x, (0, 1, 2)), (is_y, (1, 2, 0)), (is_z, (2, 0, 1))):
+        a = m[is_axis]
+        s = 2.0 * np.sqrt(1.0 + a[:, i, i] - a[:, j, j] - a[:, k, k])
+        quats[is_axis, 1 + i] = 0.25 * s
+        s = 1.0 / s
+        quats[is_axis, 0] = (a[:, k, j] - a[:, j, k]) * s
+        quats[is_axis, 1 + j] = (a[:, j, i] + a[:, i, j]) * s
+        quats[is_axis, 1 + k] = (a[:, k, i] + a[:, i, k]) * s
+
+    return quats / np.linalg.norm(quats, axis=1)[:, np.newaxis]
+
+
+def _matrices_to_eulers(matrices, order):
+    """
+    Convert (n, 3, 3) rotation matrices to both possible (n, 3) euler angles (x, y, z) of given rotation order.
+    """
+    (i, j, k), parity = _EULER_ORDER_INFO[order]
+    m = matrices
+    eulers1 = np.empty((len(m), 3))
+    eulers2 = np.empty((len(m), 3))
+
+    cy = np.hypot(m[:, i, i], m[:, j, i])
+    eulers1[:, i] = np.arctan2(m[:, k, j], m[:, k, k])
+    eulers1[:, j] = np.arctan2(-m[:, k, i], cy)
+    eulers1[:, k] = np.arctan2(m[:, j, i], m[:, i, i])
+    eulers2[:, i] = np.arctan2(-m[:, k, j], -m[:, k, k])
+    eulers2[:, j] = np.arctan2(-m[:, k, i], -cy)
+    eulers2[:, k] = np.arctan2(-m[:, j, i], -m[:, i, i])
+
+    # Gimbal lock, only one solution.
+    is_locked = cy <= 16.0 * np.finfo(np.float32).eps
+    eulers1[is_locked, i] = np.arctan2(-m[is_locked, j, k], m[is_locked, j, j])
+    eulers1[is_locked, k] = 0.0
+    eulers2[is_locked] = eulers1[is_locked]
+
+    if parity:
+        return -eulers1, -eulers2
+    return eulers1, eulers2
+
+
+def _compatible_eulers(eulers1, eulers2):
+    """
+    Choose for each frame between both possible euler angles, the ones closest to the previous frame,
+    like successive Matrix.to_euler() calls using previous result as compatible euler.
+
+    eulers1 and eulers2 are (frames, n, 3) arrays of n independent animations, returns the chosen ones.
+    """
+    eulers = np.empty_like(eulers1)
+    prev_euler = np.zeros(eulers1.shape[1:])
+    for frame_i, (euler1, euler2) in enumerate(zip(eulers1, eulers2)):
+        euler1 = _compatible_euler(euler1, prev_euler)
+        euler2 = _compatible_euler(euler2, prev_euler)
+        diff1 = np.abs(euler1 - prev_euler).sum(axis=1)
+        diff2 = np.abs(euler2 - prev_euler).sum(axis=1)
+        prev_euler = eulers[frame_i] = np.where((diff1 > diff2)[:, np.newaxis], euler2, euler1)
+    return eulers
+
+
+def _compatible_euler(euler, prev_euler):
+    # Same as Blender's compatible_eul(), for (n, 3) arrays.
+    pi_x2 = 2.0 * np.pi
+
+    # Correct differences of about 360 degrees first.
+    diff = euler - prev_euler
+    euler = euler - np.floor(diff / pi_x2 + 0.5) * pi_x2 * (diff > 5.1)
+    euler = euler + np.floor(-diff / pi_x2 + 0.5) * pi_x2 * (diff < -5.1)
+    diff = euler - prev_euler
+
+    # Is one of the axis rotations larger than 180 degrees and the others small?
+    is_large = np.abs(diff) > 3.2
+    is_small = np.abs(diff) < 1.6
+    is_flipped = is_large & is_small[:, (1, 0, 0)] & is_small[:, (2, 2, 1)]
+    return euler - np.sign(diff) * pi_x2 * is_flipped
+
+
+def _add_fcurves(action, data_path, times, values):
+    """Add linear F-curves for each column of (frames, n) values."""
+    linear = bpy.types.Keyframe.bl_rna.properties['interpolation'].enum_items['LINEAR'].value
+    co = np.empty((len(times), 2), dtype=np.float32)
+    co[:, 0] = times
+    for axis_i in range(values.shape[1]):
+        co[:, 1] = values[:, axis_i]
+        curve = action.fcurves.new(data_path=data_path, index=axis_i)
+        keyframe_points = curve.keyframe_points
+        keyframe_points.add(len(times))
+        keyframe_points.foreach_set("co", co.ravel())
+        keyframe_points.foreach_set("interpolation", np.full(len(times), linear, dtype=np.int32))
+        curve.update()
+
+
 def bvh_node_dict2armature(
         context,
         bvh_name,
@@ -552,101 +709,71 @@ def bvh_node_dict2armature(
     skip_frame = 1
     if num_frame > skip_frame:
         num_frame = num_frame - skip_frame
+    else:
+        skip_frame = 0
 
     # Create a shared time axis for all animation curves.
-    time = [float(frame_start)] * num_frame
+    time = np.arange(num_frame, dtype=np.float64)
     if use_fps_scale:
-        dt = scene.render.fps * bvh_frame_time
-        for frame_i in range(1, num_frame):
-            time[frame_i] += float(frame_i) * dt
-    else:
-        for frame_i in range(1, num_frame):
-            time[frame_i] += float(frame_i)
+        time *= scene.render.fps * bvh_frame_time
+    time += float(frame_start)
 
     # print("bvh_frame_time = %f, dt = %f, num_frame = %d"
     #      % (bvh_frame_time, dt, num_frame]))
 
-    for i, bvh_node in enumerate(bvh_nodes_list):
+    # Compute the animation of all bones at once for each frame, with (frames, 3, 3) arrays of matrices.
+    locations = {}
+    rotations = {}
+    for bvh_node in bvh_nodes_list:
         pose_bone, bone, bone_rest_matrix, bone_rest_matrix_inv = bvh_node.temp
+        anim_data = bvh_node.anim_data[skip_frame:skip_frame + num_frame]
+        rest_matrix = np.array(bone_rest_matrix.to_3x3())
+        rest_matrix_inv = np.array(bone_rest_matrix_inv.to_3x3())
 
         if bvh_node.has_loc:
-            # Not sure if there is a way to query this or access it in the
-            # PoseBone structure.
-            data_path = 'pose.bones["%s"].location' % pose_bone.name
+            bvh_locs = anim_data[:, :3] - np.array(bvh_node.rest_head_local)
+            locations[bvh_node] = bvh_locs @ rest_matrix_inv.T
 
-            location = [(0.0, 0.0, 0.0)] * num_frame
-            for frame_i in range(num_frame):
-                bvh_loc = bvh_node.anim_data[frame_i + skip_frame][:3]
+        if bvh_node.has_rot:
+            # apply rotation order and convert to XYZ
+            # note that the rot_order_str is reversed.
+            bone_rotation_matrices = _eulers_to_matrices(anim_data[:, 3:], bvh_node.rot_order_str[::-1])
+            bone_rotation_matrices = rest_matrix_inv @ bone_rotation_matrices @ rest_matrix
 
-                bone_translate_matrix = Matrix.Translation(
-                    Vector(bvh_loc) - bvh_node.rest_head_local)
-                location[frame_i] = (bone_rest_matrix_inv @
-                                     bone_translate_matrix).to_translation()
+            if 'QUATERNION' == rotate_mode:
+                rotations[bvh_node] = _matrices_to_quaternions(bone_rotation_matrices)
+            else:
+                rotations[bvh_node] = _matrices_to_eulers(bone_rotation_matrices, pose_bone.rotation_mode)
 
-            # For each location x, y, z.
-            for axis_i in range(3):
-                curve = action.fcurves.new(data_path=data_path, index=axis_i)
-                keyframe_points = curve.keyframe_points
-                keyframe_points.add(num_frame)
+    if 'QUATERNION' != rotate_mode and rotations:
+        # Make eulers of each frame compatible with the previous ones, for all bones at once.
+        eulers = _compatible_eulers(
+            np.stack([eulers1 for eulers1, eulers2 in rotations.values()], axis=1),
+            np.stack([eulers2 for eulers1, eulers2 in rotations.values()], axis=1),
+        )
+        rotations = {bvh_node: eulers[:, i] for i, bvh_node in enumerate(rotations)}
 
-                for frame_i in range(num_frame):
-                    keyframe_points[frame_i].co = (
-                        time[frame_i],
-                        location[frame_i][axis_i],
-                    )
+    for bvh_node in bvh_nodes_list:
+        pose_bone = bvh_node.temp[0]
 
-        if bvh_node.has_rot:
-            data_path = None
-            rotate = None
+        if bvh_node.has_loc:
+            # Not sure if there is a way to query this or access it in the
+            # PoseBone structure.
+            data_path = 'pose.bones["%s"].location' % pose_bone.name
+            _add_fcurves(action, data_path, time, locations[bvh_node])
 
+        if bvh_node.has_rot:
             if 'QUATERNION' == rotate_mode:
-                rotate = [(1.0, 0.0, 0.0, 0.0)] * num_frame
                 data_path = ('pose.bones["%s"].rotation_quaternion'
                              % pose_bone.name)
             else:
-                rotate = [(0.0, 0.0, 0.0)] * num_frame
                 data_path = ('pose.bones["%s"].rotation_euler' %
                              pose_bone.name)
-
-            prev_euler = Euler((0.0, 0.0, 0.0))
-            for frame_i in range(num_frame):
-                bvh_rot = bvh_node.anim_data[frame_i + skip_frame][3:]
-
-                # apply rotation order and convert to XYZ
-                # note that the rot_order_str is reversed.
-                euler = Euler(bvh_rot, bvh_node.rot_order_str[::-1])
-                bone_rotation_matrix = euler.to_matrix().to_4x4()
-                bone_rotation_matrix = (
-                    bone_rest_matrix_inv @
-                    bone_rotation_matrix @
-                    bone_rest_matrix
-                )
-
-                if len(rotate[frame_i]) == 4:
-                    rotate[frame_i] = bone_rotation_matrix.to_quaternion()
-                else:
-                    rotate[frame_i] = bone_rotation_matrix.to_euler(
-                        pose_bone.rotation_mode, prev_euler)
-                    prev_euler = rotate[frame_i]
-
             # For each euler angle x, y, z (or quaternion w, x, y, z).
-            for axis_i in range(len(rotate[0])):
-                curve = action.fcurves.new(data_path=data_path, index=axis_i)
-                keyframe_points = curve.keyframe_points
-                keyframe_points.add(num_frame)
-
-                for frame_i in range(num_frame):
-                    keyframe_points[frame_i].co = (
-                        time[frame_i],
-                        rotate[frame_i][axis_i],
-                    )
-
-    for cu in action.fcurves:
-        if IMPORT_LOOP:
-            pass  # 2.5 doenst have cyclic now?
-
-        for bez in cu.keyframe_points:
-            bez.interpolation = 'LINEAR'
+            _add_fcurves(action, data_path, time, rotations[bvh_node])
+
+    if IMPORT_LOOP:
+        pass  # 2.5 doenst have cyclic now?
 
     # finally apply matrix
     arm_ob.matrix_world = global_matrix
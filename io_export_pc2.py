@@ -19,7 +19,7 @@
 bl_info = {
     "name": "Export Pointcache Format(.pc2)",
     "author": "Florian Meyer (tstscr)",
-    "version": (1, 1, 2),
+    "version": (1, 2, 0),
     "blender": (2, 80, 0),
     "location": "File > Export > Pointcache (.pc2)",
     "description": "Export mesh Pointcache data (.pc2)",
@@ -49,6 +49,10 @@ from os import remove
 import time
 import math
 import struct
+import numpy as np
+
+# Size (in bytes) of the blocks of samples accumulated before writing them to file.
+WRITE_BLOCK_SIZE = 1 << 24
 
 
 def get_sampled_frames(start, end, sampling):
@@ -81,6 +85,12 @@ def do_export(context, props, filepath):
     file = open(filepath, "wb")
     file.write(headerStr)
 
+    # Samples are accumulated in blocks, written to file when full.
+    co = np.empty(vertCount * 3, dtype=np.float32)
+    blockSize = max(1, min(sampleCount, WRITE_BLOCK_SIZE // max(1, co.nbytes)))
+    block = np.empty((blockSize, vertCount * 3), dtype='<f4')
+    blockCount = 0
+
     for frame in sampletimes:
         # stupid modf() gives decimal part first!
         sc.frame_set(int(frame[1]), subframe=frame[0])
@@ -106,11 +116,14 @@ def do_export(context, props, filepath):
         if props.rot_x90:
             me.transform(mat_x90)
 
-        for v in me.vertices:
-            thisVertex = struct.pack('<fff', float(v.co[0]),
-                                     float(v.co[1]),
-                                     float(v.co[2]))
-            file.write(thisVertex)
+        me.vertices.foreach_get("co", co)
+        block[blockCount] = co
+        blockCount += 1
+        if blockCount == len(block):
+            block.tofile(file)
+            blockCount = 0
+
+    block[:blockCount].tofile(file)
 
     if apply_modifiers:
         ob.evaluated_get(depsgraph).to_mesh_clear()
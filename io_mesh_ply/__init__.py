@@ -21,7 +21,7 @@
 bl_info = {
     "name": "Stanford PLY format",
     "author": "Bruce Merry, Campbell Barton", "Bastien Montagne"
-    "version": (2, 1, 0),
+    "version": (2, 2, 1),
     "blender": (2, 90, 0),
     "location": "File > Import/Export",
     "description": "Import-Export PLY mesh data with UVs and vertex colors",
@@ -46,7 +46,9 @@ from bpy.props import (
     CollectionProperty,
     StringProperty,
     BoolProperty,
+    EnumProperty,
     FloatProperty,
+    IntProperty,
 )
 from bpy_extras.io_utils import (
     ImportHelper,
@@ -80,6 +82,39 @@ class ImportPLY(bpy.types.Operator, ImportHelper):
     filename_ext = ".ply"
     filter_glob: StringProperty(default="*.ply", options={'HIDDEN'})
 
+    use_point_cloud: BoolProperty(
+        name="Point Cloud",
+        description=(
+            "Only import vertices and their colors, ignoring faces and edges "
+            "(faster and using less memory on large scans)"
+        ),
+        default=False,
+    )
+    point_decimation: EnumProperty(
+        name="Decimation",
+        description="Reduce the number of imported points",
+        items=(
+            ('NONE', "None", "Import all points"),
+            ('STRIDE', "Stride", "Import one point out of a given number"),
+            ('VOXEL', "Voxel Grid", "Import one point per cell of a regular grid"),
+        ),
+        default='NONE',
+    )
+    point_stride: IntProperty(
+        name="Stride",
+        description="Import one point out of this number",
+        min=1,
+        default=10,
+    )
+    voxel_size: FloatProperty(
+        name="Voxel Size",
+        description="Size of the cells of the decimation grid",
+        min=1e-6,
+        soft_min=0.001,
+        default=0.01,
+        subtype='DISTANCE',
+    )
+
     def execute(self, context):
         import os
         from . import import_ply
@@ -94,8 +129,18 @@ class ImportPLY(bpy.types.Operator, ImportHelper):
         if not paths:
             paths.append(self.filepath)
 
+        keywords = self.as_keywords(
+            ignore=(
+                "files",
+                "directory",
+                "filepath",
+                "filter_glob",
+                "hide_props_region",
+            )
+        )
+
         for path in paths:
-            import_ply.load(self, context, path)
+            import_ply.load(self, context, path, **keywords)
 
         context.window.cursor_set('DEFAULT')
 
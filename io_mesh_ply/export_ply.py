@@ -24,63 +24,72 @@ colors, and texture coordinates per face or per vertex.
 """
 
 
-def _write_binary(fw, ply_verts, ply_faces, mesh_verts):
-    from struct import pack
+import numpy as np
+
+# Number of vertices or faces formatted at once when writing ASCII files.
+WRITE_BLOCK_SIZE = 64 * 1024
+
+
+def _write_binary(fw, ply_verts, faces_loop_total, loops_vert_idx):
 
     # Vertex data
     # ---------------------------
 
-    for index, normal, uv_coords, color in ply_verts:
-        fw(pack("<3f", *mesh_verts[index].co))
-        if normal is not None:
-            fw(pack("<3f", *normal))
-        if uv_coords is not None:
-            fw(pack("<2f", *uv_coords))
-        if color is not None:
-            fw(pack("<4B", *color))
+    fw(ply_verts.tobytes())
 
     # Face data
     # ---------------------------
 
-    for pf in ply_faces:
-        length = len(pf)
-        fw(pack("<B%dI" % length, length, *pf))
+    # Each face is its vertex count (uchar) followed by its indices (uint).
+    faces_size = 1 + faces_loop_total * 4
+    faces_start = np.cumsum(faces_size) - faces_size
+    data = np.empty(int(faces_size.sum()), dtype=np.uint8)
+    is_count = np.zeros(len(data), dtype=bool)
+    is_count[faces_start] = True
+    data[is_count] = faces_loop_total
+    data[~is_count] = loops_vert_idx.astype("<u4").view(np.uint8)
+    fw(data.tobytes())
 
 
-def _write_ascii(fw, ply_verts, ply_faces, mesh_verts):
+def _write_ascii(fw, ply_verts, faces_loop_total, loops_vert_idx):
 
     # Vertex data
     # ---------------------------
 
-    for index, normal, uv_coords, color in ply_verts:
-        fw(b"%.6f %.6f %.6f" % mesh_verts[index].co[:])
-        if normal is not None:
-            fw(b" %.6f %.6f %.6f" % normal)
-        if uv_coords is not None:
-            fw(b" %.6f %.6f" % uv_coords)
-        if color is not None:
-            fw(b" %u %u %u %u" % color)
-        fw(b"\n")
+    names = ply_verts.dtype.names
+    line = b"%.6f %.6f %.6f"
+    if "nx" in names:
+        line += b" %.6f %.6f %.6f"
+    if "s" in names:
+        line += b" %.6f %.6f"
+    if "red" in names:
+        line += b" %u %u %u %u"
+    line += b"\n"
+
+    for i in range(0, len(ply_verts), WRITE_BLOCK_SIZE):
+        fw(b"".join([line % v for v in ply_verts[i:i + WRITE_BLOCK_SIZE].tolist()]))
 
     # Face data
     # ---------------------------
 
-    for pf in ply_faces:
-        fw(b"%d" % len(pf))
-        for index in pf:
-            fw(b" %d" % index)
-        fw(b"\n")
+    face_lines = {}
+    faces_loop_end = np.cumsum(faces_loop_total).tolist()
+    faces_loop_total = faces_loop_total.tolist()
+    loops_vert_idx = loops_vert_idx.tolist()
+    for i in range(0, len(faces_loop_total), WRITE_BLOCK_SIZE):
+        lines = []
+        block = slice(i, i + WRITE_BLOCK_SIZE)
+        for end, total in zip(faces_loop_end[block], faces_loop_total[block]):
+            line = face_lines.get(total)
+            if line is None:
+                line = face_lines[total] = b"%d" + b" %d" * total + b"\n"
+            lines.append(line % (total, *loops_vert_idx[end - total:end]))
+        fw(b"".join(lines))
 
 
 def save_mesh(filepath, mesh, use_ascii, use_normals, use_uv_coords, use_colors):
     import bpy
 
-    def rvec3d(v):
-        return round(v[0], 6), round(v[1], 6), round(v[2], 6)
-
-    def rvec2d(v):
-        return round(v[0], 6), round(v[1], 6)
-
     if use_uv_coords and mesh.uv_layers:
         active_uv_layer = mesh.uv_layers.active.data
     else:
@@ -91,66 +100,75 @@ def save_mesh(filepath, mesh, use_ascii, use_normals, use_uv_coords, use_colors)
     else:
         use_colors = False
 
-    # in case
-    color = uvcoord = uvcoord_key = normal = normal_key = None
+    faces_loop_total = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", faces_loop_total)
+    if not use_ascii and len(faces_loop_total) and faces_loop_total.max() > 255:
+        # Vertex counts are written as uchar, larger ones would silently wrap around.
+        raise ValueError("PLY binary export: faces with more than 255 vertices are not supported, "
+                         "triangulate them first")
+    loops_vidx = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loops_vidx)
 
-    mesh_verts = mesh.vertices
-    # vdict = {} # (index, normal, uv) -> new index
-    vdict = [{} for i in range(len(mesh_verts))]
-    ply_verts = []
-    ply_faces = [[] for f in range(len(mesh.polygons))]
-    vert_count = 0
+    # A PLY vertex is written for each unique (vertex, normal, uv, color) of the face corners,
+    # in order of first use, with normals and uvs compared once rounded.
+    loops_keys = [loops_vidx[:, np.newaxis]]
+    fields = [("x", "<f4"), ("y", "<f4"), ("z", "<f4")]
 
-    for i, f in enumerate(mesh.polygons):
-
-        if use_normals:
-            smooth = f.use_smooth
-            if not smooth:
-                normal = f.normal[:]
-                normal_key = rvec3d(normal)
-
-        if use_uv_coords:
-            uv = [
-                active_uv_layer[l].uv[:]
-                for l in range(f.loop_start, f.loop_start + f.loop_total)
-            ]
-        if use_colors:
-            col = [
-                active_col_layer[l].color[:]
-                for l in range(f.loop_start, f.loop_start + f.loop_total)
-            ]
-
-        pf = ply_faces[i]
-        for j, vidx in enumerate(f.vertices):
-            v = mesh_verts[vidx]
-
-            if use_normals and smooth:
-                normal = v.normal[:]
-                normal_key = rvec3d(normal)
-
-            if use_uv_coords:
-                uvcoord = uv[j][0], uv[j][1]
-                uvcoord_key = rvec2d(uvcoord)
-
-            if use_colors:
-                color = col[j]
-                color = (
-                    int(color[0] * 255.0),
-                    int(color[1] * 255.0),
-                    int(color[2] * 255.0),
-                    int(color[3] * 255.0),
-                )
-            key = normal_key, uvcoord_key, color
-
-            vdict_local = vdict[vidx]
-            pf_vidx = vdict_local.get(key)  # Will be None initially
-
-            if pf_vidx is None:  # Same as vdict_local.has_key(key)
-                pf_vidx = vdict_local[key] = vert_count
-                ply_verts.append((vidx, normal, uvcoord, color))
-                vert_count += 1
-
-            pf.append(pf_vidx)
+    if use_normals:
+        faces_smooth = np.empty(len(mesh.polygons), dtype=bool)
+        mesh.polygons.foreach_get("use_smooth", faces_smooth)
+        faces_normal = np.empty(len(mesh.polygons) * 3, dtype=np.float32)
+        mesh.polygons.foreach_get("normal", faces_normal)
+        verts_normal = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("normal", verts_normal)
+        loops_smooth = np.repeat(faces_smooth, faces_loop_total)
+        loops_normal = np.repeat(faces_normal.reshape(-1, 3), faces_loop_total, axis=0)
+        loops_normal[loops_smooth] = verts_normal.reshape(-1, 3)[loops_vidx[loops_smooth]]
+        loops_keys.append(np.rint(loops_normal.astype(np.float64) * 1e6) + 0.0)
+        fields += [("nx", "<f4"), ("ny", "<f4"), ("nz", "<f4")]
+
+    if use_uv_coords:
+        loops_uv = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+        active_uv_layer.foreach_get("uv", loops_uv)
+        loops_uv = loops_uv.reshape(-1, 2)
+        loops_keys.append(np.rint(loops_uv.astype(np.float64) * 1e6) + 0.0)
+        fields += [("s", "<f4"), ("t", "<f4")]
+
+    if use_colors:
+        loops_color = np.empty(len(mesh.loops) * 4, dtype=np.float32)
+        active_col_layer.foreach_get("color", loops_color)
+        loops_color = np.trunc(loops_color.reshape(-1, 4).astype(np.float64) * 255.0)
+        loops_keys.append(loops_color)
+        fields += [("red", "u1"), ("green", "u1"), ("blue", "u1"), ("alpha", "u1")]
+
+    loops_keys = np.hstack(loops_keys).astype(np.float64)
+    if len(loops_keys):
+        __, first_loops, loops_key_idx = np.unique(
+            loops_keys, axis=0, return_index=True, return_inverse=True,
+        )
+    else:
+        first_loops = loops_key_idx = np.empty(0, dtype=np.intp)
+    first_use_order = np.argsort(first_loops, kind='stable')
+    keys_ply_vidx = np.empty(len(first_loops), dtype=np.int32)
+    keys_ply_vidx[first_use_order] = np.arange(len(first_loops), dtype=np.int32)
+    loops_ply_vidx = keys_ply_vidx[loops_key_idx.ravel()]
+    ply_verts_loop = first_loops[first_use_order]
+
+    ply_verts = np.empty(len(ply_verts_loop), dtype=fields)
+    verts_co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", verts_co)
+    ply_verts_co = verts_co.reshape(-1, 3)[loops_vidx[ply_verts_loop]]
+    for i, name in enumerate(("x", "y", "z")):
+        ply_verts[name] = ply_verts_co[:, i]
+    if use_normals:
+        for i, name in enumerate(("nx", "ny", "nz")):
+            ply_verts[name] = loops_normal[ply_verts_loop, i]
+    if use_uv_coords:
+        for i, name in enumerate(("s", "t")):
+            ply_verts[name] = loops_uv[ply_verts_loop, i]
+    if use_colors:
+        for i, name in enumerate(("red", "green", "blue", "alpha")):
+            ply_verts[name] = loops_color[ply_verts_loop, i]
 
     with open(filepath, "wb") as file:
         fw = file.write
@@ -196,9 +214,9 @@ def save_mesh(filepath, mesh, use_ascii, use_normals, use_uv_coords, use_colors)
         # ---------------------------
 
         if use_ascii:
-            _write_ascii(fw, ply_verts, ply_faces, mesh_verts)
+            _write_ascii(fw, ply_verts, faces_loop_total, loops_ply_vidx)
         else:
-            _write_binary(fw, ply_verts, ply_faces, mesh_verts)
+            _write_binary(fw, ply_verts, faces_loop_total, loops_ply_vidx)
 
 
 def save(
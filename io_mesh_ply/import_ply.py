@@ -19,6 +19,27 @@
 # <pep8 compliant>
 
 
+import numpy as np
+
+# Size of the blocks read when decoding list properties of varying lengths.
+READ_BLOCK_SIZE = 16 * 1024 * 1024
+
+# Number of vertices read at once when importing point clouds.
+POINTS_CHUNK_SIZE = 1024 * 1024
+
+
+class ListData:
+    """Values of a list property for all items of an element: counts (one per item) and concatenated values."""
+    __slots__ = (
+        "counts",
+        "values",
+    )
+
+    def __init__(self, counts, values):
+        self.counts = counts
+        self.values = values
+
+
 class ElementSpec:
     __slots__ = (
         "name",
@@ -36,6 +57,127 @@ class ElementSpec:
             stream = stream.readline().split()
         return [x.load(format, stream) for x in self.properties]
 
+    def load_columns(self, format, stream):
+        """
+        Load all items of this element, returns a dict mapping property names to arrays of values
+        (ListData for list properties, and lists for strings).
+        """
+        is_numeric = all(p.numeric_type != 's' for p in self.properties)
+        columns = None
+        if format != b'ascii' and is_numeric and self.count:
+            if all(p.list_type is None for p in self.properties):
+                columns = self._load_fixed_size(format, stream, self.count)
+            else:
+                columns = self._load_uniform_lists(format, stream)
+                if columns is None and len(self.properties) == 1:
+                    columns = self._load_varying_list(format, stream)
+        if columns is None:
+            columns = self._columns_from_items([self.load(format, stream) for i in range(self.count)])
+        return columns
+
+    def iter_columns(self, format, stream, chunk_size):
+        """
+        Load all items of this element by chunks of (at most) given number of items,
+        yields dicts like load_columns does.
+        """
+        is_fixed_size = format != b'ascii' and all(
+            p.numeric_type != 's' and p.list_type is None for p in self.properties
+        )
+        for start in range(0, self.count, chunk_size):
+            count = min(chunk_size, self.count - start)
+            if is_fixed_size:
+                yield self._load_fixed_size(format, stream, count)
+            else:
+                yield self._columns_from_items([self.load(format, stream) for i in range(count)])
+
+    def _load_fixed_size(self, format, stream, count):
+        # All items have the same layout, map them onto a structured array.
+        dtype = np.dtype([(str(i), format + p.numeric_type) for i, p in enumerate(self.properties)])
+        data = np.fromfile(stream, dtype=dtype, count=count)
+        if len(data) != count:
+            raise EOFError("Unexpected end of file in element %r" % self.name)
+        return {p.name: data[str(i)] for i, p in enumerate(self.properties)}
+
+    def _load_uniform_lists(self, format, stream):
+        # Assume all lists have the same lengths as in the first item (e.g. a triangulated mesh),
+        # so that all items have the same layout, else return None, leaving the stream unchanged.
+        start = stream.tell()
+        first_item = self.load(format, stream)
+        stream.seek(start)
+
+        fields = []
+        for i, (p, value) in enumerate(zip(self.properties, first_item)):
+            if p.list_type is None:
+                fields.append((str(i), format + p.numeric_type))
+            else:
+                fields.append(("%d_count" % i, format + p.list_type))
+                fields.append((str(i), format + p.numeric_type, (len(value),)))
+        data = np.fromfile(stream, dtype=np.dtype(fields), count=self.count)
+
+        columns = {}
+        for i, (p, value) in enumerate(zip(self.properties, first_item)):
+            if p.list_type is None:
+                columns[p.name] = data[str(i)]
+            else:
+                counts = data["%d_count" % i]
+                if len(data) != self.count or (counts != len(value)).any():
+                    stream.seek(start)
+                    return None
+                columns[p.name] = ListData(counts, data[str(i)].reshape(-1))
+        return columns
+
+    def _load_varying_list(self, format, stream):
+        # Single list property (e.g. the vertex indices of faces):
+        # only the lengths are read item by item, values are then extracted at once.
+        import struct
+
+        p = self.properties[0]
+        count_size = struct.calcsize(format + p.list_type)
+        value_size = struct.calcsize(format + p.numeric_type)
+        unpack_count = struct.Struct(format + p.list_type).unpack_from
+
+        counts = np.empty(self.count, dtype=np.int64)
+        data = bytearray()
+        pos = 0
+        for i in range(self.count):
+            while len(data) < pos + count_size:
+                block = stream.read(READ_BLOCK_SIZE)
+                if not block:
+                    raise EOFError("Unexpected end of file in element %r" % self.name)
+                data += block
+            count = counts[i] = unpack_count(data, pos)[0]
+            pos += count_size + count * value_size
+        while len(data) < pos:
+            block = stream.read(pos - len(data))
+            if not block:
+                raise EOFError("Unexpected end of file in element %r" % self.name)
+            data += block
+        # Leave the stream at the end of this element.
+        stream.seek(pos - len(data), 1)
+
+        data = np.frombuffer(data, dtype=np.uint8, count=pos)
+        sizes = count_size + counts * value_size
+        is_value = np.ones(pos, dtype=bool)
+        is_value[(np.cumsum(sizes) - sizes)[:, np.newaxis] + np.arange(count_size)] = False
+        values = data[is_value].view(np.dtype(format + p.numeric_type))
+        return {p.name: ListData(counts.astype(np.dtype(format + p.list_type)), values)}
+
+    def _columns_from_items(self, items):
+        columns = {}
+        for i, p in enumerate(self.properties):
+            values = [item[i] for item in items]
+            if p.list_type is None:
+                if p.numeric_type != 's':
+                    values = np.array(values, dtype=p.numeric_type)
+                columns[p.name] = values
+            else:
+                counts = np.array([len(v) for v in values], dtype=p.list_type)
+                values = [x for v in values for x in v]
+                if p.numeric_type != 's':
+                    values = np.array(values, dtype=p.numeric_type)
+                columns[p.name] = ListData(counts, values)
+        return columns
+
     def index(self, name):
         for i, p in enumerate(self.properties):
             if p.name == name:
@@ -111,14 +253,17 @@ class ObjectSpec:
 
     def load(self, format, stream):
         return {
-            i.name: [
-                i.load(format, stream) for j in range(i.count)
-            ]
+            i.name: i.load_columns(format, stream)
             for i in self.specs
         }
 
 
-def read(filepath):
+def read_header(plyf):
+    """
+    Read the header of given PLY file, leaving it at the start of the data.
+    Returns the object spec, the format (struct byte order, or b'ascii') and the texture,
+    or Nones if the header is invalid.
+    """
     import re
 
     format = b''
@@ -151,104 +296,139 @@ def read(filepath):
     obj_spec = ObjectSpec()
     invalid_ply = (None, None, None)
 
-    with open(filepath, 'rb') as plyf:
-        signature = plyf.peek(5)
+    signature = plyf.peek(5)
 
-        if not signature.startswith(b'ply') or not len(signature) >= 5:
-            print("Signature line was invalid")
-            return invalid_ply
+    if not signature.startswith(b'ply') or not len(signature) >= 5:
+        print("Signature line was invalid")
+        return invalid_ply
 
-        custom_line_sep = None
-        if signature[3] != ord(b'\n'):
-            if signature[3] != ord(b'\r'):
-                print("Unknown line separator")
+    custom_line_sep = None
+    if signature[3] != ord(b'\n'):
+        if signature[3] != ord(b'\r'):
+            print("Unknown line separator")
+            return invalid_ply
+        if signature[4] == ord(b'\n'):
+            custom_line_sep = b"\r\n"
+        else:
+            custom_line_sep = b"\r"
+
+    # Work around binary file reading only accepting "\n" as line separator.
+    plyf_header_line_iterator = lambda plyf: plyf
+    if custom_line_sep is not None:
+        def _plyf_header_line_iterator(plyf):
+            buff = plyf.peek(2**16)
+            while len(buff) != 0:
+                read_bytes = 0
+                buff = buff.split(custom_line_sep)
+                for line in buff[:-1]:
+                    read_bytes += len(line) + len(custom_line_sep)
+                    if line.startswith(b'end_header'):
+                        # Since reader code might (will) break iteration at this point,
+                        # we have to ensure file is read up to here, yield, amd return...
+                        plyf.read(read_bytes)
+                        yield line
+                        return
+                    yield line
+                plyf.read(read_bytes)
+                buff = buff[-1] + plyf.peek(2**16)
+        plyf_header_line_iterator = _plyf_header_line_iterator
+
+    valid_header = False
+    for line in plyf_header_line_iterator(plyf):
+        tokens = re.split(br'[ \r\n]+', line)
+
+        if len(tokens) == 0:
+            continue
+        if tokens[0] == b'end_header':
+            valid_header = True
+            break
+        elif tokens[0] == b'comment':
+            if len(tokens) < 2:
+                continue
+            elif tokens[1] == b'TextureFile':
+                if len(tokens) < 4:
+                    print("Invalid texture line")
+                else:
+                    texture = tokens[2]
+            continue
+
+        elif tokens[0] == b'obj_info':
+            continue
+        elif tokens[0] == b'format':
+            if len(tokens) < 3:
+                print("Invalid format line")
+                return invalid_ply
+            if tokens[1] not in format_specs:
+                print("Unknown format", tokens[1])
                 return invalid_ply
-            if signature[4] == ord(b'\n'):
-                custom_line_sep = b"\r\n"
+            try:
+                version_test = float(tokens[2])
+            except Exception as ex:
+                print("Unknown version", ex)
+                version_test = None
+            if version_test != float(version):
+                print("Unknown version", tokens[2])
+                return invalid_ply
+            del version_test
+            format = tokens[1]
+        elif tokens[0] == b'element':
+            if len(tokens) < 3:
+                print("Invalid element line")
+                return invalid_ply
+            obj_spec.specs.append(ElementSpec(tokens[1], int(tokens[2])))
+        elif tokens[0] == b'property':
+            if not len(obj_spec.specs):
+                print("Property without element")
+                return invalid_ply
+            if tokens[1] == b'list':
+                obj_spec.specs[-1].properties.append(PropertySpec(tokens[4], type_specs[tokens[2]], type_specs[tokens[3]]))
             else:
-                custom_line_sep = b"\r"
-
-        # Work around binary file reading only accepting "\n" as line separator.
-        plyf_header_line_iterator = lambda plyf: plyf
-        if custom_line_sep is not None:
-            def _plyf_header_line_iterator(plyf):
-                buff = plyf.peek(2**16)
-                while len(buff) != 0:
-                    read_bytes = 0
-                    buff = buff.split(custom_line_sep)
-                    for line in buff[:-1]:
-                        read_bytes += len(line) + len(custom_line_sep)
-                        if line.startswith(b'end_header'):
-                            # Since reader code might (will) break iteration at this point,
-                            # we have to ensure file is read up to here, yield, amd return...
-                            plyf.read(read_bytes)
-                            yield line
-                            return
-                        yield line
-                    plyf.read(read_bytes)
-                    buff = buff[-1] + plyf.peek(2**16)
-            plyf_header_line_iterator = _plyf_header_line_iterator
+                obj_spec.specs[-1].properties.append(PropertySpec(tokens[2], None, type_specs[tokens[1]]))
+    if not valid_header:
+        print("Invalid header ('end_header' line not found!)")
+        return invalid_ply
 
-        valid_header = False
-        for line in plyf_header_line_iterator(plyf):
-            tokens = re.split(br'[ \r\n]+', line)
-
-            if len(tokens) == 0:
-                continue
-            if tokens[0] == b'end_header':
-                valid_header = True
-                break
-            elif tokens[0] == b'comment':
-                if len(tokens) < 2:
-                    continue
-                elif tokens[1] == b'TextureFile':
-                    if len(tokens) < 4:
-                        print("Invalid texture line")
-                    else:
-                        texture = tokens[2]
-                continue
+    return obj_spec, format_specs[format], texture
 
-            elif tokens[0] == b'obj_info':
-                continue
-            elif tokens[0] == b'format':
-                if len(tokens) < 3:
-                    print("Invalid format line")
-                    return invalid_ply
-                if tokens[1] not in format_specs:
-                    print("Unknown format", tokens[1])
-                    return invalid_ply
-                try:
-                    version_test = float(tokens[2])
-                except Exception as ex:
-                    print("Unknown version", ex)
-                    version_test = None
-                if version_test != float(version):
-                    print("Unknown version", tokens[2])
-                    return invalid_ply
-                del version_test
-                format = tokens[1]
-            elif tokens[0] == b'element':
-                if len(tokens) < 3:
-                    print("Invalid element line")
-                    return invalid_ply
-                obj_spec.specs.append(ElementSpec(tokens[1], int(tokens[2])))
-            elif tokens[0] == b'property':
-                if not len(obj_spec.specs):
-                    print("Property without element")
-                    return invalid_ply
-                if tokens[1] == b'list':
-                    obj_spec.specs[-1].properties.append(PropertySpec(tokens[4], type_specs[tokens[2]], type_specs[tokens[3]]))
-                else:
-                    obj_spec.specs[-1].properties.append(PropertySpec(tokens[2], None, type_specs[tokens[1]]))
-        if not valid_header:
-            print("Invalid header ('end_header' line not found!)")
-            return invalid_ply
 
-        obj = obj_spec.load(format_specs[format], plyf)
+def read(filepath):
+    with open(filepath, 'rb') as plyf:
+        obj_spec, format, texture = read_header(plyf)
+        if obj_spec is None:
+            return None, None, None
+        obj = obj_spec.load(format, plyf)
 
     return obj_spec, obj, texture
 
 
+def vertex_colors_spec(el):
+    """
+    Find color properties of given vertex element, returns their names and the factors converting them to [0, 1],
+    or Nones if there are no colors.
+    """
+    # ignore alpha if not present
+    if el.index(b'alpha') == -1:
+        colnames = (b'red', b'green', b'blue')
+    else:
+        colnames = (b'red', b'green', b'blue', b'alpha')
+    colindices = [el.index(n) for n in colnames]
+    if -1 in colindices:
+        if any(idx > -1 for idx in colindices):
+            print("Warning: At least one obligatory color channel is missing, ignoring vertex colors.")
+        return None, None
+    # if not a float assume uchar
+    colmultiply = [1.0 if el.properties[i].numeric_type in {'f', 'd'} else (1.0 / 255.0) for i in colindices]
+    return colnames, colmultiply
+
+
+def vertex_colors(verts, colnames, colmultiply):
+    """Return the RGBA colors of given vertex columns, as an (n, 4) float array."""
+    cols = np.ones((len(verts[colnames[0]]), 4))
+    for i, (n, mult) in enumerate(zip(colnames, colmultiply)):
+        cols[:, i] = verts[n] * mult
+    return cols
+
+
 def load_ply_mesh(filepath, ply_name):
     import bpy
 
@@ -258,140 +438,93 @@ def load_ply_mesh(filepath, ply_name):
         print("Invalid file")
         return
 
-    uvindices = colindices = None
+    uvnames = colnames = None
     colmultiply = None
 
     # TODO import normals
-    # noindices = None
+    # nonames = None
 
     for el in obj_spec.specs:
         if el.name == b'vertex':
-            vindices_x, vindices_y, vindices_z = el.index(b'x'), el.index(b'y'), el.index(b'z')
-            # noindices = (el.index('nx'), el.index('ny'), el.index('nz'))
-            # if -1 in noindices: noindices = None
-            uvindices = (el.index(b's'), el.index(b't'))
-            if -1 in uvindices:
-                uvindices = None
-            # ignore alpha if not present
-            if el.index(b'alpha') == -1:
-                colindices = el.index(b'red'), el.index(b'green'), el.index(b'blue')
-            else:
-                colindices = el.index(b'red'), el.index(b'green'), el.index(b'blue'), el.index(b'alpha')
-            if -1 in colindices:
-                if any(idx > -1 for idx in colindices):
-                    print("Warning: At least one obligatory color channel is missing, ignoring vertex colors.")
-                colindices = None
-            else:  # if not a float assume uchar
-                colmultiply = [1.0 if el.properties[i].numeric_type in {'f', 'd'} else (1.0 / 255.0) for i in colindices]
+            # nonames = (b'nx', b'ny', b'nz')
+            # if -1 in (el.index(n) for n in nonames): nonames = None
+            uvnames = (b's', b't')
+            if -1 in (el.index(n) for n in uvnames):
+                uvnames = None
+            colnames, colmultiply = vertex_colors_spec(el)
 
         elif el.name == b'face':
-            findex = el.index(b'vertex_indices')
+            fname = el.properties[el.index(b'vertex_indices')].name
         elif el.name == b'tristrips':
-            trindex = el.index(b'vertex_indices')
-        elif el.name == b'edge':
-            eindex1, eindex2 = el.index(b'vertex1'), el.index(b'vertex2')
-
-    mesh_faces = []
-    mesh_uvs = []
-    mesh_colors = []
-
-    def add_face(vertices, indices, uvindices, colindices):
-        mesh_faces.append(indices)
-        if uvindices:
-            mesh_uvs.extend([(vertices[index][uvindices[0]], vertices[index][uvindices[1]]) for index in indices])
-        if colindices:
-            if len(colindices) == 3:
-                mesh_colors.extend([
-                    (
-                        vertices[index][colindices[0]] * colmultiply[0],
-                        vertices[index][colindices[1]] * colmultiply[1],
-                        vertices[index][colindices[2]] * colmultiply[2],
-                        1.0,
-                    )
-                    for index in indices
-                ])
-            elif len(colindices) == 4:
-                mesh_colors.extend([
-                    (
-                        vertices[index][colindices[0]] * colmultiply[0],
-                        vertices[index][colindices[1]] * colmultiply[1],
-                        vertices[index][colindices[2]] * colmultiply[2],
-                        vertices[index][colindices[3]] * colmultiply[3],
-                    )
-                    for index in indices
-                ])
-
-    if uvindices or colindices:
-        # If we have Cols or UVs then we need to check the face order.
-        add_face_simple = add_face
-
-        # EVIL EEKADOODLE - face order annoyance.
-        def add_face(vertices, indices, uvindices, colindices):
-            if len(indices) == 4:
-                if indices[2] == 0 or indices[3] == 0:
-                    indices = indices[2], indices[3], indices[0], indices[1]
-            elif len(indices) == 3:
-                if indices[2] == 0:
-                    indices = indices[1], indices[2], indices[0]
-
-            add_face_simple(vertices, indices, uvindices, colindices)
+            trname = el.properties[el.index(b'vertex_indices')].name
 
     verts = obj[b'vertex']
 
+    faces_loop_total = []
+    loops_vert_idx = []
+
     if b'face' in obj:
-        for f in obj[b'face']:
-            ind = f[findex]
-            add_face(verts, ind, uvindices, colindices)
+        faces = obj[b'face'][fname]
+        faces_loop_total.append(faces.counts)
+        loops_vert_idx.append(faces.values)
 
     if b'tristrips' in obj:
-        for t in obj[b'tristrips']:
-            ind = t[trindex]
-            len_ind = len(ind)
-            for j in range(len_ind - 2):
-                add_face(verts, (ind[j], ind[j + 1], ind[j + 2]), uvindices, colindices)
+        strips = obj[b'tristrips'][trname]
+        strips_end = np.cumsum(strips.counts)
+        for start, end in zip(strips_end - strips.counts, strips_end):
+            ind = np.asarray(strips.values[start:end])
+            tris = np.column_stack((ind[:-2], ind[1:-1], ind[2:]))
+            faces_loop_total.append(np.full(len(tris), 3))
+            loops_vert_idx.append(tris.ravel())
+
+    faces_loop_total = np.concatenate(faces_loop_total or [[]]).astype(np.int32)
+    loops_vert_idx = np.concatenate(loops_vert_idx or [[]]).astype(np.int32)
+    faces_loop_start = np.cumsum(faces_loop_total, dtype=np.int32) - faces_loop_total
+
+    if uvnames or colnames:
+        # If we have Cols or UVs then we need to check the face order.
+        # EVIL EEKADOODLE - face order annoyance.
+        quads_start = faces_loop_start[faces_loop_total == 4]
+        quads_start = quads_start[(loops_vert_idx[quads_start + 2] == 0) |
+                                  (loops_vert_idx[quads_start + 3] == 0)]
+        quads_loops = quads_start[:, np.newaxis] + np.arange(4)
+        loops_vert_idx[quads_loops] = loops_vert_idx[quads_loops[:, (2, 3, 0, 1)]]
+
+        tris_start = faces_loop_start[faces_loop_total == 3]
+        tris_start = tris_start[loops_vert_idx[tris_start + 2] == 0]
+        tris_loops = tris_start[:, np.newaxis] + np.arange(3)
+        loops_vert_idx[tris_loops] = loops_vert_idx[tris_loops[:, (1, 2, 0)]]
 
     mesh = bpy.data.meshes.new(name=ply_name)
 
-    mesh.vertices.add(len(obj[b'vertex']))
+    mesh.vertices.add(len(verts[b'x']))
 
-    mesh.vertices.foreach_set("co", [a for v in obj[b'vertex'] for a in (v[vindices_x], v[vindices_y], v[vindices_z])])
+    verts_co = np.column_stack((verts[b'x'], verts[b'y'], verts[b'z']))
+    mesh.vertices.foreach_set("co", verts_co.astype(np.float32).ravel())
 
     if b'edge' in obj:
-        mesh.edges.add(len(obj[b'edge']))
-        mesh.edges.foreach_set("vertices", [a for e in obj[b'edge'] for a in (e[eindex1], e[eindex2])])
-
-    if mesh_faces:
-        loops_vert_idx = []
-        faces_loop_start = []
-        faces_loop_total = []
-        lidx = 0
-        for f in mesh_faces:
-            nbr_vidx = len(f)
-            loops_vert_idx.extend(f)
-            faces_loop_start.append(lidx)
-            faces_loop_total.append(nbr_vidx)
-            lidx += nbr_vidx
+        edges = obj[b'edge']
+        mesh.edges.add(len(edges[b'vertex1']))
+        edges_vidx = np.column_stack((edges[b'vertex1'], edges[b'vertex2']))
+        mesh.edges.foreach_set("vertices", edges_vidx.astype(np.int32).ravel())
 
+    if len(faces_loop_total):
         mesh.loops.add(len(loops_vert_idx))
-        mesh.polygons.add(len(mesh_faces))
+        mesh.polygons.add(len(faces_loop_total))
 
         mesh.loops.foreach_set("vertex_index", loops_vert_idx)
         mesh.polygons.foreach_set("loop_start", faces_loop_start)
         mesh.polygons.foreach_set("loop_total", faces_loop_total)
 
-        if uvindices:
+        if uvnames:
             uv_layer = mesh.uv_layers.new()
-            for i, uv in enumerate(uv_layer.data):
-                uv.uv = mesh_uvs[i]
+            uvs = np.column_stack([verts[n] for n in uvnames])
+            uv_layer.data.foreach_set("uv", uvs[loops_vert_idx].astype(np.float32).ravel())
 
-        if colindices:
+        if colnames:
             vcol_lay = mesh.vertex_colors.new()
-
-            for i, col in enumerate(vcol_lay.data):
-                col.color[0] = mesh_colors[i][0]
-                col.color[1] = mesh_colors[i][1]
-                col.color[2] = mesh_colors[i][2]
-                col.color[3] = mesh_colors[i][3]
+            cols = vertex_colors(verts, colnames, colmultiply)
+            vcol_lay.data.foreach_set("color", cols[loops_vert_idx].astype(np.float32).ravel())
 
     mesh.update()
     mesh.validate()
@@ -428,14 +561,107 @@ def load_ply_mesh(filepath, ply_name):
     return mesh
 
 
-def load_ply(filepath):
+def load_ply_points(filepath, ply_name, point_decimation='NONE', point_stride=1, voxel_size=0.01):
+    """
+    Create a mesh with only the vertices of given PLY file (and their colors),
+    reading them by chunks and decimating them on the fly, to limit memory usage on huge point clouds.
+    """
+    import bpy
+
+    with open(filepath, 'rb') as plyf:
+        obj_spec, format, texture = read_header(plyf)
+        if obj_spec is None:
+            print("Invalid file")
+            return
+
+        for el in obj_spec.specs:
+            if el.name == b'vertex':
+                break
+            # Skip elements stored before the vertices.
+            for columns in el.iter_columns(format, plyf, POINTS_CHUNK_SIZE):
+                pass
+        else:
+            print("No vertex element found")
+            return
+
+        colnames, colmultiply = vertex_colors_spec(el)
+        if colnames and bpy.app.version < (2, 91, 0):
+            # Vertex color layers only exist on face corners, per point colors need generic attributes.
+            print("Warning: Blender 2.91 or newer is needed to import point colors, ignoring vertex colors.")
+            colnames = None
+
+        if point_decimation == 'VOXEL':
+            # Keep the first point read in each cell of the grid.
+            co = []
+            cols = []
+            # Cells filled by previous chunks, as their packed (bytes) coordinates.
+            cells = set()
+            cell_dtype = np.dtype((np.void, 3 * 8))
+        else:
+            if point_decimation != 'STRIDE':
+                point_stride = 1
+            # Final number of points is known, fill arrays as chunks are read.
+            nbr_points = (el.count + point_stride - 1) // point_stride
+            co = np.empty((nbr_points, 3), dtype=np.float32)
+            cols = np.empty((nbr_points, 4), dtype=np.float32) if colnames else None
+            nbr_points = 0
+
+        start = 0
+        for verts in el.iter_columns(format, plyf, POINTS_CHUNK_SIZE):
+            chunk_co = np.column_stack((verts[b'x'], verts[b'y'], verts[b'z']))
+            nbr_verts = len(chunk_co)
+
+            if point_decimation == 'VOXEL':
+                chunk_cells = np.floor(chunk_co.astype(np.float64) / voxel_size).astype(np.int64)
+                chunk_cells, kept = np.unique(chunk_cells, axis=0, return_index=True)
+                # Ignore cells already filled by previous chunks.
+                chunk_cells = np.ascontiguousarray(chunk_cells).view(cell_dtype).ravel().tolist()
+                is_new = np.fromiter((cell not in cells for cell in chunk_cells), dtype=bool, count=len(chunk_cells))
+                cells.update(chunk_cells)
+                kept = np.sort(kept[is_new])
+            else:
+                kept = slice((-start) % point_stride, None, point_stride)
+            start += nbr_verts
+
+            chunk_co = chunk_co[kept].astype(np.float32)
+            if point_decimation == 'VOXEL':
+                co.append(chunk_co)
+                if colnames:
+                    cols.append(vertex_colors(verts, colnames, colmultiply)[kept].astype(np.float32))
+            else:
+                end = nbr_points + len(chunk_co)
+                co[nbr_points:end] = chunk_co
+                if colnames:
+                    cols[nbr_points:end] = vertex_colors(verts, colnames, colmultiply)[kept]
+                nbr_points = end
+
+    if point_decimation == 'VOXEL':
+        co = np.concatenate(co) if co else np.empty((0, 3), dtype=np.float32)
+        cols = np.concatenate(cols) if cols else np.empty((0, 4), dtype=np.float32)
+
+    mesh = bpy.data.meshes.new(name=ply_name)
+    mesh.vertices.add(len(co))
+    mesh.vertices.foreach_set("co", co.ravel())
+    if colnames:
+        col_attr = mesh.attributes.new(name="Col", type='FLOAT_COLOR', domain='POINT')
+        col_attr.data.foreach_set("color", cols.ravel())
+
+    mesh.update()
+
+    return mesh
+
+
+def load_ply(filepath, use_point_cloud=False, point_decimation='NONE', point_stride=1, voxel_size=0.01):
     import time
     import bpy
 
     t = time.time()
     ply_name = bpy.path.display_name_from_filepath(filepath)
 
-    mesh = load_ply_mesh(filepath, ply_name)
+    if use_point_cloud:
+        mesh = load_ply_points(filepath, ply_name, point_decimation, point_stride, voxel_size)
+    else:
+        mesh = load_ply_mesh(filepath, ply_name)
     if not mesh:
         return {'CANCELLED'}
 
@@ -452,5 +678,5 @@ def load_ply(filepath):
     return {'FINISHED'}
 
 
-def load(operator, context, filepath=""):
-    return load_ply(filepath)
+def load(operator, context, filepath="", **keywords):
+    return load_ply(filepath, **keywords)
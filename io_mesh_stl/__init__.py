@@ -21,7 +21,7 @@
 bl_info = {
     "name": "STL format",
     "author": "Guillaume Bouchard (Guillaum)",
-    "version": (1, 1, 3),
+    "version": (1, 1, 6),
     "blender": (2, 81, 6),
     "location": "File > Import-Export",
     "description": "Import-Export STL files",
@@ -243,6 +243,14 @@ class ExportSTL(Operator, ExportHelper):
             ('OBJECT', "Object", "Each object as a file"),
         ),
     )
+    use_threads: BoolProperty(
+        name="Parallel Writing",
+        description=(
+            "Write the files of objects in background threads, "
+            "while next objects are being processed (Batch Mode: Object)"
+        ),
+        default=False,
+    )
 
     @property
     def check_extension(self):
@@ -250,7 +258,6 @@ class ExportSTL(Operator, ExportHelper):
 
     def execute(self, context):
         import os
-        import itertools
         from mathutils import Matrix
         from . import stl_utils
         from . import blender_utils
@@ -265,7 +272,8 @@ class ExportSTL(Operator, ExportHelper):
                 "filter_glob",
                 "use_scene_unit",
                 "use_mesh_modifiers",
-                "batch_mode"
+                "batch_mode",
+                "use_threads",
             ),
         )
 
@@ -286,18 +294,25 @@ class ExportSTL(Operator, ExportHelper):
         ).to_4x4() @ Matrix.Scale(global_scale, 4)
 
         if self.batch_mode == 'OFF':
-            faces = itertools.chain.from_iterable(
-                    blender_utils.faces_from_mesh(ob, global_matrix, self.use_mesh_modifiers)
-                    for ob in data_seq)
-
-            stl_utils.write_stl(faces=faces, **keywords)
+            faces_seq = (
+                blender_utils.triangles_from_mesh(ob, global_matrix, self.use_mesh_modifiers)
+                for ob in data_seq
+            )
+            stl_utils.write_stl_parts(faces_seq=faces_seq, **keywords)
         elif self.batch_mode == 'OBJECT':
             prefix = os.path.splitext(self.filepath)[0]
-            keywords_temp = keywords.copy()
-            for ob in data_seq:
-                faces = blender_utils.faces_from_mesh(ob, global_matrix, self.use_mesh_modifiers)
-                keywords_temp["filepath"] = prefix + bpy.path.clean_name(ob.name) + ".stl"
-                stl_utils.write_stl(faces=faces, **keywords_temp)
+            files = (
+                (
+                    prefix + bpy.path.clean_name(ob.name) + ".stl",
+                    blender_utils.triangles_from_mesh(ob, global_matrix, self.use_mesh_modifiers),
+                )
+                for ob in data_seq
+            )
+            if self.use_threads:
+                stl_utils.write_stl_files(files, ascii=self.ascii)
+            else:
+                for filepath, faces in files:
+                    stl_utils.write_stl(filepath, faces, self.ascii)
 
         return {'FINISHED'}
 
@@ -329,6 +344,9 @@ class STL_PT_export_main(bpy.types.Panel):
 
         layout.prop(operator, "ascii")
         layout.prop(operator, "batch_mode")
+        sub = layout.column()
+        sub.enabled = operator.batch_mode == 'OBJECT'
+        sub.prop(operator, "use_threads")
 
 
 class STL_PT_export_include(bpy.types.Panel):
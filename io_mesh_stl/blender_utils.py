@@ -21,36 +21,45 @@
 
 def create_and_link_mesh(name, faces, face_nors, points, global_matrix):
     """
-    Create a blender mesh and object called name from a list of
-    *points* and *faces* and link it in the current scene.
+    Create a blender mesh and object called name from arrays of
+    *points* and triangle *faces* and link it in the current scene.
     """
 
-    import array
-    from itertools import chain
+    import numpy as np
     import bpy
 
     mesh = bpy.data.meshes.new(name)
-    mesh.from_pydata(points, [], faces)
 
-    if face_nors:
+    mesh.vertices.add(len(points))
+    mesh.vertices.foreach_set("co", np.asarray(points, dtype=np.float32).ravel())
+
+    mesh.loops.add(len(faces) * 3)
+    mesh.loops.foreach_set("vertex_index", np.asarray(faces, dtype=np.int32).ravel())
+    mesh.polygons.add(len(faces))
+    mesh.polygons.foreach_set("loop_start", np.arange(0, len(faces) * 3, 3, dtype=np.int32))
+    mesh.polygons.foreach_set("loop_total", np.full(len(faces), 3, dtype=np.int32))
+
+    mesh.update(calc_edges=True)
+
+    if face_nors is not None:
         # Note: we store 'temp' normals in loops, since validate() may alter final mesh,
         #       we can only set custom lnors *after* calling it.
         mesh.create_normals_split()
-        lnors = tuple(chain(*chain(*zip(face_nors, face_nors, face_nors))))
-        mesh.loops.foreach_set("normal", lnors)
+        lnors = np.repeat(np.asarray(face_nors, dtype=np.float32), 3, axis=0)
+        mesh.loops.foreach_set("normal", lnors.ravel())
 
     mesh.transform(global_matrix)
 
     # update mesh to allow proper display
     mesh.validate(clean_customdata=False)  # *Very* important to not remove lnors here!
 
-    if face_nors:
-        clnors = array.array('f', [0.0] * (len(mesh.loops) * 3))
+    if face_nors is not None:
+        clnors = np.empty(len(mesh.loops) * 3, dtype=np.float32)
         mesh.loops.foreach_get("normal", clnors)
 
-        mesh.polygons.foreach_set("use_smooth", [True] * len(mesh.polygons))
+        mesh.polygons.foreach_set("use_smooth", np.ones(len(mesh.polygons), dtype=bool))
 
-        mesh.normals_split_custom_set(tuple(zip(*(iter(clnors),) * 3)))
+        mesh.normals_split_custom_set(clnors.reshape(-1, 3))
         mesh.use_auto_smooth = True
         mesh.show_edge_sharp = True
         mesh.free_normals_split()
@@ -63,20 +72,16 @@ def create_and_link_mesh(name, faces, face_nors, points, global_matrix):
     obj.select_set(True)
 
 
-def faces_from_mesh(ob, global_matrix, use_mesh_modifiers=False):
+def triangles_from_mesh(ob, global_matrix, use_mesh_modifiers=False):
     """
-    From an object, return a generator over a list of faces.
-
-    Each faces is a list of his vertexes. Each vertex is a tuple of
-    his coordinate.
+    From an object, return the coordinates of the vertices of its
+    triangles, as an (n, 3, 3) float32 array.
 
     use_mesh_modifiers
-        Apply the preview modifier to the returned liste
-
-    triangulate
-        Split the quad into two triangles
+        Apply the preview modifier to the returned triangles
     """
 
+    import numpy as np
     import bpy
 
     # get the editmode data
@@ -94,10 +99,10 @@ def faces_from_mesh(ob, global_matrix, use_mesh_modifiers=False):
     try:
         mesh = mesh_owner.to_mesh()
     except RuntimeError:
-        return
+        return np.empty((0, 3, 3), dtype=np.float32)
 
     if mesh is None:
-        return
+        return np.empty((0, 3, 3), dtype=np.float32)
 
     mat = global_matrix @ ob.matrix_world
     mesh.transform(mat)
@@ -105,9 +110,11 @@ def faces_from_mesh(ob, global_matrix, use_mesh_modifiers=False):
         mesh.flip_normals()
     mesh.calc_loop_triangles()
 
-    vertices = mesh.vertices
-
-    for tri in mesh.loop_triangles:
-        yield [vertices[index].co.copy() for index in tri.vertices]
+    vertices_co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", vertices_co)
+    triangles_vertices = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("vertices", triangles_vertices)
 
     mesh_owner.to_mesh_clear()
+
+    return vertices_co.reshape(-1, 3)[triangles_vertices].reshape(-1, 3, 3)
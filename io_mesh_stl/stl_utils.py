@@ -29,33 +29,7 @@ blender --python stl_utils.py -- file1.stl file2.stl file3.stl ...
 # TODO: endien
 
 
-class ListDict(dict):
-    """
-    Set struct with order.
-
-    You can:
-       - insert data into without doubles
-       - get the list of data in insertion order with self.list
-
-    Like collections.OrderedDict, but quicker, can be replaced if
-    ODict is optimised.
-    """
-
-    def __init__(self):
-        dict.__init__(self)
-        self.list = []
-        self._len = 0
-
-    def add(self, item):
-        """
-        Add a value to the Set, return its position in it.
-        """
-        value = self.setdefault(item, self._len)
-        if value == self._len:
-            self.list.append(item)
-            self._len += 1
-
-        return value
+import numpy as np
 
 
 # an stl binary file is
@@ -68,6 +42,14 @@ class ListDict(dict):
 #   - 2 bytes of garbage (usually 0)
 BINARY_HEADER = 80
 BINARY_STRIDE = 12 * 4 + 2
+BINARY_FACET_DTYPE = np.dtype([
+    ("normal", "<f4", (3,)),
+    ("vertices", "<f4", (3, 3)),
+    ("attribute", "<u2"),
+])
+
+# Number of facets formatted at once when writing ascii files.
+ASCII_BLOCK_SIZE = 64 * 1024
 
 
 def _header_version():
@@ -104,6 +86,10 @@ def _is_ascii_file(data):
 
 
 def _binary_read(data):
+    """
+    Read all facets at once, returns their normals and the points of
+    their vertices, as (n, 3) and (3n, 3) float32 arrays.
+    """
     # Skip header...
 
     import os
@@ -123,20 +109,8 @@ def _binary_read(data):
         size = file_size // BINARY_STRIDE
         print("WARNING! Reported size (facet number) is 0, inferring %d facets from file size." % size)
 
-    # We read 4096 elements at once, avoids too much calls to read()!
-    CHUNK_LEN = 4096
-    chunks = [CHUNK_LEN] * (size // CHUNK_LEN)
-    chunks.append(size % CHUNK_LEN)
-
-    unpack = struct.Struct('<12f').unpack_from
-    for chunk_len in chunks:
-        if chunk_len == 0:
-            continue
-        buf = data.read(BINARY_STRIDE * chunk_len)
-        for i in range(chunk_len):
-            # read the normal and points coordinates of each triangle
-            pt = unpack(buf, BINARY_STRIDE * i)
-            yield pt[:3], (pt[3:6], pt[6:9], pt[9:])
+    facets = np.fromfile(data, dtype=BINARY_FACET_DTYPE, count=size)
+    return facets["normal"], facets["vertices"].reshape(-1, 3)
 
 
 def _ascii_read(data):
@@ -166,51 +140,67 @@ def _ascii_read(data):
             yield curr_nor, [tuple(map(float, l_item.split()[1:])) for l_item in (l, data.readline(), data.readline())]
 
 
-def _binary_write(filepath, faces):
+def _triangles_normal(triangles):
+    """
+    Return the normals of (n, 3, 3) *triangles*, computed with the same
+    float operations as mathutils.geometry.normal() (Newell's method, then
+    normalized, zero for degenerate triangles).
+    """
+    # Edges from previous to current vertex, in the order Newell's sum goes over them.
+    v_prev = triangles[:, (2, 0, 1)]
+    v_curr = triangles
+    terms = (v_prev - v_curr)[:, :, (1, 2, 0)] * (v_prev + v_curr)[:, :, (2, 0, 1)]
+    normals = terms[:, 0] + terms[:, 1] + terms[:, 2]
+    x, y, z = normals.T
+    lengths_sq = x * x + y * y + z * z
+    is_valid = lengths_sq > 1e-35
+    normals[is_valid] *= (1.0 / np.sqrt(lengths_sq[is_valid]))[:, np.newaxis]
+    normals[~is_valid] = 0.0
+    return normals
+
+
+def _as_triangles(faces):
+    if not isinstance(faces, np.ndarray):
+        faces = list(faces)
+    return np.asarray(faces, dtype=np.float32).reshape(-1, 3, 3)
+
+
+def _binary_write(filepath, faces_seq):
     import struct
-    import itertools
-    from mathutils.geometry import normal
 
     with open(filepath, 'wb') as data:
-        fw = data.write
-        # header
-        # we write padding at header beginning to avoid to
-        # call len(list(faces)) which may be expensive
-        fw(struct.calcsize('<80sI') * b'\0')
-
-        # 3 vertex == 9f
-        pack = struct.Struct('<9f').pack
-
-        # number of vertices written
-        nb = 0
-
-        for face in faces:
-            # calculate face normal
-            # write normal + vertexes + pad as attributes
-            fw(struct.pack('<3f', *normal(*face)) + pack(*itertools.chain.from_iterable(face)))
-            # attribute byte count (unused)
-            fw(b'\0\0')
-            nb += 1
-
-        # header, with correct value now
-        data.seek(0)
-        fw(struct.pack('<80sI', _header_version().encode('ascii'), nb))
-
-
-def _ascii_write(filepath, faces):
-    from mathutils.geometry import normal
+        # The number of facets is only known once all of them are written.
+        data.write(struct.pack('<80sI', _header_version().encode('ascii'), 0))
+        count = 0
+        for faces in faces_seq:
+            triangles = _as_triangles(faces)
+            facets = np.zeros(len(triangles), dtype=BINARY_FACET_DTYPE)
+            facets["normal"] = _triangles_normal(triangles)
+            facets["vertices"] = triangles
+            # write normal + vertexes + attribute byte count (unused) of all facets
+            facets.tofile(data)
+            count += len(facets)
+        data.seek(BINARY_HEADER)
+        data.write(struct.pack('<I', count))
+
+
+def _ascii_write(filepath, faces_seq):
+    facet = (
+        'facet normal %f %f %f\nouter loop\n'
+        'vertex %f %f %f\nvertex %f %f %f\nvertex %f %f %f\n'
+        'endloop\nendfacet\n'
+    )
 
     with open(filepath, 'w') as data:
         fw = data.write
         header = _header_version()
         fw('solid %s\n' % header)
 
-        for face in faces:
-            # calculate face normal
-            fw('facet normal %f %f %f\nouter loop\n' % normal(*face)[:])
-            for vert in face:
-                fw('vertex %f %f %f\n' % vert[:])
-            fw('endloop\nendfacet\n')
+        for faces in faces_seq:
+            triangles = _as_triangles(faces)
+            values = np.hstack((_triangles_normal(triangles), triangles.reshape(-1, 9)))
+            for i in range(0, len(values), ASCII_BLOCK_SIZE):
+                fw(''.join([facet % tuple(v) for v in values[i:i + ASCII_BLOCK_SIZE].tolist()]))
 
         fw('endsolid %s\n' % header)
 
@@ -223,33 +213,109 @@ def write_stl(filepath="", faces=(), ascii=False):
        output filepath
 
     faces
-       iterable of tuple of 3 vertex, vertex is tuple of 3 coordinates as float
+       (n, 3, 3) array of triangles' vertex coordinates, or iterable of
+       tuple of 3 vertex, vertex is tuple of 3 coordinates as float
 
     ascii
        save the file in ascii format (very huge)
     """
-    (_ascii_write if ascii else _binary_write)(filepath, faces)
+    write_stl_parts(filepath, (faces,), ascii)
+
+
+def write_stl_parts(filepath="", faces_seq=(), ascii=False):
+    """
+    Write a single stl file from several sets of faces (as for write_stl()),
+    consumed one after the other, so that only one of them has to be in
+    memory at once.
+    """
+    (_ascii_write if ascii else _binary_write)(filepath, faces_seq)
+
+
+def write_stl_files(files, ascii=False, max_workers=None):
+    """
+    Write several stl files in parallel, using a pool of threads.
+
+    files
+       iterable of (filepath, faces) pairs, faces as for write_stl(),
+       consumed as files get written, so that only a few of them are
+       kept in memory at once.
+    """
+    import os
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for filepath, faces in files:
+            if len(pending) >= max_workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+            pending.add(executor.submit(write_stl, filepath, faces, ascii))
+        for future in pending:
+            future.result()
+
+
+def _weld_points(points):
+    """
+    Merge equal points (coordinates compared exactly).
+
+    Returns the index of each point in the unique points, and the unique
+    points themselves, in order of first use.
+    """
+    if not len(points):
+        return np.empty(0, dtype=np.int32), points
+
+    # Compare bits, after merging -0.0 and 0.0 as they are equal.
+    bits = (points + points.dtype.type(0.0)).view(np.uint32)
+
+    # Sort points by a hash of their coordinates,
+    # equal points end up next to each other.
+    hashes = np.zeros(len(points), dtype=np.uint64)
+    for column in bits.T:
+        hashes *= np.uint64(0x100000001B3)
+        hashes ^= column
+    order = np.argsort(hashes)
+    sorted_hashes = hashes[order]
+    is_first = np.empty(len(points), dtype=bool)
+    is_first[0] = True
+    np.not_equal(sorted_hashes[1:], sorted_hashes[:-1], out=is_first[1:])
+
+    sorted_bits = bits[order]
+    is_new = (sorted_bits[1:] != sorted_bits[:-1]).any(axis=1)
+    if (is_new & ~is_first[1:]).any():
+        # Different points with the same hash (very unlikely),
+        # sort by coordinates instead.
+        order = np.lexsort(bits.T[::-1])
+        is_first[1:] = (bits[order[1:]] != bits[order[:-1]]).any(axis=1)
+
+    starts = np.flatnonzero(is_first)
+    first_uses = np.minimum.reduceat(order, starts)
+    unique_index = np.empty(len(starts), dtype=np.int32)
+    unique_index[np.argsort(first_uses)] = np.arange(len(starts), dtype=np.int32)
+
+    indices = np.empty(len(points), dtype=np.int32)
+    indices[order] = unique_index[np.cumsum(is_first) - 1]
+    return indices, points[np.sort(first_uses)]
 
 
 def read_stl(filepath):
     """
     Return the triangles and points of an stl binary file.
 
-    Please note that this process can take lot of time if the file is
-    huge (~1m30 for a 1 Go stl file on an quad core i7).
-
     - returns a tuple(triangles, triangles' normals, points).
 
       triangles
-          A list of triangles, each triangle as a tuple of 3 index of
-          point in *points*.
+          An (n, 3) int array of triangles, each triangle as 3 indices
+          of points in *points*.
 
       triangles' normals
-          A list of vectors3 (tuples, xyz).
+          An (n, 3) float array of vectors (xyz).
 
       points
-          An indexed list of points, each point is a tuple of 3 float
-          (xyz).
+          An (m, 3) float array of unique points (xyz).
 
     Example of use:
 
@@ -262,23 +328,25 @@ def read_stl(filepath):
     import time
     start_time = time.process_time()
 
-    tris, tri_nors, pts = [], [], ListDict()
-
     with open(filepath, 'rb') as data:
         # check for ascii or binary
-        gen = _ascii_read if _is_ascii_file(data) else _binary_read
-
-        for nor, pt in gen(data):
-            # Add the triangle and the point.
-            # If the point is already in the list of points, the
-            # index returned by pts.add() will be the one from the
-            # first equal point inserted.
-            tris.append([pts.add(p) for p in pt])
-            tri_nors.append(nor)
+        if _is_ascii_file(data):
+            tri_nors, tri_pts = [], []
+            for nor, pt in _ascii_read(data):
+                tri_nors.append(nor if nor is not None else (0.0, 0.0, 0.0))
+                tri_pts.extend(pt)
+            tri_nors = np.array(tri_nors, dtype=np.float64).reshape(-1, 3)
+            tri_pts = np.array(tri_pts, dtype=np.float64).reshape(-1, 3)
+        else:
+            tri_nors, tri_pts = _binary_read(data)
+
+    # Each triangle uses the first of the equal points.
+    tris, pts = _weld_points(tri_pts)
+    tris = tris.reshape(-1, 3)
 
     print('Import finished in %.4f sec.' % (time.process_time() - start_time))
 
-    return tris, tri_nors, pts.list
+    return tris, tri_nors, pts
 
 
 if __name__ == '__main__':
@@ -21,7 +21,7 @@
 bl_info = {
     "name": "FBX format",
     "author": "Campbell Barton, Bastien Montagne, Jens Restemeier",
-    "version": (4, 22, 0),
+    "version": (4, 26, 3),
     "blender": (2, 90, 0),
     "location": "File > Import-Export",
     "description": "FBX IO meshes, UV's, vertex colors, materials, textures, cameras, lamps and actions",
@@ -46,6 +46,7 @@ import bpy
 from bpy.props import (
         StringProperty,
         BoolProperty,
+        IntProperty,
         FloatProperty,
         EnumProperty,
         CollectionProperty,
@@ -199,6 +200,33 @@ class ImportFBX(bpy.types.Operator, ImportHelper):
             default=True,
             )
 
+    decompress_threads: IntProperty(
+            name="Decompression Threads",
+            description="Number of threads used to decompress all array data of the file before import "
+                        "(0 to use all available CPUs, 1 to only decompress data when it is actually used)",
+            min=0, max=64,
+            default=1,
+            )
+
+    use_parse_cache: BoolProperty(
+            name="Use Parse Cache",
+            description="Keep a pre-parsed copy of imported files on disk, re-importing an unchanged file "
+                        "then skips reading and decompressing it",
+            default=False,
+            )
+    parse_cache_dir: StringProperty(
+            name="Cache Directory",
+            description="Directory where parsed files are cached (leave empty to use a sub-directory "
+                        "of Blender's user data files, only accessible to current user)",
+            subtype='DIR_PATH',
+            )
+    parse_cache_size: IntProperty(
+            name="Cache Size (MiB)",
+            description="Maximum total size of the cache directory, least recently used files are removed first",
+            min=1, max=1024 * 1024,
+            default=1024,
+            )
+
     def draw(self, context):
         pass
 
@@ -248,6 +276,12 @@ class FBX_PT_import_include(bpy.types.Panel):
         sub.enabled = operator.use_custom_props
         sub.prop(operator, "use_custom_props_enum_as_string")
         layout.prop(operator, "use_image_search")
+        layout.prop(operator, "decompress_threads")
+        layout.prop(operator, "use_parse_cache")
+        sub = layout.column()
+        sub.enabled = operator.use_parse_cache
+        sub.prop(operator, "parse_cache_dir")
+        sub.prop(operator, "parse_cache_size")
 
 
 class FBX_PT_import_transform(bpy.types.Panel):
@@ -571,6 +605,13 @@ class ExportFBX(bpy.types.Operator, ExportHelper):
             description="Always add a keyframe at start and end of actions for animated channels",
             default=True,
             )
+    bake_anim_batch_actions: BoolProperty(
+            name="Batch Actions",
+            description="When exporting all actions, bake actions of different objects together, evaluating "
+                        "each frame only once for all of them (much faster with many animated objects, but "
+                        "only valid if their animations do not depend on each other, e.g. through constraints)",
+            default=False,
+            )
     bake_anim_step: FloatProperty(
             name="Sampling Rate",
             description="How often to evaluate animated values (in frames)",
@@ -836,6 +877,9 @@ class FBX_PT_export_bake_animation(bpy.types.Panel):
         layout.prop(operator, "bake_anim_use_all_bones")
         layout.prop(operator, "bake_anim_use_nla_strips")
         layout.prop(operator, "bake_anim_use_all_actions")
+        sub = layout.row()
+        sub.enabled = operator.bake_anim_use_all_actions
+        sub.prop(operator, "bake_anim_batch_actions")
         layout.prop(operator, "bake_anim_force_startend_keying")
         layout.prop(operator, "bake_anim_step")
         layout.prop(operator, "bake_anim_simplify_factor")
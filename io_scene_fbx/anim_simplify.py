@@ -0,0 +1,84 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# Simplification of baked animation curves, kept free of any Blender dependency so that it can be tested standalone.
+
+import numpy as np
+
+
+def simplify_keys(values, fac):
+    """
+    Simplify sampled curves, given as a (frames, channels) array of values, by only enabling samples when
+    their values relatively differ from the previous sample ones, or from the previous keyed ones.
+
+    Returns a (frames, channels) array of booleans telling which samples to write,
+    and for each channel, whether anything was keyed at all.
+    """
+    # So that, with default factor and step values (1), we get:
+    min_reldiff_fac = fac * 1.0e-3  # min relative value evolution: 0.1% of current 'order of magnitude'.
+    min_absdiff_fac = 0.1  # A tenth of reldiff...
+
+    values = np.asarray(values, dtype=np.float64)
+    num_frames, num_channels = values.shape
+    write = np.zeros(values.shape, dtype=bool)
+    if num_frames < 2:
+        return write, np.zeros(num_channels, dtype=bool)
+
+    prev = values[:-1]
+    curr = values[1:]
+    # Never write keyframe when value is exactly the same as prev one!
+    changed = curr != prev
+
+    # This is contracted form of relative + absolute-near-zero difference:
+    #     absdiff = abs(a - b)
+    #     if absdiff < min_reldiff_fac * min_absdiff_fac:
+    #         return False
+    #     return (absdiff / ((abs(a) + abs(b)) / 2)) > min_reldiff_fac
+    # Note that we ignore the '/ 2' part here, since it's not much significant for us.
+    with np.errstate(invalid='ignore'):
+        key_both = changed & (np.abs(curr - prev) >
+                              (min_reldiff_fac * np.maximum(np.abs(curr) + np.abs(prev), min_absdiff_fac)))
+    # If enough difference from previous sampled value, key this value *and* the previous one!
+    write[1:] = key_both
+    write[:-1] |= key_both
+
+    # Else, if enough difference from previous keyed value, key this value only!
+    # The previous keyed value depends on all previous decisions, so this has to be done frame after frame,
+    # but we only need to check frames where at least one channel changed without being keyed already.
+    candidates = changed & ~key_both
+    rows = np.flatnonzero(candidates.any(axis=1))
+    if len(rows):
+        channels = np.arange(num_channels)
+        # For each frame and channel, last frame (up to that one) keyed because of previous sample difference.
+        last_key_both = np.maximum.accumulate(np.where(key_both, np.arange(1, num_frames)[:, None], 0), axis=0)
+        # For each channel, last frame keyed because of previous keyed value difference.
+        last_key_single = np.zeros(num_channels, dtype=last_key_both.dtype)
+        with np.errstate(invalid='ignore'):
+            for row in rows:
+                frame = row + 1
+                p_keyed_frame = np.maximum(last_key_both[row - 1], last_key_single) if row else last_key_single
+                p_keyed = values[p_keyed_frame, channels]
+                val = values[frame]
+                key = candidates[row] & (np.abs(val - p_keyed) >
+                                         (min_reldiff_fac * np.maximum(np.abs(val) + np.abs(p_keyed), min_absdiff_fac)))
+                write[frame] |= key
+                last_key_single[key] = frame
+
+    return write, write.any(axis=0)
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+
+# XXX Not really nice, but that hack is needed to allow execution of that test
+#     from both automated CTest and by directly running the file manually.
+if __name__ == '__main__':
+    from anim_simplify import simplify_keys
+else:
+    from .anim_simplify import simplify_keys
+import math
+import random
+import unittest
+
+
+def simplify_keys_reference(keys, fac):
+    """
+    Former, pure python implementation of AnimationCurveNodeWrapper.simplify(), used as reference.
+    keys are (frame, values) pairs, returns write flags and are_keyed flags as lists.
+    """
+    min_reldiff_fac = fac * 1.0e-3
+    min_absdiff_fac = 0.1
+    keys = [(currframe, key, [True] * len(key)) for currframe, key in keys]
+
+    p_currframe, p_key, p_key_write = keys[0]
+    p_keyed = list(p_key)
+    are_keyed = [False] * len(p_key)
+    for currframe, key, key_write in keys:
+        for idx, (val, p_val) in enumerate(zip(key, p_key)):
+            key_write[idx] = False
+            p_keyedval = p_keyed[idx]
+            if val == p_val:
+                continue
+            if abs(val - p_val) > (min_reldiff_fac * max(abs(val) + abs(p_val), min_absdiff_fac)):
+                key_write[idx] = True
+                p_key_write[idx] = True
+                p_keyed[idx] = val
+                are_keyed[idx] = True
+            elif abs(val - p_keyedval) > (min_reldiff_fac * max((abs(val) + abs(p_keyedval)), min_absdiff_fac)):
+                key_write[idx] = True
+                p_keyed[idx] = val
+                are_keyed[idx] = True
+        p_currframe, p_key, p_key_write = currframe, key, key_write
+
+    return [key_write for _currframe, _key, key_write in keys], are_keyed
+
+
+class SimplifyKeysTest(unittest.TestCase):
+    def assertSameAsReference(self, curves, fac=1.0):
+        keys = list(enumerate(zip(*curves)))
+        ref_write, ref_are_keyed = simplify_keys_reference(keys, fac)
+        write, are_keyed = simplify_keys([key for _frame, key in keys], fac)
+        self.assertEqual(write.tolist(), ref_write)
+        self.assertEqual(are_keyed.tolist(), ref_are_keyed)
+
+    def test_single_frame(self):
+        self.assertSameAsReference([[1.0], [0.0]])
+
+    def test_constant(self):
+        self.assertSameAsReference([[1.0] * 50, [0.0] * 50, [-1e-8] * 50])
+
+    def test_steps(self):
+        self.assertSameAsReference([[0.0] * 10 + [1.0] * 10 + [0.0] * 10])
+
+    def test_slow_drift(self):
+        # Per-frame differences below threshold, only the 'previous keyed value' rule keys anything.
+        self.assertSameAsReference([[1.0 + i * 1e-4 for i in range(200)],
+                                    [-i * 3e-5 for i in range(200)]])
+
+    def test_sine(self):
+        for fac in (0.1, 1.0, 5.0):
+            self.assertSameAsReference([[math.sin(i / 20.0) for i in range(300)],
+                                        [math.cos(i / 7.0) * 100.0 for i in range(300)]], fac)
+
+    def test_special_values(self):
+        nan, inf = float("nan"), float("inf")
+        self.assertSameAsReference([[0.0, nan, nan, 1.0, 1.0, inf, inf, -inf, 0.0, -0.0, 2.0]])
+
+    def test_random(self):
+        rnd = random.Random(42)
+        for _ in range(50):
+            num_frames = rnd.randint(1, 100)
+            curves = []
+            for _ in range(rnd.randint(1, 12)):
+                val = rnd.uniform(-10.0, 10.0)
+                scale = 10 ** rnd.uniform(-6.0, 1.0)
+                curve = []
+                for _ in range(num_frames):
+                    if rnd.random() < 0.8:
+                        val += rnd.gauss(0.0, scale)
+                    curve.append(val)
+                curves.append(curve)
+            self.assertSameAsReference(curves, rnd.choice((0.1, 1.0, 3.0)))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -27,6 +27,8 @@ except:
 
 from struct import pack
 import array
+import os
+import tempfile
 import zlib
 
 _BLOCK_SENTINEL_LENGTH = 13
@@ -130,6 +132,15 @@ class FBXElem:
         self.props_type.append(data_types.STRING)
         self.props.append(data)
 
+    @staticmethod
+    def _as_array(data, array_type):
+        if hasattr(data, "astype"):
+            # numpy arrays, convert them through the buffer protocol instead of iterating over all items.
+            data_array = array.array(array_type)
+            data_array.frombytes(memoryview(data.astype(array_type, order='C', copy=False)).cast('B'))
+            return data_array
+        return array.array(array_type, data)
+
     def _add_array_helper(self, data, array_type, prop_type):
         assert(isinstance(data, array.array))
         assert(data.typecode == array_type)
@@ -158,32 +169,32 @@ class FBXElem:
 
     def add_int32_array(self, data):
         if not isinstance(data, array.array):
-            data = array.array(data_types.ARRAY_INT32, data)
+            data = self._as_array(data, data_types.ARRAY_INT32)
         self._add_array_helper(data, data_types.ARRAY_INT32, data_types.INT32_ARRAY)
 
     def add_int64_array(self, data):
         if not isinstance(data, array.array):
-            data = array.array(data_types.ARRAY_INT64, data)
+            data = self._as_array(data, data_types.ARRAY_INT64)
         self._add_array_helper(data, data_types.ARRAY_INT64, data_types.INT64_ARRAY)
 
     def add_float32_array(self, data):
         if not isinstance(data, array.array):
-            data = array.array(data_types.ARRAY_FLOAT32, data)
+            data = self._as_array(data, data_types.ARRAY_FLOAT32)
         self._add_array_helper(data, data_types.ARRAY_FLOAT32, data_types.FLOAT32_ARRAY)
 
     def add_float64_array(self, data):
         if not isinstance(data, array.array):
-            data = array.array(data_types.ARRAY_FLOAT64, data)
+            data = self._as_array(data, data_types.ARRAY_FLOAT64)
         self._add_array_helper(data, data_types.ARRAY_FLOAT64, data_types.FLOAT64_ARRAY)
 
     def add_bool_array(self, data):
         if not isinstance(data, array.array):
-            data = array.array(data_types.ARRAY_BOOL, data)
+            data = self._as_array(data, data_types.ARRAY_BOOL)
         self._add_array_helper(data, data_types.ARRAY_BOOL, data_types.BOOL_ARRAY)
 
     def add_byte_array(self, data):
         if not isinstance(data, array.array):
-            data = array.array(data_types.ARRAY_BYTE, data)
+            data = self._as_array(data, data_types.ARRAY_BYTE)
         self._add_array_helper(data, data_types.ARRAY_BYTE, data_types.BYTE_ARRAY)
 
     # -------------------------
@@ -285,6 +296,26 @@ def _write_timedate_hack(elem_root):
         print("Missing fields!")
 
 
+def _write_footer(write, tell, version):
+    write(_FOOT_ID)
+    write(b'\x00' * 4)
+
+    # padding for alignment (values between 1 & 16 observed)
+    # if already aligned to 16, add a full 16 bytes padding.
+    ofs = tell()
+    pad = ((ofs + 15) & ~15) - ofs
+    if pad == 0:
+        pad = 16
+
+    write(b'\0' * pad)
+
+    write(pack('<I', version))
+
+    # unknown magic (always the same)
+    write(b'\0' * 120)
+    write(b'\xf8\x5a\x8c\x6a\xde\xf5\xd9\x7e\xec\xe9\x0c\xe3\x75\x8f\x29\x0b')
+
+
 def write(fn, elem_root, version):
     assert(elem_root.id == b'')
 
@@ -302,20 +333,156 @@ def write(fn, elem_root, version):
         elem_root._calc_offsets_children(tell(), False)
         elem_root._write_children(write, tell, False)
 
-        write(_FOOT_ID)
-        write(b'\x00' * 4)
+        _write_footer(write, tell, version)
 
-        # padding for alignment (values between 1 & 16 observed)
-        # if already aligned to 16, add a full 16 bytes padding.
-        ofs = tell()
-        pad = ((ofs + 15) & ~15) - ofs
-        if pad == 0:
-            pad = 16
 
-        write(b'\0' * pad)
+class FBXStreamWriter:
+    """
+    Write elements to a FBX file as soon as they are generated, instead of building the whole tree first.
 
-        write(pack('<I', version))
+    Complete elements are written with write_children(), while elements whose children are generated
+    piece by piece are opened with open_elem() and finalized with close_elem(). Their end offsets
+    are reserved and back-patched once known. Output is identical to the one of write().
 
-        # unknown magic (always the same)
-        write(b'\0' * 120)
-        write(b'\xf8\x5a\x8c\x6a\xde\xf5\xd9\x7e\xec\xe9\x0c\xe3\x75\x8f\x29\x0b')
+    Data is streamed into a temporary file next to the target one, which only replaces it once complete,
+    so that a failed export never leaves a truncated file nor destroys an existing one.
+
+    Nesting and 'is last' handling: elements are always written as if they were not the last child of
+    their parent; when closing the parent, the end offset of its last child is fixed if needed. This
+    works because the extra block sentinel that child got is then exactly overwritten by the
+    (identical) sentinel of its parent.
+    """
+    __slots__ = (
+        "_fn",
+        "_tmp_fn",
+        "_file",
+        "_version",
+        "_stack",  # open elements, as [elem, header_offset, last_child] lists, root one being first.
+        "_timedate_done",
+        )
+
+    def __init__(self, fn, version):
+        self._fn = fn
+        fd, self._tmp_fn = tempfile.mkstemp(prefix=os.path.basename(fn) + ".", suffix=".tmp",
+                                            dir=os.path.dirname(fn))
+        self._file = open(fd, 'wb')
+        # mkstemp only gives access to the owner, use the permissions a plain open() would have given.
+        try:
+            mode = os.stat(fn).st_mode & 0o777
+        except FileNotFoundError:
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+        os.chmod(self._tmp_fn, mode)
+        self._version = version
+        self._timedate_done = False
+
+        self._file.write(_HEAD_MAGIC)
+        self._file.write(pack('<I', version))
+
+        self._stack = [[None, -1, None]]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.discard()
+            return
+        try:
+            self.close()
+        except:
+            self.discard()
+            raise
+
+    def _child_written(self, elem, elem_offset, has_children):
+        # Childless elements only get a trailing block sentinel when they are not the last of their parent.
+        has_sentinel = not has_children and (not elem.props or elem.id in _ELEMS_ID_ALWAYS_BLOCK_SENTINEL)
+        self._stack[-1][2] = (elem_offset, elem._end_offset, has_sentinel)
+
+    def write_elem(self, elem):
+        """Write given complete element (and its children) into currently opened one."""
+        assert(elem.id != b'')
+        f = self._file
+        elem_offset = f.tell()
+        elem._calc_offsets(elem_offset, False)
+        elem._write(f.write, f.tell, False)
+        self._child_written(elem, elem_offset, bool(elem.elems))
+
+    def write_children(self, elem):
+        """
+        Write all children of given (not written) element into currently opened one, and free them.
+        When elem is the root one (empty id), handles the FileId/CreationTime hack as write() does.
+        """
+        if elem.id == b'' and not self._timedate_done:
+            _write_timedate_hack(elem)
+            self._timedate_done = True
+        for sub_elem in elem.elems:
+            self.write_elem(sub_elem)
+        elem.elems.clear()
+
+    def open_elem(self, elem):
+        """Write header and properties of given element, its children being written until close_elem()."""
+        assert(elem.id != b'' and not elem.elems)
+        f = self._file
+        elem_offset = f.tell()
+        props_length = 0
+        for data in elem.props:
+            props_length += 1 + len(data)
+        elem._props_length = props_length
+
+        # End offset is not known yet, reserved and written in close_elem().
+        f.write(pack('<3I', 0, len(elem.props), props_length))
+        f.write(bytes((len(elem.id),)))
+        f.write(elem.id)
+        for i, data in enumerate(elem.props):
+            f.write(bytes((elem.props_type[i],)))
+            f.write(data)
+
+        self._stack.append([elem, elem_offset, None])
+
+    def _close_children(self):
+        f = self._file
+        last_child = self._stack[-1][2]
+        if last_child is not None:
+            child_offset, child_end_offset, child_has_sentinel = last_child
+            if child_has_sentinel:
+                # Last child has no sentinel, its parent's one will overwrite it.
+                child_end_offset -= _BLOCK_SENTINEL_LENGTH
+                f.seek(child_offset)
+                f.write(pack('<I', child_end_offset))
+                f.seek(child_end_offset)
+            f.write(_BLOCK_SENTINEL_DATA)
+        return last_child is not None
+
+    def close_elem(self):
+        """Finalize the currently opened element."""
+        assert(len(self._stack) > 1)
+        f = self._file
+        has_children = self._close_children()
+        elem, elem_offset, _last_child = self._stack.pop()
+        if not has_children and (not elem.props or elem.id in _ELEMS_ID_ALWAYS_BLOCK_SENTINEL):
+            f.write(_BLOCK_SENTINEL_DATA)
+        elem._end_offset = end_offset = f.tell()
+
+        f.seek(elem_offset)
+        f.write(pack('<I', end_offset))
+        f.seek(end_offset)
+
+        self._child_written(elem, elem_offset, has_children)
+
+    def close(self):
+        """Finalize the root element and write the file footer."""
+        assert(len(self._stack) == 1)
+        f = self._file
+        if not self._close_children():
+            f.write(_BLOCK_SENTINEL_DATA)
+        _write_footer(f.write, f.tell, self._version)
+        f.close()
+        os.replace(self._tmp_fn, self._fn)
+
+    def discard(self):
+        """Abort writing, removing the temporary file and leaving the target one untouched."""
+        self._file.close()
+        if os.path.exists(self._tmp_fn):
+            os.remove(self._tmp_fn)
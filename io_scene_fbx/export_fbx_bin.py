@@ -29,6 +29,8 @@ import time
 
 from itertools import zip_longest, chain
 
+import numpy as np
+
 if "bpy" in locals():
     import importlib
     if "encode_bin" in locals():
@@ -65,7 +67,7 @@ from .fbx_utils import (
     units_blender_to_fbx_factor, units_convertor, units_convertor_iter,
     matrix4_to_array, similar_values, similar_values_iter,
     # Mesh transform helpers.
-    vcos_transformed_gen, nors_transformed_gen,
+    vcos_transformed_gen, nors_transformed_gen, vcos_transformed, nors_transformed, array_unique_rows,
     # UUID from key.
     get_fbx_uuid_from_key,
     # Key generators.
@@ -892,9 +894,9 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
     elem_data_single_int32(geom, b"GeometryVersion", FBX_GEOMETRY_VERSION)
 
     # Vertex cos.
-    t_co = array.array(data_types.ARRAY_FLOAT64, (0.0,)) * len(me.vertices) * 3
+    t_co = np.empty(len(me.vertices) * 3, dtype=np.float32)
     me.vertices.foreach_get("co", t_co)
-    elem_data_single_float64_array(geom, b"Vertices", chain(*vcos_transformed_gen(t_co, geom_mat_co)))
+    elem_data_single_float64_array(geom, b"Vertices", vcos_transformed(t_co, geom_mat_co))
     del t_co
 
     # Polygon indices.
@@ -903,17 +905,24 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
     #
     # Note we have to process Edges in the same time, as they are based on poly's loops...
     loop_nbr = len(me.loops)
-    t_pvi = array.array(data_types.ARRAY_INT32, (0,)) * loop_nbr
-    t_ls = [None] * len(me.polygons)
+    t_pvi = np.empty(loop_nbr, dtype=np.int32)
+    t_ls = np.empty(len(me.polygons), dtype=np.int32)
 
     me.loops.foreach_get("vertex_index", t_pvi)
     me.polygons.foreach_get("loop_start", t_ls)
 
+    t_ev = np.empty(len(me.edges) * 2, dtype=np.int32)
+    me.edges.foreach_get("vertices", t_ev)
+    t_ev.shape = (-1, 2)
+
     # Add "fake" faces for loose edges.
     if scene_data.settings.use_mesh_edges:
-        t_le = tuple(e.vertices for e in me.edges if e.is_loose)
-        t_pvi.extend(chain(*t_le))
-        t_ls.extend(range(loop_nbr, loop_nbr + len(t_le), 2))
+        t_el = np.empty(len(me.edges), dtype=bool)
+        me.edges.foreach_get("is_loose", t_el)
+        t_le = t_ev[t_el]
+        t_pvi = np.concatenate((t_pvi, t_le.ravel()))
+        t_ls = np.concatenate((t_ls, np.arange(loop_nbr, loop_nbr + len(t_le), 2, dtype=np.int32)))
+        del t_el
         del t_le
 
     # Edges...
@@ -924,39 +933,59 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
     #                 for loose edges).
     #       We also have to store a mapping from real edges to their indices in this array, for edge-mapped data
     #       (like e.g. crease).
-    t_eli = array.array(data_types.ARRAY_INT32)
-    edges_map = {}
+    t_ls = np.unique(t_ls)
+    t_eli = np.empty(0, dtype=np.int32)
+    edges_map = np.full(len(me.edges), -1, dtype=np.int64)  # Real edge index -> its index in t_eli.
     edges_nbr = 0
-    if t_ls and t_pvi:
-        t_ls = set(t_ls)
-        todo_edges = [None] * len(me.edges) * 2
-        # Sigh, cannot access edge.key through foreach_get... :/
-        me.edges.foreach_get("vertices", todo_edges)
-        todo_edges = set((v1, v2) if v1 < v2 else (v2, v1) for v1, v2 in zip(*(iter(todo_edges),) * 2))
-
-        li = 0
-        vi = vi_start = t_pvi[0]
-        for li_next, vi_next in enumerate(t_pvi[1:] + t_pvi[:1], start=1):
-            if li_next in t_ls:  # End of a poly's loop.
-                vi2 = vi_start
-                vi_start = vi_next
-            else:
-                vi2 = vi_next
-
-            e_key = (vi, vi2) if vi < vi2 else (vi2, vi)
-            if e_key in todo_edges:
-                t_eli.append(li)
-                todo_edges.remove(e_key)
-                edges_map[e_key] = edges_nbr
-                edges_nbr += 1
-
-            vi = vi_next
-            li = li_next
+    if len(t_ls) and len(t_pvi):
+        # Edges are identified by a unique integer key built from their sorted vertex indices.
+        key_fac = np.int64(len(me.vertices))
+        e_keys = t_ev.min(axis=1).astype(np.int64) * key_fac + t_ev.max(axis=1)
+
+        # Second vertex of each loop's edge, i.e. the next loop's vertex, or the first one of the poly
+        # when we reach its end.
+        # Note that the last loop of the last poly is wrapped to the very first vertex, as historically done.
+        l_nbr = len(t_pvi)
+        l_is_end = np.zeros(l_nbr + 1, dtype=bool)
+        l_is_end[t_ls] = True
+        l_is_end = l_is_end[1:]
+        l_starts = np.union1d(t_ls, (0,))
+        l_starts = l_starts[np.searchsorted(l_starts, np.arange(l_nbr), side='right') - 1]
+        t_pvi2 = np.roll(t_pvi, -1)
+        t_pvi2[l_is_end] = t_pvi[l_starts[l_is_end]]
+        l_keys = np.minimum(t_pvi, t_pvi2).astype(np.int64) * key_fac + np.maximum(t_pvi, t_pvi2)
+        del l_is_end
+        del l_starts
+        del t_pvi2
+
+        # First loop of each real edge, in loops order.
+        l_valid = np.flatnonzero(np.isin(l_keys, e_keys))
+        l_keys_unique, l_first = np.unique(l_keys[l_valid], return_index=True)
+        l_first = l_valid[l_first]
+        l_order = np.argsort(l_first)
+        t_eli = l_first[l_order].astype(np.int32)
+        edges_nbr = len(t_eli)
+        del l_keys
+        del l_valid
+        del l_first
+
+        if edges_nbr:
+            keys_to_eli = np.empty(edges_nbr, dtype=np.int64)
+            keys_to_eli[l_order] = np.arange(edges_nbr)
+            e_pos = np.minimum(np.searchsorted(l_keys_unique, e_keys), edges_nbr - 1)
+            e_found = l_keys_unique[e_pos] == e_keys
+            edges_map[e_found] = keys_to_eli[e_pos[e_found]]
+            del keys_to_eli
+            del e_pos
+            del e_found
+        del l_keys_unique
+        del l_order
+        del e_keys
+    del t_ev
     # End of edges!
 
     # We have to ^-1 last index of each loop.
-    for ls in t_ls:
-        t_pvi[ls - 1] ^= -1
+    t_pvi[t_ls - 1] ^= -1
 
     # And finally we can write data!
     elem_data_single_int32_array(geom, b"PolygonVertexIndex", t_pvi)
@@ -967,34 +996,40 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
 
     # And now, layers!
 
+    # Mask of real edges that are in our edges array (i.e. not only loose edges, in theory!).
+    edges_used = edges_map != -1
+
     # Smoothing.
     if smooth_type in {'FACE', 'EDGE'}:
         t_ps = None
         _map = b""
         if smooth_type == 'FACE':
-            t_ps = array.array(data_types.ARRAY_INT32, (0,)) * len(me.polygons)
+            t_ps = np.empty(len(me.polygons), dtype=bool)
             me.polygons.foreach_get("use_smooth", t_ps)
+            t_ps = t_ps.astype(np.int32)
             _map = b"ByPolygon"
         else:  # EDGE
             # Write Edge Smoothing.
             # Note edge is sharp also if it's used by more than two faces, or one of its faces is flat.
-            t_ps = array.array(data_types.ARRAY_INT32, (0,)) * edges_nbr
-            sharp_edges = set()
-            temp_sharp_edges = {}
-            for p in me.polygons:
-                if not p.use_smooth:
-                    sharp_edges.update(p.edge_keys)
-                    continue
-                for k in p.edge_keys:
-                    if temp_sharp_edges.setdefault(k, 0) > 1:
-                        sharp_edges.add(k)
-                    else:
-                        temp_sharp_edges[k] += 1
-            del temp_sharp_edges
-            for e in me.edges:
-                if e.key not in edges_map:
-                    continue  # Only loose edges, in theory!
-                t_ps[edges_map[e.key]] = not (e.use_edge_sharp or (e.key in sharp_edges))
+            t_ps = np.zeros(edges_nbr, dtype=np.int32)
+            t_pst = np.empty(len(me.polygons), dtype=bool)
+            t_pls = np.empty(len(me.polygons), dtype=np.int32)
+            t_plt = np.empty(len(me.polygons), dtype=np.int32)
+            t_lei = np.empty(len(me.loops), dtype=np.int32)
+            me.polygons.foreach_get("use_smooth", t_pst)
+            me.polygons.foreach_get("loop_start", t_pls)
+            me.polygons.foreach_get("loop_total", t_plt)
+            me.loops.foreach_get("edge_index", t_lei)
+            # Edge indices of all polygons' loops, in polygons order.
+            p_lei = t_lei[np.repeat(t_pls - np.cumsum(t_plt) + t_plt, t_plt) + np.arange(np.sum(t_plt))]
+            p_lst = np.repeat(t_pst, t_plt)
+
+            t_es = np.empty(len(me.edges), dtype=bool)
+            me.edges.foreach_get("use_edge_sharp", t_es)
+            t_es[p_lei[~p_lst]] = True
+            t_es |= np.bincount(p_lei[p_lst], minlength=len(me.edges)) > 2
+            t_ps[edges_map[edges_used]] = ~t_es[edges_used]
+            del t_pst, t_pls, t_plt, t_lei, p_lei, p_lst, t_es
             _map = b"ByEdge"
         lay_smooth = elem_data_single_int32(geom, b"LayerElementSmoothing", 0)
         elem_data_single_int32(lay_smooth, b"Version", FBX_GEOMETRY_SMOOTHING_VERSION)
@@ -1006,13 +1041,14 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
 
     # Edge crease for subdivision
     if write_crease:
-        t_ec = array.array(data_types.ARRAY_FLOAT64, (0.0,)) * edges_nbr
-        for e in me.edges:
-            if e.key not in edges_map:
-                continue  # Only loose edges, in theory!
-            # Blender squares those values before sending them to OpenSubdiv, when other softwares don't,
-            # so we need to compensate that to get similar results through FBX...
-            t_ec[edges_map[e.key]] = e.crease * e.crease
+        t_ec = np.zeros(edges_nbr, dtype=np.float64)
+        t_ecr = np.empty(len(me.edges), dtype=np.float32)
+        me.edges.foreach_get("crease", t_ecr)
+        t_ecr = t_ecr[edges_used].astype(np.float64)
+        # Blender squares those values before sending them to OpenSubdiv, when other softwares don't,
+        # so we need to compensate that to get similar results through FBX...
+        t_ec[edges_map[edges_used]] = t_ecr * t_ecr
+        del t_ecr
 
         lay_crease = elem_data_single_int32(geom, b"LayerElementEdgeCrease", 0)
         elem_data_single_int32(lay_crease, b"Version", FBX_GEOMETRY_CREASE_VERSION)
@@ -1024,6 +1060,7 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
 
     # And we are done with edges!
     del edges_map
+    del edges_used
 
     # Loop normals.
     tspacenumber = 0
@@ -1033,11 +1070,11 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
         #     but this does not seem well supported by apps currently...
         me.calc_normals_split()
 
-        t_ln = array.array(data_types.ARRAY_FLOAT64, (0.0,)) * len(me.loops) * 3
+        t_ln = np.empty(len(me.loops) * 3, dtype=np.float32)
         me.loops.foreach_get("normal", t_ln)
-        t_ln = nors_transformed_gen(t_ln, geom_mat_no)
+        t_ln = nors_transformed(t_ln, geom_mat_no)
         if 0:
-            t_ln = tuple(t_ln)  # No choice... :/
+            t_ln = tuple(map(tuple, t_ln))  # No choice... :/
 
             lay_nor = elem_data_single_int32(geom, b"LayerElementNormal", 0)
             elem_data_single_int32(lay_nor, b"Version", FBX_GEOMETRY_NORMAL_VERSION)
@@ -1062,7 +1099,7 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
             elem_data_single_string(lay_nor, b"Name", b"")
             elem_data_single_string(lay_nor, b"MappingInformationType", b"ByPolygonVertex")
             elem_data_single_string(lay_nor, b"ReferenceInformationType", b"Direct")
-            elem_data_single_float64_array(lay_nor, b"Normals", chain(*t_ln))
+            elem_data_single_float64_array(lay_nor, b"Normals", t_ln)
             # Normal weights, no idea what it is.
             # t_ln = array.array(data_types.ARRAY_FLOAT64, (0.0,)) * len(me.loops)
             # elem_data_single_float64_array(lay_nor, b"NormalsW", t_ln)
@@ -1083,7 +1120,7 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
                         "cannot compute/export tangent space for it" % me.name)
                 else:
                     del t_lt
-                    t_ln = array.array(data_types.ARRAY_FLOAT64, (0.0,)) * len(me.loops) * 3
+                    t_ln = np.empty(len(me.loops) * 3, dtype=np.float32)
                     # t_lnw = array.array(data_types.ARRAY_FLOAT64, (0.0,)) * len(me.loops)
                     uv_names = [uvlayer.name for uvlayer in me.uv_layers]
                     for name in uv_names:
@@ -1098,8 +1135,7 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
                         elem_data_single_string_unicode(lay_nor, b"Name", name)
                         elem_data_single_string(lay_nor, b"MappingInformationType", b"ByPolygonVertex")
                         elem_data_single_string(lay_nor, b"ReferenceInformationType", b"Direct")
-                        elem_data_single_float64_array(lay_nor, b"Binormals",
-                                                       chain(*nors_transformed_gen(t_ln, geom_mat_no)))
+                        elem_data_single_float64_array(lay_nor, b"Binormals", nors_transformed(t_ln, geom_mat_no))
                         # Binormal weights, no idea what it is.
                         # elem_data_single_float64_array(lay_nor, b"BinormalsW", t_lnw)
 
@@ -1111,8 +1147,7 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
                         elem_data_single_string_unicode(lay_nor, b"Name", name)
                         elem_data_single_string(lay_nor, b"MappingInformationType", b"ByPolygonVertex")
                         elem_data_single_string(lay_nor, b"ReferenceInformationType", b"Direct")
-                        elem_data_single_float64_array(lay_nor, b"Tangents",
-                                                       chain(*nors_transformed_gen(t_ln, geom_mat_no)))
+                        elem_data_single_float64_array(lay_nor, b"Tangents", nors_transformed(t_ln, geom_mat_no))
                         # Tangent weights, no idea what it is.
                         # elem_data_single_float64_array(lay_nor, b"TangentsW", t_lnw)
 
@@ -1125,10 +1160,7 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
     # Write VertexColor Layers.
     vcolnumber = len(me.vertex_colors)
     if vcolnumber:
-        def _coltuples_gen(raw_cols):
-            return zip(*(iter(raw_cols),) * 4)
-
-        t_lc = array.array(data_types.ARRAY_FLOAT64, (0.0,)) * len(me.loops) * 4
+        t_lc = np.empty(len(me.loops) * 4, dtype=np.float32)
         for colindex, collayer in enumerate(me.vertex_colors):
             collayer.data.foreach_get("color", t_lc)
             lay_vcol = elem_data_single_int32(geom, b"LayerElementColor", colindex)
@@ -1137,14 +1169,12 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
             elem_data_single_string(lay_vcol, b"MappingInformationType", b"ByPolygonVertex")
             elem_data_single_string(lay_vcol, b"ReferenceInformationType", b"IndexToDirect")
 
-            col2idx = tuple(set(_coltuples_gen(t_lc)))
-            elem_data_single_float64_array(lay_vcol, b"Colors", chain(*col2idx))  # Flatten again...
-
-            col2idx = {col: idx for idx, col in enumerate(col2idx)}
-            elem_data_single_int32_array(lay_vcol, b"ColorIndex", (col2idx[c] for c in _coltuples_gen(t_lc)))
+            col2idx, col_idx = array_unique_rows(t_lc.reshape(-1, 4))
+            elem_data_single_float64_array(lay_vcol, b"Colors", col2idx)
+            elem_data_single_int32_array(lay_vcol, b"ColorIndex", col_idx)
             del col2idx
+            del col_idx
         del t_lc
-        del _coltuples_gen
 
     # Write UV layers.
     # Note: LayerElementTexture is deprecated since FBX 2011 - luckily!
@@ -1153,30 +1183,28 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
     if uvnumber:
         # Looks like this mapping is also expected to convey UV islands (arg..... :((((( ).
         # So we need to generate unique triplets (uv, vertex_idx) here, not only just based on UV values.
-        def _uvtuples_gen(raw_uvs, raw_lvidxs):
-            return zip(zip(*(iter(raw_uvs),) * 2), raw_lvidxs)
-
-        t_luv = array.array(data_types.ARRAY_FLOAT64, (0.0,)) * len(me.loops) * 2
-        t_lvidx = array.array(data_types.ARRAY_INT32, (0,)) * len(me.loops)
+        t_luv = np.empty(len(me.loops) * 2, dtype=np.float32)
+        t_lvidx = np.empty(len(me.loops), dtype=np.int32)
         me.loops.foreach_get("vertex_index", t_lvidx)
+        t_uv_ids = np.empty((len(me.loops), 3), dtype=np.float64)
+        t_uv_ids[:, 2] = t_lvidx
         for uvindex, uvlayer in enumerate(me.uv_layers):
             uvlayer.data.foreach_get("uv", t_luv)
+            t_uv_ids[:, :2] = t_luv.reshape(-1, 2)
             lay_uv = elem_data_single_int32(geom, b"LayerElementUV", uvindex)
             elem_data_single_int32(lay_uv, b"Version", FBX_GEOMETRY_UV_VERSION)
             elem_data_single_string_unicode(lay_uv, b"Name", uvlayer.name)
             elem_data_single_string(lay_uv, b"MappingInformationType", b"ByPolygonVertex")
             elem_data_single_string(lay_uv, b"ReferenceInformationType", b"IndexToDirect")
 
-            uv_ids = tuple(set(_uvtuples_gen(t_luv, t_lvidx)))
-            elem_data_single_float64_array(lay_uv, b"UV", chain(*(uv for uv, vidx in uv_ids)))  # Flatten again...
-
-            uv2idx = {uv_id: idx for idx, uv_id in enumerate(uv_ids)}
-            elem_data_single_int32_array(lay_uv, b"UVIndex", (uv2idx[uv_id] for uv_id in _uvtuples_gen(t_luv, t_lvidx)))
-            del uv2idx
+            uv_ids, uv_idx = array_unique_rows(t_uv_ids)
+            elem_data_single_float64_array(lay_uv, b"UV", uv_ids[:, :2])
+            elem_data_single_int32_array(lay_uv, b"UVIndex", uv_idx)
             del uv_ids
+            del uv_idx
         del t_luv
         del t_lvidx
-        del _uvtuples_gen
+        del t_uv_ids
 
     # Face's materials.
     me_fbxmaterials_idx = scene_data.mesh_material_indices.get(me)
@@ -1189,17 +1217,18 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
             elem_data_single_string(lay_ma, b"Name", b"")
             nbr_mats = len(me_fbxmaterials_idx)
             if nbr_mats > 1:
-                t_pm = array.array(data_types.ARRAY_INT32, (0,)) * len(me.polygons)
+                t_pm = np.empty(len(me.polygons), dtype=np.int32)
                 me.polygons.foreach_get("material_index", t_pm)
 
                 # We have to validate mat indices, and map them to FBX indices.
                 # Note a mat might not be in me_fbxmats_idx (e.g. node mats are ignored).
-                blmaterials_to_fbxmaterials_idxs = [me_fbxmaterials_idx[m]
-                                                    for m in me_blmaterials if m in me_fbxmaterials_idx]
+                blmaterials_to_fbxmaterials_idxs = np.array([me_fbxmaterials_idx[m]
+                                                             for m in me_blmaterials if m in me_fbxmaterials_idx],
+                                                            dtype=np.int32)
                 ma_idx_limit = len(blmaterials_to_fbxmaterials_idxs)
                 def_ma = blmaterials_to_fbxmaterials_idxs[0]
-                _gen = (blmaterials_to_fbxmaterials_idxs[m] if m < ma_idx_limit else def_ma for m in t_pm)
-                t_pm = array.array(data_types.ARRAY_INT32, _gen)
+                t_pm = np.where(t_pm < ma_idx_limit,
+                                blmaterials_to_fbxmaterials_idxs[np.minimum(t_pm, ma_idx_limit - 1)], def_ma)
 
                 elem_data_single_string(lay_ma, b"MappingInformationType", b"ByPolygon")
                 # XXX Logically, should be "Direct" reference type, since we do not have any index array, and have one
@@ -1926,13 +1955,13 @@ def fbx_generate_leaf_bones(settings, data_bones):
     return leaf_bones
 
 
-def fbx_animations_do(scene_data, ref_id, f_start, f_end, start_zero, objects=None, force_keep=False):
+def fbx_animations_bake_job(scene_data, ref_id, f_start, f_end, start_zero, objects=None, force_keep=False):
     """
-    Generate animation data (a single AnimStack) from objects, for a given frame range.
+    Prepare baking of animation data (a single AnimStack) from objects, for a given frame range.
+    Actual sampling and final data generation is done by fbx_animations_bake().
     """
     bake_step = scene_data.settings.bake_anim_step
     simplify_fac = scene_data.settings.bake_anim_simplify_factor
-    scene = scene_data.scene
     depsgraph = scene_data.depsgraph
     force_keying = scene_data.settings.bake_anim_use_all_bones
     force_sek = scene_data.settings.bake_anim_force_startend_keying
@@ -1950,10 +1979,10 @@ def fbx_animations_do(scene_data, ref_id, f_start, f_end, start_zero, objects=No
     else:
         objects = scene_data.objects
 
-    back_currframe = scene.frame_current
     animdata_ob = {}
     p_rots = {}
 
+    ob_obj = None
     for ob_obj in objects:
         if ob_obj.parented_to_armature:
             continue
@@ -1985,36 +2014,78 @@ def fbx_animations_do(scene_data, ref_id, f_start, f_end, start_zero, objects=No
         acnode = AnimationCurveNodeWrapper(cam_key, 'CAMERA_FOCAL', force_key, force_sek, (cam.lens,))
         animdata_cameras[cam_key] = (acnode, cam)
 
+    # Frames to sample, computed exactly as they always have been (accumulating bake_step).
+    frames = []
     currframe = f_start
     while currframe <= f_end:
-        real_currframe = currframe - f_start if start_zero else currframe
-        scene.frame_set(int(currframe), subframe=currframe - int(currframe))
+        frames.append(currframe)
+        currframe += bake_step
 
-        for dp_obj in ob_obj.dupli_list_gen(depsgraph):
+    return {
+        "ref_id": ref_id, "f_start": f_start, "f_end": f_end, "start_zero": start_zero, "force_keep": force_keep,
+        # Last object of the set, we need to update its duplis' matrices at each frame.
+        "dupli_ob_obj": ob_obj,
+        "frames": frames,
+        "animdata_ob": animdata_ob, "p_rots": p_rots,
+        "animdata_shapes": animdata_shapes, "animdata_cameras": animdata_cameras,
+        "time_sampling": 0.0,
+    }
+
+
+def fbx_animations_bake_job_sample(scene_data, job, currframe, frame_values):
+    """
+    Sample all data of given bake job at current frame.
+    frame_values caches values which are the same for all jobs baked together (shape keys, camera lens),
+    so that they are only evaluated once per frame.
+    """
+    real_currframe = currframe - job["f_start"] if job["start_zero"] else currframe
+
+    if job["dupli_ob_obj"] is not None:
+        for dp_obj in job["dupli_ob_obj"].dupli_list_gen(scene_data.depsgraph):
             pass  # Merely updating dupli matrix of ObjectWrapper...
-        for ob_obj, (anim_loc, anim_rot, anim_scale) in animdata_ob.items():
-            # We compute baked loc/rot/scale for all objects (rot being euler-compat with previous value!).
-            p_rot = p_rots.get(ob_obj, None)
-            loc, rot, scale, _m, _mr = ob_obj.fbx_object_tx(scene_data, rot_euler_compat=p_rot)
-            p_rots[ob_obj] = rot
-            anim_loc.add_keyframe(real_currframe, loc)
-            anim_rot.add_keyframe(real_currframe, tuple(convert_rad_to_deg_iter(rot)))
-            anim_scale.add_keyframe(real_currframe, scale)
-        for anim_shape, me, shape in animdata_shapes.values():
-            anim_shape.add_keyframe(real_currframe, (shape.value * 100.0,))
-        for anim_camera, camera in animdata_cameras.values():
-            anim_camera.add_keyframe(real_currframe, (camera.lens,))
-        currframe += bake_step
+    p_rots = job["p_rots"]
+    for ob_obj, (anim_loc, anim_rot, anim_scale) in job["animdata_ob"].items():
+        # We compute baked loc/rot/scale for all objects (rot being euler-compat with previous value!).
+        p_rot = p_rots.get(ob_obj, None)
+        loc, rot, scale, _m, _mr = ob_obj.fbx_object_tx(scene_data, rot_euler_compat=p_rot)
+        p_rots[ob_obj] = rot
+        anim_loc.add_keyframe(real_currframe, loc)
+        anim_rot.add_keyframe(real_currframe, tuple(convert_rad_to_deg_iter(rot)))
+        anim_scale.add_keyframe(real_currframe, scale)
+    for channel_key, (anim_shape, me, shape) in job["animdata_shapes"].items():
+        value = frame_values.get(channel_key, None)
+        if value is None:
+            value = frame_values[channel_key] = (shape.value * 100.0,)
+        anim_shape.add_keyframe(real_currframe, value)
+    for cam_key, (anim_camera, camera) in job["animdata_cameras"].items():
+        value = frame_values.get(cam_key, None)
+        if value is None:
+            value = frame_values[cam_key] = (camera.lens,)
+        anim_camera.add_keyframe(real_currframe, value)
+
+
+def fbx_animations_bake_job_finalize(scene_data, job):
+    """
+    Produce final data (usable by FBX export code) of a sampled bake job, or None if it has no animation.
+    """
+    scene = scene_data.scene
+    bake_step = scene_data.settings.bake_anim_step
+    simplify_fac = scene_data.settings.bake_anim_simplify_factor
+    ref_id = job["ref_id"]
+    force_keep = job["force_keep"]
 
-    scene.frame_set(back_currframe, subframe=0.0)
+    # All curves of a job share the same sampled frames, simplify them all at once.
+    AnimationCurveNodeWrapper.simplify_all(
+        chain(chain.from_iterable(job["animdata_ob"].values()),
+              (anim_shape for anim_shape, _me, _shape in job["animdata_shapes"].values()),
+              (anim_camera for anim_camera, _camera in job["animdata_cameras"].values())),
+        simplify_fac, bake_step, force_keep)
 
     animations = {}
 
-    # And now, produce final data (usable by FBX export code)
     # Objects-like loc/rot/scale...
-    for ob_obj, anims in animdata_ob.items():
+    for ob_obj, anims in job["animdata_ob"].items():
         for anim in anims:
-            anim.simplify(simplify_fac, bake_step, force_keep)
             if not anim:
                 continue
             for obj_key, group_key, group, fbx_group, fbx_gname in anim.get_final_data(scene, ref_id, force_keep):
@@ -2022,9 +2093,7 @@ def fbx_animations_do(scene_data, ref_id, f_start, f_end, start_zero, objects=No
                 anim_data[1][fbx_group] = (group_key, group, fbx_gname)
 
     # And meshes' shape keys.
-    for channel_key, (anim_shape, me, shape) in animdata_shapes.items():
-        final_keys = {}
-        anim_shape.simplify(simplify_fac, bake_step, force_keep)
+    for channel_key, (anim_shape, me, shape) in job["animdata_shapes"].items():
         if not anim_shape:
             continue
         for elem_key, group_key, group, fbx_group, fbx_gname in anim_shape.get_final_data(scene, ref_id, force_keep):
@@ -2032,9 +2101,7 @@ def fbx_animations_do(scene_data, ref_id, f_start, f_end, start_zero, objects=No
             anim_data[1][fbx_group] = (group_key, group, fbx_gname)
 
     # And cameras' lens keys.
-    for cam_key, (anim_camera, camera) in animdata_cameras.items():
-        final_keys = {}
-        anim_camera.simplify(simplify_fac, bake_step, force_keep)
+    for cam_key, (anim_camera, camera) in job["animdata_cameras"].items():
         if not anim_camera:
             continue
         for elem_key, group_key, group, fbx_group, fbx_gname in anim_camera.get_final_data(scene, ref_id, force_keep):
@@ -2045,13 +2112,63 @@ def fbx_animations_do(scene_data, ref_id, f_start, f_end, start_zero, objects=No
     alayer_key = get_blender_anim_layer_key(scene, ref_id)
     name = (get_blenderID_name(ref_id) if ref_id else scene.name).encode()
 
-    if start_zero:
+    f_start = job["f_start"]
+    f_end = job["f_end"]
+    if job["start_zero"]:
         f_end -= f_start
         f_start = 0.0
 
     return (astack_key, animations, alayer_key, name, f_start, f_end) if animations else None
 
 
+def fbx_animations_bake(scene_data, jobs):
+    """
+    Sample and generate final animation data of all given bake jobs, in a single pass over their frames:
+    each frame needed by at least one job is only evaluated once, and sampled for all jobs needing it.
+    Returns a list of final animation data (or None), matching given jobs.
+    """
+    scene = scene_data.scene
+    back_currframe = scene.frame_current
+
+    frames_jobs = {}
+    for job in jobs:
+        for currframe in job["frames"]:
+            frames_jobs.setdefault(currframe, []).append(job)
+
+    for currframe in sorted(frames_jobs.keys()):
+        currframe_jobs = frames_jobs[currframe]
+        t_frame = time.process_time()
+        scene.frame_set(int(currframe), subframe=currframe - int(currframe))
+        # Scene evaluation cost is shared between all jobs sampling that frame.
+        t_frame = (time.process_time() - t_frame) / len(currframe_jobs)
+
+        frame_values = {}
+        for job in currframe_jobs:
+            t_job = time.process_time()
+            fbx_animations_bake_job_sample(scene_data, job, currframe, frame_values)
+            job["time_sampling"] += t_frame + time.process_time() - t_job
+
+    scene.frame_set(back_currframe, subframe=0.0)
+
+    ret = []
+    for job in jobs:
+        t_job = time.process_time()
+        ret.append(fbx_animations_bake_job_finalize(scene_data, job))
+        ref_id = job["ref_id"]
+        print("\tFBX export: baked animation stack %r: %d frames, sampling %.3f sec, simplifying %.3f sec"
+              % (get_blenderID_name(ref_id) if ref_id else scene.name, len(job["frames"]),
+                 job["time_sampling"], time.process_time() - t_job))
+    return ret
+
+
+def fbx_animations_do(scene_data, ref_id, f_start, f_end, start_zero, objects=None, force_keep=False):
+    """
+    Generate animation data (a single AnimStack) from objects, for a given frame range.
+    """
+    job = fbx_animations_bake_job(scene_data, ref_id, f_start, f_end, start_zero, objects, force_keep)
+    return fbx_animations_bake(scene_data, (job,))[0]
+
+
 def fbx_animations(scene_data):
     """
     Generate global animation data from objects.
@@ -2144,6 +2261,8 @@ def fbx_animations(scene_data):
                 if not ob_to.is_property_readonly(p):
                     setattr(ob_to, p, getattr(ob_from, p))
 
+        # Gather all valid actions of all animated objects first.
+        actions_objects = []
         for ob_obj in scene_data.objects:
             # Actions only for objects, not bones!
             if not ob_obj.is_object:
@@ -2157,40 +2276,67 @@ def fbx_animations(scene_data):
             if ob.animation_data.is_property_readonly('action'):
                 continue  # Cannot re-assign 'active action' to this object (usually related to NLA usage, see T48089).
 
+            org_act = ob.animation_data.action
+            path_resolve = ob.path_resolve
+
+            # For now, *all* paths in the action must be valid for the object, to validate the action.
+            # Unless that action was already assigned to the object!
+            acts = [act for act in bpy.data.actions if act == org_act or validate_actions(act, path_resolve)]
+            if not acts:
+                continue
+
             # We can't play with animdata and actions and get back to org state easily.
             # So we have to add a temp copy of the object to the scene, animate it, and remove it... :/
             ob_copy = ob.copy()
             # Great, have to handle bones as well if needed...
             pbones_matrices = [pbo.matrix_basis.copy() for pbo in ob.pose.bones] if ob.type == 'ARMATURE' else ...
 
-            org_act = ob.animation_data.action
-            path_resolve = ob.path_resolve
+            actions_objects.append((ob_obj, ob, ob_copy, pbones_matrices, org_act, acts))
 
-            for act in bpy.data.actions:
-                # For now, *all* paths in the action must be valid for the object, to validate the action.
-                # Unless that action was already assigned to the object!
-                if act != org_act and not validate_actions(act, path_resolve):
-                    continue
+        # Batches of (object, action) pairs baked together, in a single pass over the frames.
+        # By default each action is baked on its own, but with batching enabled, the n-th actions of all objects
+        # are baked together (only valid if objects' animations do not depend on each other).
+        if scene_data.settings.bake_anim_batch_actions:
+            bake_batches = [[(ob_idx, act_idx) for ob_idx, item in enumerate(actions_objects) if act_idx < len(item[5])]
+                            for act_idx in range(max((len(item[5]) for item in actions_objects), default=0))]
+        else:
+            bake_batches = [[(ob_idx, act_idx)]
+                            for ob_idx, item in enumerate(actions_objects) for act_idx in range(len(item[5]))]
+
+        actions_anims = {}
+        for bake_batch in bake_batches:
+            jobs = []
+            for ob_idx, act_idx in bake_batch:
+                ob_obj, ob, _ob_copy, _pbones_matrices, _org_act, acts = actions_objects[ob_idx]
+                act = acts[act_idx]
                 ob.animation_data.action = act
                 frame_start, frame_end = act.frame_range  # sic!
-                add_anim(animations, animated,
-                         fbx_animations_do(scene_data, (ob, act), frame_start, frame_end, True,
-                                           objects={ob_obj}, force_keep=True))
+                jobs.append(fbx_animations_bake_job(scene_data, (ob, act), frame_start, frame_end, True,
+                                                    objects={ob_obj}, force_keep=True))
+            for ob_act_idx, anim in zip(bake_batch, fbx_animations_bake(scene_data, jobs)):
+                actions_anims[ob_act_idx] = anim
+            for ob_idx, act_idx in bake_batch:
+                _ob_obj, ob, ob_copy, pbones_matrices, org_act, _acts = actions_objects[ob_idx]
                 # Ugly! :/
                 if pbones_matrices is not ...:
                     for pbo, mat in zip(ob.pose.bones, pbones_matrices):
                         pbo.matrix_basis = mat.copy()
                 ob.animation_data.action = org_act
                 restore_object(ob, ob_copy)
-                scene.frame_set(scene.frame_current, subframe=0.0)
+            scene.frame_set(scene.frame_current, subframe=0.0)
+
+        # Keep stacks ordered by object, then action, whichever way they were baked.
+        for ob_act_idx in sorted(actions_anims.keys()):
+            add_anim(animations, animated, actions_anims[ob_act_idx])
 
+        for _ob_obj, ob, ob_copy, pbones_matrices, org_act, _acts in actions_objects:
             if pbones_matrices is not ...:
                 for pbo, mat in zip(ob.pose.bones, pbones_matrices):
                     pbo.matrix_basis = mat.copy()
             ob.animation_data.action = org_act
 
             bpy.data.objects.remove(ob_copy)
-            scene.frame_set(scene.frame_current, subframe=0.0)
+        scene.frame_set(scene.frame_current, subframe=0.0)
 
     # Global (containing everything) animstack, only if not exporting NLA strips and/or all actions.
     if not scene_data.settings.bake_anim_use_nla_strips and not scene_data.settings.bake_anim_use_all_actions:
@@ -2863,28 +3009,43 @@ def fbx_definitions_elements(root, scene_data):
     fbx_templates_generate(definitions, scene_data.templates)
 
 
-def fbx_objects_elements(root, scene_data):
+def fbx_objects_elements(root, scene_data, writer=None):
     """
     Data (objects, geometry, material, textures, armatures, etc.).
+    If a stream writer is given, generated elements are written (and freed) as soon as possible,
+    instead of being added to the root tree.
     """
     perfmon = PerfMon()
     perfmon.level_up()
-    objects = elem_empty(root, b"Objects")
+    if writer is None:
+        objects = elem_empty(root, b"Objects")
+
+        def flush():
+            pass
+    else:
+        objects = elem_empty(None, b"Objects")
+        writer.open_elem(objects)
+
+        def flush():
+            writer.write_children(objects)
 
     perfmon.step("FBX export fetch empties (%d)..." % len(scene_data.data_empties))
 
     for empty in scene_data.data_empties:
         fbx_data_empty_elements(objects, empty, scene_data)
+        flush()
 
     perfmon.step("FBX export fetch lamps (%d)..." % len(scene_data.data_lights))
 
     for lamp in scene_data.data_lights:
         fbx_data_light_elements(objects, lamp, scene_data)
+        flush()
 
     perfmon.step("FBX export fetch cameras (%d)..." % len(scene_data.data_cameras))
 
     for cam in scene_data.data_cameras:
         fbx_data_camera_elements(objects, cam, scene_data)
+        flush()
 
     perfmon.step("FBX export fetch meshes (%d)..."
                  % len({me_key for me_key, _me, _free in scene_data.data_meshes.values()}))
@@ -2892,6 +3053,7 @@ def fbx_objects_elements(root, scene_data):
     done_meshes = set()
     for me_obj in scene_data.data_meshes:
         fbx_data_mesh_elements(objects, me_obj, scene_data, done_meshes)
+        flush()
     del done_meshes
 
     perfmon.step("FBX export fetch objects (%d)..." % len(scene_data.objects))
@@ -2904,6 +3066,7 @@ def fbx_objects_elements(root, scene_data):
             if dp_obj not in scene_data.objects:
                 continue
             fbx_data_object_elements(objects, dp_obj, scene_data)
+        flush()
 
     perfmon.step("FBX export fetch remaining...")
 
@@ -2911,23 +3074,31 @@ def fbx_objects_elements(root, scene_data):
         if not (ob_obj.is_object and ob_obj.type == 'ARMATURE'):
             continue
         fbx_data_armature_elements(objects, ob_obj, scene_data)
+        flush()
 
     if scene_data.data_leaf_bones:
         fbx_data_leaf_bone_elements(objects, scene_data)
+        flush()
 
     for ma in scene_data.data_materials:
         fbx_data_material_elements(objects, ma, scene_data)
+        flush()
 
     for blender_tex_key in scene_data.data_textures:
         fbx_data_texture_file_elements(objects, blender_tex_key, scene_data)
+        flush()
 
     for vid in scene_data.data_videos:
         fbx_data_video_elements(objects, vid, scene_data)
+        flush()
 
     perfmon.step("FBX export fetch animations...")
     start_time = time.process_time()
 
     fbx_data_animation_elements(objects, scene_data)
+    flush()
+    if writer is not None:
+        writer.close_elem()
 
     perfmon.level_down()
 
@@ -2989,6 +3160,7 @@ def save_single(operator, scene, depsgraph, filepath="",
                 bake_anim_step=1.0,
                 bake_anim_simplify_factor=1.0,
                 bake_anim_force_startend_keying=True,
+                bake_anim_batch_actions=False,
                 add_leaf_bones=False,
                 primary_bone_axis='Y',
                 secondary_bone_axis='X',
@@ -3066,7 +3238,7 @@ def save_single(operator, scene, depsgraph, filepath="",
         armature_nodetype, use_armature_deform_only,
         add_leaf_bones, bone_correction_matrix, bone_correction_matrix_inv,
         bake_anim, bake_anim_use_all_bones, bake_anim_use_nla_strips, bake_anim_use_all_actions,
-        bake_anim_step, bake_anim_simplify_factor, bake_anim_force_startend_keying,
+        bake_anim_step, bake_anim_simplify_factor, bake_anim_force_startend_keying, bake_anim_batch_actions,
         False, media_settings, use_custom_props,
     )
 
@@ -3080,31 +3252,32 @@ def save_single(operator, scene, depsgraph, filepath="",
 
     root = elem_empty(None, b"")  # Root element has no id, as it is not saved per se!
 
-    # Mostly FBXHeaderExtension and GlobalSettings.
-    fbx_header_elements(root, scene_data)
+    # Elements are written as soon as they are generated, so that we never keep the whole tree in memory.
+    with encode_bin.FBXStreamWriter(filepath, FBX_VERSION) as writer:
+        # Mostly FBXHeaderExtension and GlobalSettings.
+        fbx_header_elements(root, scene_data)
 
-    # Documents and References are pretty much void currently.
-    fbx_documents_elements(root, scene_data)
-    fbx_references_elements(root, scene_data)
+        # Documents and References are pretty much void currently.
+        fbx_documents_elements(root, scene_data)
+        fbx_references_elements(root, scene_data)
 
-    # Templates definitions.
-    fbx_definitions_elements(root, scene_data)
+        # Templates definitions.
+        fbx_definitions_elements(root, scene_data)
+        writer.write_children(root)
 
-    # Actual data.
-    fbx_objects_elements(root, scene_data)
+        # Actual data.
+        fbx_objects_elements(root, scene_data, writer)
 
-    # How data are inter-connected.
-    fbx_connections_elements(root, scene_data)
+        # How data are inter-connected.
+        fbx_connections_elements(root, scene_data)
 
-    # Animation.
-    fbx_takes_elements(root, scene_data)
+        # Animation.
+        fbx_takes_elements(root, scene_data)
+        writer.write_children(root)
 
     # Cleanup!
     fbx_scene_data_cleanup(scene_data)
 
-    # And we are down, we can write the whole thing!
-    encode_bin.write(filepath, root, FBX_VERSION)
-
     # Clear cached ObjectWrappers!
     ObjectWrapper.cache_clear()
 
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""
+Usage
+=====
+
+   fbx_parse_benchmark [--threads=N] [FILES]...
+
+This script parses each binary FBX file given, and compares timings of:
+
+* The serial parser (everything read and decompressed while parsing).
+* The lazy, memory-mapped parser, with all arrays decompressed one by one afterwards.
+* The lazy, memory-mapped parser, with all arrays decompressed by a pool of N threads
+  (defaults to the number of available CPUs).
+
+It also checks that all three produce byte-identical data.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import parse_fbx
+del sys.path[0]
+
+
+def elem_flatten(elem, r_data):
+    r_data.append(elem[0])
+    r_data.append(bytes(elem[2]))
+    for data in elem[1]:
+        data = parse_fbx.array_resolve(data)
+        r_data.append(data.tobytes() if hasattr(data, "tobytes") else data)
+    for child in elem[3]:
+        elem_flatten(child, r_data)
+    return r_data
+
+
+def benchmark(fn, num_workers):
+    print("%s (%.2f MiB):" % (fn, os.path.getsize(fn) / (1024 * 1024)))
+
+    t = time.perf_counter()
+    root_serial, version = parse_fbx.parse(fn)
+    print("    serial:               %.3f sec" % (time.perf_counter() - t))
+
+    t = time.perf_counter()
+    root_lazy, _version = parse_fbx.parse(fn, use_lazy_arrays=True)
+    t_parse = time.perf_counter() - t
+    parse_fbx.decode_arrays((root_lazy,), 1)
+    print("    lazy, 1 thread:       %.3f sec (%.3f sec parsing)" % (time.perf_counter() - t, t_parse))
+
+    t = time.perf_counter()
+    root_parallel, _version = parse_fbx.parse(fn, use_lazy_arrays=True)
+    t_parse = time.perf_counter() - t
+    parse_fbx.decode_arrays((root_parallel,), num_workers)
+    print("    lazy, %d threads:%s %.3f sec (%.3f sec parsing)" %
+          (num_workers, " " * (6 - len(str(num_workers))), time.perf_counter() - t, t_parse))
+
+    data_serial = elem_flatten(root_serial, [])
+    if data_serial != elem_flatten(root_lazy, []) or data_serial != elem_flatten(root_parallel, []):
+        raise Exception("Parsed data differs between serial and lazy/parallel parsing!")
+    print("    (version %d, identical data)" % version)
+
+
+# ----------------------------------------------------------------------------
+# Command Line
+
+def main():
+    if "--help" in sys.argv:
+        print(__doc__)
+        return
+
+    num_workers = os.cpu_count() or 1
+    for arg in sys.argv[1:]:
+        if arg.startswith("--threads="):
+            num_workers = int(arg[len("--threads="):])
+            continue
+        try:
+            benchmark(arg, num_workers)
+        except:
+            print("Failed to benchmark %r, error:" % arg)
+
+            import traceback
+            traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()
@@ -21,6 +21,7 @@
 # Script copyright (C) Campbell Barton, Bastien Montagne
 
 
+import array
 import math
 import time
 
@@ -28,12 +29,15 @@ from collections import namedtuple
 from collections.abc import Iterable
 from itertools import zip_longest, chain
 
+import numpy as np
+
 import bpy
 import bpy_extras
 from bpy.types import Object, Bone, PoseBone, DepsgraphObjectInstance
 from mathutils import Vector, Matrix
 
 from . import encode_bin, data_types
+from .anim_simplify import simplify_keys
 
 
 # "Constants"
@@ -282,6 +286,49 @@ def nors_transformed_gen(raw_nors, m=None):
     return gen if m is None else (m @ Vector(v) for v in gen)
 
 
+def _mat4_vec3_array_multiply(m, vecs):
+    # Mimics mathutils' `Matrix @ Vector` computations (float products, double sum, float result),
+    # so that we get exactly the same values as the non-vectorized code.
+    m = np.array(m, dtype=np.float32)
+    vecs = np.asarray(vecs, dtype=np.float32).reshape(-1, 3)
+    res = np.empty(vecs.shape, dtype=np.float64)
+    for r in range(3):
+        dot = (m[r, 0] * vecs[:, 0]).astype(np.float64)
+        dot += (m[r, 1] * vecs[:, 1])
+        dot += (m[r, 2] * vecs[:, 2])
+        dot += np.float64(m[r, 3])
+        res[:, r] = dot.astype(np.float32)
+    return res
+
+
+def vcos_transformed(raw_cos, m=None):
+    """Same as vcos_transformed_gen(), but working on and returning (N, 3) float64 numpy arrays."""
+    if m is None:
+        return np.asarray(raw_cos, dtype=np.float64).reshape(-1, 3)
+    return _mat4_vec3_array_multiply(m, raw_cos)
+
+
+def nors_transformed(raw_nors, m=None):
+    """Same as nors_transformed_gen(), but working on and returning (N, 3) float64 numpy arrays."""
+    if m is None:
+        return np.asarray(raw_nors, dtype=np.float64).reshape(-1, 3)
+    return _mat4_vec3_array_multiply(m, raw_nors)
+
+
+def array_unique_rows(arr):
+    """
+    Return the unique rows of given 2D numpy array, ordered by their first occurrence,
+    and for each row of arr, the index of its matching unique row.
+    """
+    if not len(arr):
+        return arr, np.empty(0, dtype=np.int32)
+    _uniq, idx, inv = np.unique(arr, axis=0, return_index=True, return_inverse=True)
+    order = np.argsort(idx)
+    remap = np.empty(len(order), dtype=np.int32)
+    remap[order] = np.arange(len(order), dtype=np.int32)
+    return arr[idx[order]], remap[inv.reshape(-1)]
+
+
 # ##### UIDs code. #####
 
 # ID class (mere int).
@@ -725,7 +772,7 @@ class AnimationCurveNodeWrapper:
     and easy API to handle those.
     """
     __slots__ = (
-        'elem_keys', '_keys', 'default_values', 'fbx_group', 'fbx_gname', 'fbx_props',
+        'elem_keys', '_frames', '_values', '_write', 'default_values', 'fbx_group', 'fbx_gname', 'fbx_props',
         'force_keying', 'force_startend_keying')
 
     kinds = {
@@ -744,7 +791,11 @@ class AnimationCurveNodeWrapper:
         self.fbx_props = [self.kinds[kind][2]]
         self.force_keying = force_keying
         self.force_startend_keying = force_startend_keying
-        self._keys = []  # (frame, values, write_flags)
+        # Sampled frames, and their values as a flat, contiguous (frames x channels) buffer.
+        self._frames = []
+        self._values = array.array('d')
+        # (frames x channels) write flags, None until simplified (i.e. write everything by default).
+        self._write = None
         if default_values is not ...:
             assert(len(default_values) == len(self.fbx_props[0]))
             self.default_values = default_values
@@ -753,7 +804,7 @@ class AnimationCurveNodeWrapper:
 
     def __bool__(self):
         # We are 'True' if we do have some validated keyframes...
-        return bool(self._keys) and (True in ((True in k[2]) for k in self._keys))
+        return bool(self._frames) and (self._write is None or bool(self._write.any()))
 
     def add_group(self, elem_key, fbx_group, fbx_gname, fbx_props):
         """
@@ -771,78 +822,73 @@ class AnimationCurveNodeWrapper:
         Add a new keyframe to all curves of the group.
         """
         assert(len(values) == len(self.fbx_props[0]))
-        self._keys.append((frame, values, [True] * len(values)))  # write everything by default.
+        self._frames.append(frame)
+        self._values.extend(values)
+        self._write = None  # write everything by default.
+
+    def get_values(self):
+        """
+        Return sampled values as a (frames x channels) array.
+        """
+        return np.frombuffer(self._values, dtype=np.float64).reshape(len(self._frames), len(self.fbx_props[0]))
 
     def simplify(self, fac, step, force_keep=False):
         """
         Simplifies sampled curves by only enabling samples when:
             * their values relatively differ from the previous sample ones.
         """
-        if not self._keys:
-            return
+        self.simplify_all((self,), fac, step, force_keep)
 
+    @classmethod
+    def simplify_all(cls, anims, fac, step, force_keep=False):
+        """
+        Same as simplify(), for a whole set of curve nodes at once. Curves sampled over the same number of frames
+        are stacked and simplified together, which is much cheaper than handling each node on its own.
+        """
         if fac == 0.0:
             return
 
-        # So that, with default factor and step values (1), we get:
-        min_reldiff_fac = fac * 1.0e-3  # min relative value evolution: 0.1% of current 'order of magnitude'.
-        min_absdiff_fac = 0.1  # A tenth of reldiff...
-        keys = self._keys
-
-        p_currframe, p_key, p_key_write = keys[0]
-        p_keyed = list(p_key)
-        are_keyed = [False] * len(p_key)
-        for currframe, key, key_write in keys:
-            for idx, (val, p_val) in enumerate(zip(key, p_key)):
-                key_write[idx] = False
-                p_keyedval = p_keyed[idx]
-                if val == p_val:
-                    # Never write keyframe when value is exactly the same as prev one!
-                    continue
-                # This is contracted form of relative + absolute-near-zero difference:
-                #     absdiff = abs(a - b)
-                #     if absdiff < min_reldiff_fac * min_absdiff_fac:
-                #         return False
-                #     return (absdiff / ((abs(a) + abs(b)) / 2)) > min_reldiff_fac
-                # Note that we ignore the '/ 2' part here, since it's not much significant for us.
-                if abs(val - p_val) > (min_reldiff_fac * max(abs(val) + abs(p_val), min_absdiff_fac)):
-                    # If enough difference from previous sampled value, key this value *and* the previous one!
-                    key_write[idx] = True
-                    p_key_write[idx] = True
-                    p_keyed[idx] = val
-                    are_keyed[idx] = True
-                elif abs(val - p_keyedval) > (min_reldiff_fac * max((abs(val) + abs(p_keyedval)), min_absdiff_fac)):
-                    # Else, if enough difference from previous keyed value, key this value only!
-                    key_write[idx] = True
-                    p_keyed[idx] = val
-                    are_keyed[idx] = True
-            p_currframe, p_key, p_key_write = currframe, key, key_write
-
-        # If we write nothing (action doing nothing) and are in 'force_keep' mode, we key everything! :P
-        # See T41766.
-        # Also, it seems some importers (e.g. UE4) do not handle correctly armatures where some bones
-        # are not animated, but are children of animated ones, so added an option to systematically force writing
-        # one key in this case.
-        # See T41719, T41605, T41254...
-        if self.force_keying or (force_keep and not self):
-            are_keyed[:] = [True] * len(are_keyed)
-
-        # If we did key something, ensure first and last sampled values are keyed as well.
-        if self.force_startend_keying:
-            for idx, is_keyed in enumerate(are_keyed):
-                if is_keyed:
-                    keys[0][2][idx] = keys[-1][2][idx] = True
+        anims_by_len = {}
+        for anim in anims:
+            if anim._frames:
+                anims_by_len.setdefault(len(anim._frames), []).append(anim)
+
+        for group in anims_by_len.values():
+            write, are_keyed = simplify_keys(np.concatenate([anim.get_values() for anim in group], axis=1), fac)
+
+            offset = 0
+            for anim in group:
+                nbr_channels = len(anim.fbx_props[0])
+                anim._write = write[:, offset:offset + nbr_channels]
+                anim_are_keyed = are_keyed[offset:offset + nbr_channels]
+                offset += nbr_channels
+
+                # If we write nothing (action doing nothing) and are in 'force_keep' mode, we key everything! :P
+                # See T41766.
+                # Also, it seems some importers (e.g. UE4) do not handle correctly armatures where some bones
+                # are not animated, but are children of animated ones, so added an option to systematically force
+                # writing one key in this case.
+                # See T41719, T41605, T41254...
+                if anim.force_keying or (force_keep and not anim):
+                    anim_are_keyed[:] = True
+
+                # If we did key something, ensure first and last sampled values are keyed as well.
+                if anim.force_startend_keying:
+                    anim._write[0, anim_are_keyed] = True
+                    anim._write[-1, anim_are_keyed] = True
 
     def get_final_data(self, scene, ref_id, force_keep=False):
         """
         Yield final anim data for this 'curvenode' (for all curvenodes defined).
         force_keep is to force to keep a curve even if it only has one valid keyframe.
         """
-        curves = [[] for k in self._keys[0][1]]
-        for currframe, key, key_write in self._keys:
-            for curve, val, wrt in zip(curves, key, key_write):
-                if wrt:
-                    curve.append((currframe, val))
+        frames = self._frames
+        values = self.get_values()
+        if self._write is None:
+            curves = [list(zip(frames, vals)) for vals in values.T.tolist()]
+        else:
+            curves = [[(frames[i], val) for i, val in zip(np.flatnonzero(wrt).tolist(), vals[wrt].tolist())]
+                      for vals, wrt in zip(values.T, self._write.T)]
 
         force_keep = force_keep or self.force_keying
         for elem_key, fbx_group, fbx_gname, fbx_props in \
@@ -1228,7 +1274,7 @@ FBXExportSettings = namedtuple("FBXExportSettings", (
     "armature_nodetype", "use_armature_deform_only", "add_leaf_bones",
     "bone_correction_matrix", "bone_correction_matrix_inv",
     "bake_anim", "bake_anim_use_all_bones", "bake_anim_use_nla_strips", "bake_anim_use_all_actions",
-    "bake_anim_step", "bake_anim_simplify_factor", "bake_anim_force_startend_keying",
+    "bake_anim_step", "bake_anim_simplify_factor", "bake_anim_force_startend_keying", "bake_anim_batch_actions",
     "use_metadata", "media_settings", "use_custom_props",
 ))
 
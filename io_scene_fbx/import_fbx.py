@@ -42,6 +42,7 @@ from . import parse_fbx, fbx_utils
 from .parse_fbx import (
     data_types,
     FBXElem,
+    array_resolve,
 )
 from .fbx_utils import (
     PerfMon,
@@ -166,7 +167,8 @@ def elem_uuid(elem):
 
 
 def elem_prop_first(elem, default=None):
-    return elem.props[0] if (elem is not None) and elem.props else default
+    # Array properties may be lazy handles, decode them on first actual access.
+    return array_resolve(elem.props[0]) if (elem is not None) and elem.props else default
 
 
 # ----
@@ -2363,7 +2365,11 @@ def load(operator, context, filepath="",
          automatic_bone_orientation=False,
          primary_bone_axis='Y',
          secondary_bone_axis='X',
-         use_prepost_rot=True):
+         use_prepost_rot=True,
+         decompress_threads=1,
+         use_parse_cache=False,
+         parse_cache_dir="",
+         parse_cache_size=1024):
 
     global fbx_elem_nil
     fbx_elem_nil = FBXElem('', (), (), ())
@@ -2403,7 +2409,14 @@ def load(operator, context, filepath="",
     # End ascii detection.
 
     try:
-        elem_root, version = parse_fbx.parse(filepath)
+        if use_parse_cache:
+            from . import parse_fbx_cache
+            elem_root, version, is_cache_hit = parse_fbx_cache.parse(
+                filepath, parse_cache_dir or None, parse_cache_size * 1024 * 1024,
+                decompress_threads or os.cpu_count() or 1)
+            perfmon.step("FBX import: Parsed file %s..." % ("read from cache" if is_cache_hit else "cached"))
+        else:
+            elem_root, version = parse_fbx.parse(filepath, use_lazy_arrays=True)
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -2520,6 +2533,10 @@ def load(operator, context, filepath="",
         operator.report({'ERROR'}, "No 'Connections' found in file %r" % filepath)
         return {'CANCELLED'}
 
+    if decompress_threads != 1:
+        perfmon.step("FBX import: Decompressing arrays...")
+        parse_fbx.decode_arrays((fbx_nodes,), decompress_threads or os.cpu_count() or 1)
+
     # ----
     # First load property templates
     # Load 'PropertyTemplate' values.
@@ -2765,7 +2782,7 @@ def load(operator, context, filepath="",
                 node_elem = elem_find_first(fbx_pose_node, b'Node')
                 node = elem_uuid(node_elem)
                 matrix_elem = elem_find_first(fbx_pose_node, b'Matrix')
-                matrix = array_to_matrix4(matrix_elem.props[0]) if matrix_elem else None
+                matrix = array_to_matrix4(elem_prop_first(matrix_elem)) if matrix_elem else None
                 bone = fbx_helper_nodes.get(node)
                 if bone and matrix:
                     # Store the matrix in the helper node.
@@ -2785,13 +2802,13 @@ def load(operator, context, filepath="",
 
                 # Get the bind pose from the cluster:
                 tx_mesh_elem = elem_find_first(fbx_cluster, b'Transform', default=None)
-                tx_mesh = array_to_matrix4(tx_mesh_elem.props[0]) if tx_mesh_elem else Matrix()
+                tx_mesh = array_to_matrix4(elem_prop_first(tx_mesh_elem)) if tx_mesh_elem else Matrix()
 
                 tx_bone_elem = elem_find_first(fbx_cluster, b'TransformLink', default=None)
-                tx_bone = array_to_matrix4(tx_bone_elem.props[0]) if tx_bone_elem else None
+                tx_bone = array_to_matrix4(elem_prop_first(tx_bone_elem)) if tx_bone_elem else None
 
                 tx_arm_elem = elem_find_first(fbx_cluster, b'TransformAssociateModel', default=None)
-                tx_arm = array_to_matrix4(tx_arm_elem.props[0]) if tx_arm_elem else None
+                tx_arm = array_to_matrix4(elem_prop_first(tx_arm_elem)) if tx_arm_elem else None
 
                 mesh_matrix = tx_mesh
                 armature_matrix = tx_arm
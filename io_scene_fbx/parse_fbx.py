@@ -26,19 +26,27 @@ __all__ = (
     "data_types",
     "parse_version",
     "FBXElem",
+    "FBXElemArray",
+    "array_resolve",
+    "decode_arrays",
     )
 
-from struct import unpack
+from struct import unpack, Struct
 import array
+import mmap
 import zlib
 
-from . import data_types
+try:
+    from . import data_types
+except:
+    import data_types
 
 # at the end of each nested block, there is a NUL record to indicate
 # that the sub-scope exists (i.e. to distinguish between P: and P : {})
 _BLOCK_SENTINEL_LENGTH = ...
 _BLOCK_SENTINEL_DATA = ...
 read_fbx_elem_uint = ...
+_ELEM_HEADER = ...
 _IS_BIG_ENDIAN = (__import__("sys").byteorder != 'little')
 _HEAD_MAGIC = b'Kaydara FBX Binary\x20\x20\x00\x1a\x00'
 from collections import namedtuple
@@ -102,22 +110,159 @@ read_data_dict = {
     }
 
 
+class FBXElemArray:
+    """
+    Lazy handle on an array property of a memory-mapped FBX file.
+
+    Only the array header is read at parse time, the (possibly compressed) payload is
+    decoded into an array.array the first time its content is actually accessed.
+    """
+    __slots__ = ("data", "offset", "length", "encoding", "comp_len",
+                 "array_type", "array_stride", "array_byteswap", "_array")
+
+    def __init__(self, data, offset, length, encoding, comp_len, array_type, array_stride, array_byteswap):
+        self.data = data
+        self.offset = offset
+        self.length = length
+        self.encoding = encoding
+        self.comp_len = comp_len
+        self.array_type = array_type
+        self.array_stride = array_stride
+        self.array_byteswap = array_byteswap
+        self._array = None
+
+    def decode(self):
+        if self._array is not None:
+            return self._array
+
+        # Work on a view of the mapped file, to avoid copying the (compressed) payload.
+        with memoryview(self.data) as mv, mv[self.offset:self.offset + self.comp_len] as data:
+            if self.encoding == 1:
+                data = zlib.decompress(data)
+
+            assert(self.length * self.array_stride == len(data))
+
+            data_array = array.array(self.array_type)
+            data_array.frombytes(data)
+        if self.array_byteswap and _IS_BIG_ENDIAN:
+            data_array.byteswap()
+
+        self._array = data_array
+        return data_array
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, key):
+        return self.decode()[key]
+
+    def __iter__(self):
+        return iter(self.decode())
+
+    def __repr__(self):
+        return "<FBXElemArray %r, length %d%s>" % (self.array_type, self.length,
+                                                    "" if self._array is None else ", decoded")
+
+
+def array_resolve(data):
+    """Return the decoded array if data is a lazy array handle, data itself otherwise."""
+    return data.decode() if data.__class__ is FBXElemArray else data
+
+
+def elem_arrays_iter(elem):
+    """Yield all lazy array handles found in elem and its children (recursively)."""
+    for data in elem[1]:
+        if data.__class__ is FBXElemArray:
+            yield data
+    for child in elem[3]:
+        yield from elem_arrays_iter(child)
+
+
+def decode_arrays(elems, num_workers):
+    """
+    Decompress all not-yet-decoded zlib-compressed array payloads of given elements (and their children),
+    using a pool of num_workers threads (zlib releases the GIL while inflating).
+    Result is exactly the same as decoding them one by one on access.
+    """
+    elem_arrays = [elem_array for elem in elems for elem_array in elem_arrays_iter(elem)
+                   if elem_array.encoding == 1 and elem_array._array is None]
+    if num_workers <= 1 or len(elem_arrays) <= 1:
+        for elem_array in elem_arrays:
+            elem_array.decode()
+        return
+
+    # Biggest payloads first, gives much better balancing of the workers' load.
+    elem_arrays.sort(key=lambda elem_array: elem_array.comp_len, reverse=True)
+
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        # Consume the results, so that any decoding error gets raised here.
+        for _ in executor.map(FBXElemArray.decode, elem_arrays):
+            pass
+
+
+_ARRAY_HEADER = Struct(b'<3I')
+unpack_from_uint = Struct(b'<I').unpack_from
+
+
+def _buffer_unpack_gen(fmt):
+    st = Struct(fmt)
+    size = st.size
+    unpack_from = st.unpack_from
+    return lambda data, offset: (unpack_from(data, offset)[0], offset + size)
+
+
+def _buffer_read_bytes(data, offset):
+    size = unpack_from_uint(data, offset)[0]
+    offset += 4
+    return data[offset:offset + size], offset + size
+
+
+def _buffer_read_array(array_type, array_stride, array_byteswap):
+    def _read(data, offset):
+        length, encoding, comp_len = _ARRAY_HEADER.unpack_from(data, offset)
+        offset += _ARRAY_HEADER.size
+        elem_array = FBXElemArray(data, offset, length, encoding, comp_len, array_type, array_stride, array_byteswap)
+        return elem_array, offset + comp_len
+    return _read
+
+buffer_read_data_dict = {
+    b'Y'[0]: _buffer_unpack_gen(b'<h'),  # 16 bit int
+    b'C'[0]: _buffer_unpack_gen(b'?'),   # 1 bit bool (yes/no)
+    b'I'[0]: _buffer_unpack_gen(b'<i'),  # 32 bit int
+    b'F'[0]: _buffer_unpack_gen(b'<f'),  # 32 bit float
+    b'D'[0]: _buffer_unpack_gen(b'<d'),  # 64 bit float
+    b'L'[0]: _buffer_unpack_gen(b'<q'),  # 64 bit int
+    b'R'[0]: _buffer_read_bytes,         # binary data
+    b'S'[0]: _buffer_read_bytes,         # string data
+    b'f'[0]: _buffer_read_array(data_types.ARRAY_FLOAT32, 4, False),  # array (float)
+    b'i'[0]: _buffer_read_array(data_types.ARRAY_INT32, 4, True),   # array (int)
+    b'd'[0]: _buffer_read_array(data_types.ARRAY_FLOAT64, 8, False),  # array (double)
+    b'l'[0]: _buffer_read_array(data_types.ARRAY_INT64, 8, True),   # array (long)
+    b'b'[0]: _buffer_read_array(data_types.ARRAY_BOOL, 1, False),  # array (bool)
+    b'c'[0]: _buffer_read_array(data_types.ARRAY_BYTE, 1, False),  # array (ubyte)
+    }
+
+
 # FBX 7500 (aka FBX2016) introduces incompatible changes at binary level:
 #   * The NULL block marking end of nested stuff switches from 13 bytes long to 25 bytes long.
 #   * The FBX element metadata (end_offset, prop_count and prop_length) switch from uint32 to uint64.
 def init_version(fbx_version):
-    global _BLOCK_SENTINEL_LENGTH, _BLOCK_SENTINEL_DATA, read_fbx_elem_uint
+    global _BLOCK_SENTINEL_LENGTH, _BLOCK_SENTINEL_DATA, read_fbx_elem_uint, _ELEM_HEADER
 
     _BLOCK_SENTINEL_LENGTH = ...
     _BLOCK_SENTINEL_DATA = ...
     read_fbx_elem_uint = ...
+    _ELEM_HEADER = ...
 
     if fbx_version < 7500:
         _BLOCK_SENTINEL_LENGTH = 13
         read_fbx_elem_uint = read_uint
+        _ELEM_HEADER = Struct(b'<3I')
     else:
         _BLOCK_SENTINEL_LENGTH = 25
         read_fbx_elem_uint = read_uint64
+        _ELEM_HEADER = Struct(b'<3Q')
     _BLOCK_SENTINEL_DATA = (b'\0' * _BLOCK_SENTINEL_LENGTH)
 
 
@@ -157,6 +302,47 @@ def read_elem(read, tell, use_namedtuple):
     return FBXElem(*args) if use_namedtuple else args
 
 
+def buffer_read_elem(data, offset, use_namedtuple):
+    """
+    Same as read_elem(), but reading from a buffer (typically a memory-mapped file) at given offset.
+    Array properties are returned as lazy FBXElemArray handles.
+    Returns a (elem, offset_after_elem) tuple.
+    """
+    end_offset, prop_count, prop_length = _ELEM_HEADER.unpack_from(data, offset)
+    offset += _ELEM_HEADER.size
+    if end_offset == 0:
+        return None, offset
+
+    elem_id_len = data[offset]
+    offset += 1
+    elem_id = data[offset:offset + elem_id_len]
+    offset += elem_id_len
+    elem_props_type = bytearray(prop_count)
+    elem_props_data = [None] * prop_count
+    elem_subtree = []
+
+    for i in range(prop_count):
+        data_type = data[offset]
+        elem_props_data[i], offset = buffer_read_data_dict[data_type](data, offset + 1)
+        elem_props_type[i] = data_type
+
+    if offset < end_offset:
+        while offset < (end_offset - _BLOCK_SENTINEL_LENGTH):
+            elem, offset = buffer_read_elem(data, offset, use_namedtuple)
+            elem_subtree.append(elem)
+
+        if data[offset:offset + _BLOCK_SENTINEL_LENGTH] != _BLOCK_SENTINEL_DATA:
+            raise IOError("failed to read nested block sentinel, "
+                          "expected all bytes to be 0")
+        offset += _BLOCK_SENTINEL_LENGTH
+
+    if offset != end_offset:
+        raise IOError("scope length not reached, something is wrong")
+
+    args = (elem_id, elem_props_data, elem_props_type, elem_subtree)
+    return (FBXElem(*args) if use_namedtuple else args), offset
+
+
 def parse_version(fn):
     """
     Return the FBX version,
@@ -171,7 +357,14 @@ def parse_version(fn):
         return read_uint(read)
 
 
-def parse(fn, use_namedtuple=True):
+def parse(fn, use_namedtuple=True, use_lazy_arrays=False):
+    """
+    Parse given binary FBX file, return a (root_elem, fbx_version) tuple.
+
+    With use_lazy_arrays, the file is memory-mapped instead of read, and array properties
+    are left as FBXElemArray handles, only decompressed when accessed (see array_resolve()).
+    The mapping is kept alive as long as any of those handles is.
+    """
     root_elems = []
 
     with open(fn, 'rb') as f:
@@ -184,11 +377,20 @@ def parse(fn, use_namedtuple=True):
         fbx_version = read_uint(read)
         init_version(fbx_version)
 
-        while True:
-            elem = read_elem(read, tell, use_namedtuple)
-            if elem is None:
-                break
-            root_elems.append(elem)
+        if use_lazy_arrays:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            offset = tell()
+            while True:
+                elem, offset = buffer_read_elem(data, offset, use_namedtuple)
+                if elem is None:
+                    break
+                root_elems.append(elem)
+        else:
+            while True:
+                elem = read_elem(read, tell, use_namedtuple)
+                if elem is None:
+                    break
+                root_elems.append(elem)
 
     args = (b'', [], bytearray(0), root_elems)
     return FBXElem(*args) if use_namedtuple else args, fbx_version
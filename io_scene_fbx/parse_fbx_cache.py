@@ -0,0 +1,250 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""
+Persistent on-disk cache of parsed binary FBX files.
+
+Each cached tree is stored in a '<content hash>.fbxpc' file, as marshal'ed nested tuples, with all arrays
+already decompressed, so that loading it back skips both tokenizing and zlib decompression of the FBX file.
+
+Hashing a whole file is not free either, so small '<path/size/mtime hash>.fbxpr' files map a given file
+(as long as its size and modification time do not change) to the hash of its content.
+Identical files at different paths share the same cache entry.
+
+The cache directory is kept under a given total size by removing least recently used files.
+Since loading marshal data is not safe against malicious files, the cache directory and its files
+must belong to current user and not be writable by anyone else.
+"""
+
+__all__ = (
+    "parse",
+    "default_cache_dir",
+    )
+
+import array
+import hashlib
+import marshal
+import mmap
+import os
+import sys
+import tempfile
+from struct import Struct
+
+try:
+    from . import parse_fbx
+except:
+    import parse_fbx
+
+FBXElem = parse_fbx.FBXElem
+array_resolve = parse_fbx.array_resolve
+
+_CACHE_EXT = ".fbxpc"
+_REF_EXT = ".fbxpr"
+_CACHE_MAGIC = b'BLFBXPC\x00'
+# Format version, marshal version, byte order of arrays and FBX version.
+_CACHE_HEADER = Struct(b'<8sIIBI')
+_CACHE_FORMAT_VERSION = 1
+_IS_BIG_ENDIAN = (sys.byteorder != 'little')
+# Ownership can only be checked on POSIX systems, elsewhere the per-user default directory is relied upon.
+_UID = os.getuid() if hasattr(os, "getuid") else None
+
+# Property types which are arrays, with their array.array typecode.
+_ARRAY_TYPES = {
+    b'f'[0]: parse_fbx.data_types.ARRAY_FLOAT32,
+    b'i'[0]: parse_fbx.data_types.ARRAY_INT32,
+    b'd'[0]: parse_fbx.data_types.ARRAY_FLOAT64,
+    b'l'[0]: parse_fbx.data_types.ARRAY_INT64,
+    b'b'[0]: parse_fbx.data_types.ARRAY_BOOL,
+    b'c'[0]: parse_fbx.data_types.ARRAY_BYTE,
+    }
+
+
+def default_cache_dir():
+    """Per-user cache directory, in Blender's user data files when available."""
+    base_dir = None
+    try:
+        import bpy
+        base_dir = bpy.utils.user_resource('DATAFILES')
+    except ImportError:
+        pass
+    if not base_dir:
+        base_dir = os.environ.get("LOCALAPPDATA" if sys.platform == 'win32' else "XDG_CACHE_HOME")
+    if not base_dir:
+        base_dir = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base_dir, "fbx_parse_cache")
+
+
+def cache_check_owner(st, fn):
+    """Raise PermissionError unless given stat result is owned by current user, and not writable by others."""
+    if _UID is not None and (st.st_uid != _UID or st.st_mode & 0o022):
+        raise PermissionError("%r does not belong to current user, or is writable by others" % fn)
+
+
+def cache_dir_ensure(cache_dir):
+    """Create the cache directory if needed (only accessible to current user), and check its ownership."""
+    os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+    cache_check_owner(os.stat(cache_dir), cache_dir)
+
+
+def file_hash(fn):
+    h = hashlib.blake2b(digest_size=20)
+    with open(fn, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def file_stat_key(fn):
+    st = os.stat(fn)
+    key = "%s|%d|%d" % (os.path.realpath(fn), st.st_size, st.st_mtime_ns)
+    return hashlib.blake2b(key.encode('utf-8', 'surrogateescape'), digest_size=20).hexdigest()
+
+
+def elem_to_tuple(elem):
+    elem_id, elem_props_data, elem_props_type, elem_subtree = elem
+    props = tuple(array_resolve(data).tobytes() if data_type in _ARRAY_TYPES else data
+                  for data, data_type in zip(elem_props_data, elem_props_type))
+    return (bytes(elem_id), props, bytes(elem_props_type), tuple(elem_to_tuple(child) for child in elem_subtree))
+
+
+def elem_from_tuple(data, use_namedtuple):
+    elem_id, props, props_type, subtree = data
+    props = list(props)
+    for i, data_type in enumerate(props_type):
+        array_type = _ARRAY_TYPES.get(data_type)
+        if array_type is not None:
+            data_array = array.array(array_type)
+            data_array.frombytes(props[i])
+            props[i] = data_array
+    args = (elem_id, props, bytearray(props_type), [elem_from_tuple(child, use_namedtuple) for child in subtree])
+    return FBXElem(*args) if use_namedtuple else args
+
+
+def cache_read(cache_fn, use_namedtuple):
+    with open(cache_fn, 'rb') as f:
+        st = os.fstat(f.fileno())
+        cache_check_owner(st, cache_fn)
+        if st.st_size <= _CACHE_HEADER.size:
+            return None
+        # Unmarshal straight from the mapped file, instead of reading a copy of it in memory first.
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, format_version, marshal_version, is_big_endian, fbx_version = _CACHE_HEADER.unpack_from(mm, 0)
+            if (magic, format_version, marshal_version, is_big_endian) != \
+               (_CACHE_MAGIC, _CACHE_FORMAT_VERSION, marshal.version, _IS_BIG_ENDIAN):
+                return None
+            with memoryview(mm) as mv, mv[_CACHE_HEADER.size:] as data:
+                root = marshal.loads(data)
+    return elem_from_tuple(root, use_namedtuple), fbx_version
+
+
+def cache_write(cache_fn, elem_root, fbx_version):
+    # Write to a temp file first and rename it, so that concurrent imports never see half-written files.
+    fd, tmp_fn = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(cache_fn))
+    try:
+        with open(fd, 'wb') as f:
+            f.write(_CACHE_HEADER.pack(_CACHE_MAGIC, _CACHE_FORMAT_VERSION, marshal.version, _IS_BIG_ENDIAN,
+                                       fbx_version))
+            marshal.dump(elem_to_tuple(elem_root), f)
+        os.replace(tmp_fn, cache_fn)
+    except:
+        os.remove(tmp_fn)
+        raise
+
+
+def cache_touch(fn):
+    """Mark given cache file as used (LRU order is based on modification time)."""
+    try:
+        os.utime(fn)
+    except OSError:
+        pass
+
+
+def cache_evict(cache_dir, max_size):
+    """Remove least recently used cache files until total size of the cache is below max_size (in bytes)."""
+    entries = []
+    total_size = 0
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if not entry.name.endswith((_CACHE_EXT, _REF_EXT)):
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, entry.path))
+            total_size += st.st_size
+
+    entries.sort()
+    for _mtime, size, path in entries:
+        if total_size <= max_size:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total_size -= size
+
+
+def parse(fn, cache_dir=None, max_size=1 << 30, num_workers=1, use_namedtuple=True):
+    """
+    Same as parse_fbx.parse(), but using (and feeding) the cache stored in cache_dir (default_cache_dir() if None).
+    All arrays are always fully decoded (using num_workers threads when parsing the actual FBX file).
+    Any error related to the cache itself is only reported, never fatal.
+
+    Returns a (root_elem, fbx_version, is_cache_hit) tuple.
+    """
+    ref_fn = digest = None
+    try:
+        if cache_dir is None:
+            cache_dir = default_cache_dir()
+        cache_dir_ensure(cache_dir)
+        ref_fn = os.path.join(cache_dir, file_stat_key(fn) + _REF_EXT)
+        if os.path.exists(ref_fn):
+            with open(ref_fn, 'r') as f:
+                cache_check_owner(os.fstat(f.fileno()), ref_fn)
+                digest = f.read().strip()
+        cache_fn = os.path.join(cache_dir, digest + _CACHE_EXT) if digest else None
+        if cache_fn is None or not os.path.exists(cache_fn):
+            # Unknown (or modified) file, or its cache entry was evicted, check whether the same content is cached.
+            digest = file_hash(fn)
+            cache_fn = os.path.join(cache_dir, digest + _CACHE_EXT)
+            with open(ref_fn, 'w') as f:
+                f.write(digest)
+        if os.path.exists(cache_fn):
+            ret = cache_read(cache_fn, use_namedtuple)
+            if ret is not None:
+                cache_touch(ref_fn)
+                cache_touch(cache_fn)
+                return ret + (True,)
+    except Exception as e:
+        print("WARNING: FBX parse cache: failed to read cache of %r (%s), parsing file" % (fn, e))
+        digest = None
+
+    elem_root, fbx_version = parse_fbx.parse(fn, use_namedtuple, use_lazy_arrays=True)
+    parse_fbx.decode_arrays((elem_root,), num_workers)
+
+    if digest is not None:
+        try:
+            cache_write(cache_fn, elem_root, fbx_version)
+            cache_evict(cache_dir, max_size)
+        except Exception as e:
+            print("WARNING: FBX parse cache: failed to cache %r (%s)" % (fn, e))
+
+    return elem_root, fbx_version, False
@@ -15,7 +15,7 @@
 bl_info = {
     'name': 'glTF 2.0 format',
     'author': 'Julien Duroure, Scurest, Norbert Nopper, Urs Hanselmann, Moritz Becher, Benjamin Schmithüsen, Jim Eckerlein, and many external contributors',
-    "version": (1, 7, 23),
+    "version": (1, 7, 31),
     'blender': (2, 91, 0),
     'location': 'File > Import-Export',
     'description': 'Import-Export as glTF 2.0',
@@ -58,6 +58,7 @@ from bpy.props import (StringProperty,
                        BoolProperty,
                        EnumProperty,
                        IntProperty,
+                       FloatProperty,
                        CollectionProperty)
 from bpy.types import Operator
 from bpy_extras.io_utils import ImportHelper, ExportHelper
@@ -377,6 +378,44 @@ class ExportGLTF2_Base:
         default=True
     )
 
+    export_keyframe_reduction: BoolProperty(
+        name='Reduce Keyframes',
+        description=(
+            'Remove sampled keyframes that interpolation can reconstruct within given tolerances. '
+            'Shape key animations are not reduced'
+        ),
+        default=False
+    )
+
+    export_keyframe_reduction_location_tolerance: FloatProperty(
+        name='Location Tolerance',
+        description='Maximum location error allowed by keyframe reduction',
+        default=0.0001,
+        min=0.0,
+        max=1.0,
+        precision=5,
+        unit='LENGTH'
+    )
+
+    export_keyframe_reduction_rotation_tolerance: FloatProperty(
+        name='Rotation Tolerance',
+        description='Maximum rotation error allowed by keyframe reduction',
+        default=0.0001,
+        min=0.0,
+        max=0.1,
+        precision=5,
+        subtype='ANGLE'
+    )
+
+    export_keyframe_reduction_scale_tolerance: FloatProperty(
+        name='Scale Tolerance',
+        description='Maximum scale error allowed by keyframe reduction',
+        default=0.0001,
+        min=0.0,
+        max=1.0,
+        precision=5
+    )
+
     export_nla_strips: BoolProperty(
         name='Group by NLA Track',
         description=(
@@ -586,12 +625,19 @@ class ExportGLTF2_Base:
             else:
                 export_settings['gltf_def_bones'] = False
             export_settings['gltf_nla_strips'] = self.export_nla_strips
+            export_settings['gltf_keyframe_reduction'] = self.export_keyframe_reduction
+            export_settings['gltf_keyframe_reduction_location_tolerance'] = \
+                self.export_keyframe_reduction_location_tolerance
+            export_settings['gltf_keyframe_reduction_rotation_tolerance'] = \
+                self.export_keyframe_reduction_rotation_tolerance
+            export_settings['gltf_keyframe_reduction_scale_tolerance'] = self.export_keyframe_reduction_scale_tolerance
         else:
             export_settings['gltf_frame_range'] = False
             export_settings['gltf_frame_zero_start'] = False
             export_settings['gltf_move_keyframes'] = False
             export_settings['gltf_force_sampling'] = False
             export_settings['gltf_def_bones'] = False
+            export_settings['gltf_keyframe_reduction'] = False
         export_settings['gltf_skins'] = self.export_skins
         if self.export_skins:
             export_settings['gltf_all_vertex_influences'] = self.export_all_influences
@@ -885,6 +931,13 @@ class GLTF_PT_export_animation_export(bpy.types.Panel):
         row.active = operator.export_force_sampling
         row.prop(operator, 'export_def_bones')
 
+        layout.prop(operator, 'export_keyframe_reduction')
+        col = layout.column()
+        col.active = operator.export_keyframe_reduction
+        col.prop(operator, 'export_keyframe_reduction_location_tolerance')
+        col.prop(operator, 'export_keyframe_reduction_rotation_tolerance')
+        col.prop(operator, 'export_keyframe_reduction_scale_tolerance')
+
 
 class GLTF_PT_export_animation_shapekeys(bpy.types.Panel):
     bl_space_type = 'FILE_BROWSER'
@@ -1172,3 +1225,8 @@ def unregister():
     # remove from the export / import menu
     bpy.types.TOPBAR_MT_file_export.remove(menu_func_export)
     bpy.types.TOPBAR_MT_file_import.remove(menu_func_import)
+
+    # Stop the threads encoding images and splitting meshes, so that they do not outlive the addon.
+    from .blender.exp import gltf2_blender_extract, gltf2_blender_image
+    gltf2_blender_image.shutdown_encode_executor()
+    gltf2_blender_extract.shutdown_split_executor()
@@ -14,6 +14,7 @@
 
 import typing
 import math
+import numpy as np
 from mathutils import Matrix, Vector, Quaternion, Euler
 
 from io_scene_gltf2.blender.com.gltf2_blender_data_path import get_target_property_name
@@ -208,3 +209,65 @@ def nearby_signed_perm_matrix(rot):
     z[(k+2) % 3] = 0
 
     return m
+
+
+# Vectorized versions of some mathutils operations, working on arrays of (row major) matrices or quaternions.
+# They follow Blender's own implementation, so that results match the mathutils ones.
+
+def matrices_decompose(matrices: np.ndarray) -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Same as Matrix.decompose(), for an array of 4x4 matrices (of shape [..., 4, 4]).
+    Returns (locations, rotation matrices, scales), rotation being given as normalized 3x3 matrices.
+    """
+    loc = matrices[..., :3, 3].copy()
+    rot = matrices[..., :3, :3].copy()
+    scale = np.linalg.norm(rot, axis=-2)
+    np.divide(rot, scale[..., np.newaxis, :], out=rot, where=scale[..., np.newaxis, :] != 0.0)
+    # Negative scales end up on all axes.
+    negative = np.linalg.det(rot) < 0.0
+    rot[negative] *= -1.0
+    scale[negative] *= -1.0
+    return loc, rot, scale
+
+
+def matrices_to_quaternions(matrices: np.ndarray) -> np.ndarray:
+    """Same as Matrix.to_quaternion(), for an array of 3x3 matrices. Quaternions are w first."""
+    m = matrices / np.linalg.norm(matrices, axis=-2)[..., np.newaxis, :]
+    m00, m01, m02 = m[..., 0, 0], m[..., 0, 1], m[..., 0, 2]
+    m10, m11, m12 = m[..., 1, 0], m[..., 1, 1], m[..., 1, 2]
+    m20, m21, m22 = m[..., 2, 0], m[..., 2, 1], m[..., 2, 2]
+
+    q = np.empty(m.shape[:-2] + (4,))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tr = 0.25 * (1.0 + m00 + m11 + m22)
+        case_x = (m00 > m11) & (m00 > m22)
+        case_y = ~case_x & (m11 > m22)
+        case_z = ~case_x & ~case_y
+
+        s = 2.0 * np.sqrt(np.maximum(1.0 + m00 - m11 - m22, 0.0))
+        q[case_x] = np.stack(((m21 - m12) / s, 0.25 * s, (m01 + m10) / s, (m02 + m20) / s), axis=-1)[case_x]
+        s = 2.0 * np.sqrt(np.maximum(1.0 + m11 - m00 - m22, 0.0))
+        q[case_y] = np.stack(((m02 - m20) / s, (m01 + m10) / s, 0.25 * s, (m12 + m21) / s), axis=-1)[case_y]
+        s = 2.0 * np.sqrt(np.maximum(1.0 + m22 - m00 - m11, 0.0))
+        q[case_z] = np.stack(((m10 - m01) / s, (m02 + m20) / s, (m12 + m21) / s, 0.25 * s), axis=-1)[case_z]
+
+        case_w = tr > 1e-4
+        s = np.sqrt(np.maximum(tr, 0.0))
+        q[case_w] = np.stack((s, (m21 - m12) / (4.0 * s), (m02 - m20) / (4.0 * s), (m10 - m01) / (4.0 * s)),
+                             axis=-1)[case_w]
+
+    norm = np.linalg.norm(q, axis=-1, keepdims=True)
+    np.divide(q, norm, out=q, where=norm != 0.0)
+    return q
+
+
+def quaternions_make_continuous(quaternions: np.ndarray) -> np.ndarray:
+    """
+    Flip signs of an array of quaternions (of shape [frames, ..., 4]) so that each one is in the same hemisphere
+    as the one of the previous frame, avoiding interpolation taking the long way around.
+    """
+    dots = np.einsum('i...j,i...j->i...', quaternions[1:], quaternions[:-1])
+    flips = np.cumsum(dots < 0.0, axis=0) % 2 == 1
+    result = quaternions.copy()
+    result[1:][flips] *= -1.0
+    return result
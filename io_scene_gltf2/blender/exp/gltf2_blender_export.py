@@ -20,6 +20,7 @@ import traceback
 from io_scene_gltf2.blender.com import gltf2_blender_json
 from io_scene_gltf2.blender.exp import gltf2_blender_export_keys
 from io_scene_gltf2.blender.exp import gltf2_blender_gather
+from io_scene_gltf2.blender.exp.gltf2_blender_gather_cache import GatherCache
 from io_scene_gltf2.blender.exp.gltf2_blender_gltf2_exporter import GlTF2Exporter
 from io_scene_gltf2.io.com.gltf2_io_debug import print_console, print_newline
 from io_scene_gltf2.io.exp import gltf2_io_export
@@ -43,12 +44,30 @@ def save(context, export_settings):
     for callback in pre_export_callbacks:
         callback(export_settings)
 
-    json, buffer = __export(export_settings)
+    if export_settings.get(gltf2_blender_export_keys.KEYFRAME_REDUCTION):
+        export_settings[gltf2_blender_export_keys.KEYFRAME_REDUCTION_STATS] = {}
+
+    # All gather functions results are cached for the duration of this export only.
+    gather_cache = GatherCache()
+    export_settings[gltf2_blender_export_keys.GATHER_CACHE] = gather_cache
+    try:
+        json, buffer = __export(export_settings)
+    finally:
+        __report_gather_cache(gather_cache)
+        gather_cache.clear()
+        del export_settings[gltf2_blender_export_keys.GATHER_CACHE]
+
+    if export_settings.get(gltf2_blender_export_keys.KEYFRAME_REDUCTION):
+        __report_keyframe_reduction(export_settings.pop(gltf2_blender_export_keys.KEYFRAME_REDUCTION_STATS))
 
     post_export_callbacks = export_settings["post_export_callbacks"]
     for callback in post_export_callbacks:
         callback(export_settings)
-    __write_file(json, buffer, export_settings)
+    try:
+        __write_file(json, buffer, export_settings)
+    finally:
+        if buffer is not None:
+            buffer.clear()
 
     end_time = time.time()
     __notify_end(context, end_time - start_time)
@@ -87,7 +106,7 @@ def __gather_gltf(exporter, export_settings):
 
 
 def __create_buffer(exporter, export_settings):
-    buffer = bytes()
+    buffer = None
     if export_settings[gltf2_blender_export_keys.FORMAT] == 'GLB':
         buffer = exporter.finalize_buffer(export_settings[gltf2_blender_export_keys.FILE_DIRECTORY], is_glb=True)
     else:
@@ -155,6 +174,16 @@ def __write_file(json, buffer, export_settings):
         raise e
 
 
+def __report_gather_cache(gather_cache):
+    stats = gather_cache.stats()
+    hits = sum(s[1] for s in stats)
+    misses = sum(s[2] for s in stats)
+    print_console('INFO', 'Gather cache: {} hits, {} misses ({:.1f}% hit rate)'.format(
+        hits, misses, 100.0 * hits / max(hits + misses, 1)))
+    for name, hits, misses, size in stats:
+        print_console('PROFILE', '    {}: {} hits, {} misses, {} cached'.format(name, hits, misses, size))
+
+
 def __notify_start(context):
     print_console('INFO', 'Starting glTF 2.0 export')
     context.window_manager.progress_begin(0, 100)
@@ -165,3 +194,13 @@ def __notify_end(context, elapsed):
     print_console('INFO', 'Finished glTF 2.0 export in {} s'.format(elapsed))
     context.window_manager.progress_end()
     print_newline()
+
+
+def __report_keyframe_reduction(stats):
+    sampled = sum(s[0] for s in stats.values())
+    kept = sum(s[1] for s in stats.values())
+    print_console('INFO', 'Keyframe reduction: {} of {} keyframes kept (compression ratio {:.2f}:1)'.format(
+        kept, sampled, sampled / max(kept, 1)))
+    for kind, (sampled, kept) in sorted(stats.items()):
+        print_console('INFO', '    {}: {} of {} keyframes kept (compression ratio {:.2f}:1)'.format(
+            kind, kept, sampled, sampled / max(kept, 1)))
@@ -58,6 +58,12 @@ EMBED_IMAGES = 'gltf_embed_images'
 BINARY = 'gltf_binary'
 EMBED_BUFFERS = 'gltf_embed_buffers'
 USE_NO_COLOR = 'gltf_use_no_color'
+GATHER_CACHE = 'gltf_gather_cache'
+KEYFRAME_REDUCTION = 'gltf_keyframe_reduction'
+KEYFRAME_REDUCTION_LOCATION_TOLERANCE = 'gltf_keyframe_reduction_location_tolerance'
+KEYFRAME_REDUCTION_ROTATION_TOLERANCE = 'gltf_keyframe_reduction_rotation_tolerance'
+KEYFRAME_REDUCTION_SCALE_TOLERANCE = 'gltf_keyframe_reduction_scale_tolerance'
+KEYFRAME_REDUCTION_STATS = 'gltf_keyframe_reduction_stats'
 
 METALLIC_ROUGHNESS_IMAGE = "metallic_roughness_image"
 GROUP_INDEX = 'group_index'
@@ -12,6 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 from mathutils import Vector
 
@@ -19,6 +23,12 @@ from . import gltf2_blender_export_keys
 from ...io.com.gltf2_io_debug import print_console
 from io_scene_gltf2.blender.exp import gltf2_blender_gather_skins
 
+# Meshes with less loops than that are split into primitives serially, not worth the threads overhead.
+PARALLEL_SPLIT_MIN_LOOPS = 20000
+
+_split_executor = None
+_split_executor_lock = threading.Lock()
+
 
 def extract_primitives(glTF, blender_mesh, library, blender_object, blender_vertex_groups, modifiers, export_settings):
     """Extract primitives from a mesh."""
@@ -89,7 +99,7 @@ def extract_primitives(glTF, blender_mesh, library, blender_object, blender_vert
 
     locs, morph_locs = __get_positions(blender_mesh, key_blocks, armature, blender_object, export_settings)
     if skin:
-        vert_bones, num_joint_sets = __get_bone_data(blender_mesh, skin, blender_vertex_groups)
+        vert_joints, vert_weights = __get_bone_data(blender_mesh, skin, blender_vertex_groups)
 
     # In Blender there is both per-vert data, like position, and also per-loop
     # (loop=corner-of-poly) data, like normals or UVs. glTF only has per-vert
@@ -188,25 +198,28 @@ def extract_primitives(glTF, blender_mesh, library, blender_object, blender_vert
 
         tri_material_idxs = np.empty(len(blender_mesh.loop_triangles), dtype=np.uint32)
         blender_mesh.loop_triangles.foreach_get('material_index', tri_material_idxs)
-        loop_material_idxs = np.repeat(tri_material_idxs, 3)  # material index for every loop
-        unique_material_idxs = np.unique(tri_material_idxs)
-        del tri_material_idxs
 
-        for material_idx in unique_material_idxs:
-            prim_indices[material_idx] = loop_indices[loop_material_idxs == material_idx]
+        # Sort triangles by material (keeping their order within each material), and cut at material changes.
+        tri_order = np.argsort(tri_material_idxs, kind='stable')
+        sorted_material_idxs = tri_material_idxs[tri_order]
+        sorted_loop_indices = loop_indices.reshape(-1, 3)[tri_order].reshape(-1)
+        del tri_material_idxs, tri_order
 
-    # Create all the primitives.
+        splits = np.flatnonzero(sorted_material_idxs[1:] != sorted_material_idxs[:-1]) + 1
+        starts = np.concatenate(([0], splits)) if len(sorted_material_idxs) else splits
+        for material_idx, dot_indices in zip(sorted_material_idxs[starts], np.split(sorted_loop_indices, splits * 3)):
+            prim_indices[material_idx] = dot_indices
 
-    primitives = []
+    # Create all the primitives.
 
-    for material_idx, dot_indices in prim_indices.items():
+    def extract_primitive(material_idx, dot_indices):
         # Extract just dots used by this primitive, deduplicate them, and
         # calculate indices into this deduplicated list.
         prim_dots = dots[dot_indices]
         prim_dots, indices = np.unique(prim_dots, return_inverse=True)
 
         if len(prim_dots) == 0:
-            continue
+            return None
 
         # Now just move all the data for prim_dots into attribute arrays
 
@@ -260,28 +273,20 @@ def extract_primitives(glTF, blender_mesh, library, blender_object, blender_vert
             attributes['COLOR_%d' % color_i] = colors
 
         if skin:
-            joints = [[] for _ in range(num_joint_sets)]
-            weights = [[] for _ in range(num_joint_sets)]
-
-            for vi in blender_idxs:
-                bones = vert_bones[vi]
-                for j in range(0, 4 * num_joint_sets):
-                    if j < len(bones):
-                        joint, weight = bones[j]
-                    else:
-                        joint, weight = 0, 0.0
-                    joints[j//4].append(joint)
-                    weights[j//4].append(weight)
-
-            for i, (js, ws) in enumerate(zip(joints, weights)):
-                attributes['JOINTS_%d' % i] = js
-                attributes['WEIGHTS_%d' % i] = ws
-
-        primitives.append({
+            __set_bone_attributes(attributes, vert_joints, vert_weights, blender_idxs)
+
+        return {
             'attributes': attributes,
             'indices': indices,
             'material': material_idx,
-        })
+        }
+
+    # Splitting is pure numpy work (which releases the GIL), so primitives are extracted in parallel.
+    if len(prim_indices) > 1 and len(dots) >= PARALLEL_SPLIT_MIN_LOOPS:
+        primitives = list(__get_split_executor().map(extract_primitive, prim_indices.keys(), prim_indices.values()))
+    else:
+        primitives = [extract_primitive(material_idx, dot_indices) for material_idx, dot_indices in prim_indices.items()]
+    primitives = [primitive for primitive in primitives if primitive is not None]
 
     if export_settings['gltf_loose_edges']:
         # Find loose edges
@@ -301,22 +306,7 @@ def extract_primitives(glTF, blender_mesh, library, blender_object, blender_vert
                 attributes['MORPH_POSITION_%d' % morph_i] = vs[blender_idxs]
 
             if skin:
-                joints = [[] for _ in range(num_joint_sets)]
-                weights = [[] for _ in range(num_joint_sets)]
-
-                for vi in blender_idxs:
-                    bones = vert_bones[vi]
-                    for j in range(0, 4 * num_joint_sets):
-                        if j < len(bones):
-                            joint, weight = bones[j]
-                        else:
-                            joint, weight = 0, 0.0
-                        joints[j//4].append(joint)
-                        weights[j//4].append(weight)
-
-                for i, (js, ws) in enumerate(zip(joints, weights)):
-                    attributes['JOINTS_%d' % i] = js
-                    attributes['WEIGHTS_%d' % i] = ws
+                __set_bone_attributes(attributes, vert_joints, vert_weights, blender_idxs)
 
             primitives.append({
                 'attributes': attributes,
@@ -344,22 +334,7 @@ def extract_primitives(glTF, blender_mesh, library, blender_object, blender_vert
                 attributes['MORPH_POSITION_%d' % morph_i] = vs[blender_idxs]
 
             if skin:
-                joints = [[] for _ in range(num_joint_sets)]
-                weights = [[] for _ in range(num_joint_sets)]
-
-                for vi in blender_idxs:
-                    bones = vert_bones[vi]
-                    for j in range(0, 4 * num_joint_sets):
-                        if j < len(bones):
-                            joint, weight = bones[j]
-                        else:
-                            joint, weight = 0, 0.0
-                        joints[j//4].append(joint)
-                        weights[j//4].append(weight)
-
-                for i, (js, ws) in enumerate(zip(joints, weights)):
-                    attributes['JOINTS_%d' % i] = js
-                    attributes['WEIGHTS_%d' % i] = ws
+                __set_bone_attributes(attributes, vert_joints, vert_weights, blender_idxs)
 
             primitives.append({
                 'attributes': attributes,
@@ -572,7 +547,42 @@ def __get_bone_data(blender_mesh, skin, blender_vertex_groups):
     # How many joint sets do we need? 1 set = 4 influences
     num_joint_sets = (max_num_influences + 3) // 4
 
-    return vert_bones, num_joint_sets
+    # Pack them in (num_verts x 4 * num_joint_sets) arrays, padded with (0, 0.0) influences,
+    # so that primitives can just pick their verts from them.
+    vert_joints = np.zeros((len(vert_bones), 4 * num_joint_sets), dtype=np.uint32)
+    vert_weights = np.zeros((len(vert_bones), 4 * num_joint_sets), dtype=np.float64)
+    for vi, bones in enumerate(vert_bones):
+        for j, (joint, weight) in enumerate(bones):
+            vert_joints[vi, j] = joint
+            vert_weights[vi, j] = weight
+
+    return vert_joints, vert_weights
+
+
+def __set_bone_attributes(attributes, vert_joints, vert_weights, blender_idxs):
+    joints = vert_joints[blender_idxs]
+    weights = vert_weights[blender_idxs]
+    for i in range(vert_joints.shape[1] // 4):
+        attributes['JOINTS_%d' % i] = joints[:, 4 * i:4 * i + 4].ravel().tolist()
+        attributes['WEIGHTS_%d' % i] = weights[:, 4 * i:4 * i + 4].ravel().tolist()
+
+
+def __get_split_executor():
+    global _split_executor
+    with _split_executor_lock:
+        if _split_executor is None:
+            _split_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1,
+                                                 thread_name_prefix="gltf-extract-split")
+        return _split_executor
+
+
+def shutdown_split_executor():
+    """Stop the threads splitting mesh primitives (when the addon is unregistered)."""
+    global _split_executor
+    with _split_executor_lock:
+        if _split_executor is not None:
+            _split_executor.shutdown(wait=True)
+            _split_executor = None
 
 
 def __zup2yup(array):
@@ -147,6 +147,7 @@ def gather_animation_channels(blender_action: bpy.types.Action,
     gltf2_blender_gather_drivers.get_sk_drivers.reset_cache()
     # resetting bone caches
     gltf2_blender_gather_animation_sampler_keyframes.get_bone_matrix.reset_cache()
+    gltf2_blender_gather_animation_sampler_keyframes.bake_armature_action.reset_cache()
 
     return channels
 
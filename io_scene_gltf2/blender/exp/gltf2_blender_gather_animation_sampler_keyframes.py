@@ -16,7 +16,7 @@ import bpy
 import mathutils
 import typing
 
-from io_scene_gltf2.blender.exp.gltf2_blender_gather_cache import cached, bonecache
+from io_scene_gltf2.blender.exp.gltf2_blender_gather_cache import cached, bonecache, bakecache
 from io_scene_gltf2.blender.com import gltf2_blender_math
 from io_scene_gltf2.blender.exp import gltf2_blender_get
 from io_scene_gltf2.blender.exp.gltf2_blender_gather_drivers import get_sk_drivers, get_sk_driver_values
@@ -183,6 +183,113 @@ def get_bone_matrix(blender_object_if_armature: typing.Optional[bpy.types.Object
 
     return data
 
+class BakedArmatureAction:
+    """
+    Local transforms of all bones of an armature, sampled on all frames of an action.
+
+    Arrays are indexed by [frame, bone], bones by their index in the pose (see bone_indices).
+    Rotations are stored both as normalized 3x3 matrices and as (w first) quaternions.
+    """
+
+    def __init__(self, frames, bone_indices, matrices):
+        self.frames = frames
+        self.bone_indices = bone_indices
+        self.locations, self.rotation_matrices, self.scales = gltf2_blender_math.matrices_decompose(matrices)
+        self.rotations = gltf2_blender_math.matrices_to_quaternions(self.rotation_matrices)
+
+    def get_values(self, bone_name: str, channel: str) -> np.ndarray:
+        """Values of given channel of a bone for all frames, as would be given by Matrix.decompose()."""
+        bone_index = self.bone_indices[bone_name]
+        return {
+            "location": self.locations,
+            "rotation_axis_angle": self.rotations,
+            "rotation_euler": self.rotations,
+            "rotation_quaternion": self.rotations,
+            "scale": self.scales
+        }[channel][:, bone_index]
+
+
+@bakecache
+def bake_armature_action(blender_object_if_armature: bpy.types.Object,
+                         bake_range_start,
+                         bake_range_end,
+                         action_name: str,
+                         step: int,
+                         export_settings
+                         ) -> BakedArmatureAction:
+    """Sample the local transforms of all bones of the armature, for all frames of the action, in one pass."""
+    frames = []
+    frame = bake_range_start
+    while frame <= bake_range_end:
+        frames.append(frame)
+        frame += step
+
+    pose_bones = blender_object_if_armature.pose.bones
+    bone_indices = {pbone.name: i for i, pbone in enumerate(pose_bones)}
+    matrices = np.empty((len(frames), len(pose_bones), 4, 4))
+
+    # Rest matrices of bones not fully inheriting their parent's transform do not change, compute them once.
+    rest_mats = {}
+    for pbone in pose_bones:
+        if (pbone.bone.use_inherit_rotation == False or pbone.bone.inherit_scale != "FULL") and pbone.parent != None:
+            rest_mat = (pbone.parent.bone.matrix_local.inverted_safe() @ pbone.bone.matrix_local)
+            rest_mats[pbone.name] = rest_mat.inverted_safe()
+
+    obj_driver = blender_object_if_armature.proxy if blender_object_if_armature.proxy else blender_object_if_armature
+
+    for frame_index, frame in enumerate(frames):
+        # we need to bake in the constraints
+        bpy.context.scene.frame_set(frame)
+        for bone_index, pbone in enumerate(pose_bones):
+            rest_mat_inv = rest_mats.get(pbone.name)
+            if rest_mat_inv is not None:
+                matrix = (rest_mat_inv @ pbone.parent.matrix.inverted_safe() @ pbone.matrix)
+            else:
+                matrix = blender_object_if_armature.convert_space(pose_bone=pbone, matrix=pbone.matrix,
+                                                                  from_space='POSE', to_space='LOCAL')
+            matrices[frame_index, bone_index] = matrix
+
+        # If some drivers must be evaluated, do it here, to avoid to have to change frame by frame later
+        for dr_obj, dr_fcurves in get_sk_drivers(obj_driver):
+            get_sk_driver_values(dr_obj, frame, dr_fcurves)
+
+    return BakedArmatureAction(frames, bone_indices, matrices)
+
+
+@cached
+def gather_baked_bone_keyframes(blender_object_if_armature: bpy.types.Object,
+                                bake_bone: str,
+                                bake_channel: str,
+                                bake_range_start,
+                                bake_range_end,
+                                action_name: str,
+                                node_channel_is_animated: bool,
+                                export_settings
+                                ) -> typing.Optional[typing.Tuple[np.ndarray, np.ndarray]]:
+    """
+    Same as gather_keyframes() for a baked bone, without creating any Keyframe.
+    Returns (times in seconds, values) arrays, values being given as by Matrix.decompose() (quaternions w first).
+    """
+    step = export_settings['gltf_frame_step']
+    baked = bake_armature_action(blender_object_if_armature, bake_range_start, bake_range_end, action_name, step,
+                                 export_settings)
+
+    frames = np.array(baked.frames, dtype=np.float64)
+    if export_settings[gltf2_blender_export_keys.FRAME_ZERO_START]:
+        frames -= bake_range_start
+    times = frames / bpy.context.scene.render.fps
+    values = baked.get_values(bake_bone, bake_channel)
+
+    # Check if all values are the same (see gather_keyframes())
+    std = np.ptp(np.ptp(values, axis=0))
+    if node_channel_is_animated is True:
+        if std < 0.0001 and len(times) >= 2:
+            return times[[0, -1]], values[[0, -1]]
+        return times, values
+    else:
+        return None if std < 0.0001 else (times, values)
+
+
 # cache for performance reasons
 @cached
 def gather_keyframes(blender_object_if_armature: typing.Optional[bpy.types.Object],
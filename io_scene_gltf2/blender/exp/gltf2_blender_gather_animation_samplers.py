@@ -17,6 +17,7 @@ import typing
 
 import bpy
 import mathutils
+import numpy as np
 from io_scene_gltf2.blender.com import gltf2_blender_math
 from io_scene_gltf2.blender.com.gltf2_blender_data_path import get_target_property_name, get_target_object_path
 from io_scene_gltf2.blender.exp import gltf2_blender_gather_animation_sampler_keyframes
@@ -26,6 +27,7 @@ from io_scene_gltf2.blender.exp import gltf2_blender_get
 from io_scene_gltf2.io.com import gltf2_io
 from io_scene_gltf2.io.com import gltf2_io_constants
 from io_scene_gltf2.io.exp import gltf2_io_binary_data
+from io_scene_gltf2.io.exp import gltf2_io_keyframe_reduction
 from . import gltf2_blender_export_keys
 from io_scene_gltf2.io.exp.gltf2_io_user_extensions import export_user_extensions
 
@@ -88,6 +90,9 @@ def gather_animation_sampler(channels: typing.Tuple[bpy.types.FCurve],
                                export_settings)
     )
 
+    if export_settings.get(gltf2_blender_export_keys.KEYFRAME_REDUCTION):
+        __reduce_keyframes(sampler, channels, bake_channel, export_settings)
+
     export_user_extensions('gather_animation_sampler_hook',
                             export_settings,
                             sampler,
@@ -241,6 +246,23 @@ def __gather_input(channels: typing.Tuple[bpy.types.FCurve],
                    export_settings
                    ) -> gltf2_io.Accessor:
     """Gather the key time codes."""
+    if __is_baked_bone(blender_object_if_armature, bake_bone, driver_obj):
+        baked = gltf2_blender_gather_animation_sampler_keyframes.gather_baked_bone_keyframes(
+            blender_object_if_armature, bake_bone, bake_channel, bake_range_start, bake_range_end, action_name,
+            node_channel_is_animated, export_settings)
+        if baked is None:
+            return None
+        times, _values = baked
+        return gltf2_blender_gather_accessors.gather_accessor(
+            gltf2_io_binary_data.BinaryData(times.astype(np.float32).tobytes()),
+            gltf2_io_constants.ComponentType.Float,
+            len(times),
+            tuple([float(times.max())]),
+            tuple([float(times.min())]),
+            gltf2_io_constants.DataType.Scalar,
+            export_settings
+        )
+
     keyframes = gltf2_blender_gather_animation_sampler_keyframes.gather_keyframes(blender_object_if_armature,
                                                                                   channels,
                                                                                   non_keyed_values,
@@ -323,6 +345,10 @@ def __gather_output(channels: typing.Tuple[bpy.types.FCurve],
                     export_settings
                     ) -> gltf2_io.Accessor:
     """Gather the data of the keyframes."""
+    if __is_baked_bone(blender_object_if_armature, bake_bone, driver_obj):
+        return __gather_baked_bone_output(blender_object_if_armature, bake_bone, bake_channel, bake_range_start,
+                                          bake_range_end, action_name, node_channel_is_animated, export_settings)
+
     keyframes = gltf2_blender_gather_animation_sampler_keyframes.gather_keyframes(blender_object_if_armature,
                                                                                   channels,
                                                                                   non_keyed_values,
@@ -359,22 +385,7 @@ def __gather_output(channels: typing.Tuple[bpy.types.FCurve],
         else:
             bone = blender_object_if_armature.pose.bones[bake_bone]
         if isinstance(bone, bpy.types.PoseBone):
-            if bone.parent is None:
-                axis_basis_change = mathutils.Matrix.Identity(4)
-                if export_settings[gltf2_blender_export_keys.YUP]:
-                    axis_basis_change = mathutils.Matrix(
-                        ((1.0, 0.0, 0.0, 0.0),
-                         (0.0, 0.0, 1.0, 0.0),
-                         (0.0, -1.0, 0.0, 0.0),
-                         (0.0, 0.0, 0.0, 1.0)))
-                correction_matrix_local = axis_basis_change @ bone.bone.matrix_local
-            else:
-                correction_matrix_local = (
-                    bone.parent.bone.matrix_local.inverted() @
-                    bone.bone.matrix_local
-                )
-
-            transform = correction_matrix_local
+            transform = __get_bone_correction_matrix(bone, export_settings)
         else:
             transform = mathutils.Matrix.Identity(4)
     else:
@@ -436,3 +447,150 @@ def __gather_output(channels: typing.Tuple[bpy.types.FCurve],
         sparse=None,
         type=data_type
     )
+
+
+def __is_baked_bone(blender_object_if_armature, bake_bone, driver_obj) -> bool:
+    return blender_object_if_armature is not None and bake_bone is not None and driver_obj is None
+
+
+def __get_bone_correction_matrix(bone: bpy.types.PoseBone, export_settings) -> mathutils.Matrix:
+    if bone.parent is None:
+        axis_basis_change = mathutils.Matrix.Identity(4)
+        if export_settings[gltf2_blender_export_keys.YUP]:
+            axis_basis_change = mathutils.Matrix(
+                ((1.0, 0.0, 0.0, 0.0),
+                 (0.0, 0.0, 1.0, 0.0),
+                 (0.0, -1.0, 0.0, 0.0),
+                 (0.0, 0.0, 0.0, 1.0)))
+        return axis_basis_change @ bone.bone.matrix_local
+    else:
+        return bone.parent.bone.matrix_local.inverted() @ bone.bone.matrix_local
+
+
+def __gather_baked_bone_output(blender_object_if_armature: bpy.types.Object,
+                               bake_bone: str,
+                               bake_channel: str,
+                               bake_range_start,
+                               bake_range_end,
+                               action_name,
+                               node_channel_is_animated: bool,
+                               export_settings
+                               ) -> gltf2_io.Accessor:
+    """Same as __gather_output() for a baked bone, transforming all keyframes at once."""
+    _times, values = gltf2_blender_gather_animation_sampler_keyframes.gather_baked_bone_keyframes(
+        blender_object_if_armature, bake_bone, bake_channel, bake_range_start, bake_range_end, action_name,
+        node_channel_is_animated, export_settings)
+
+    transform = np.array(__get_bone_correction_matrix(blender_object_if_armature.pose.bones[bake_bone],
+                                                      export_settings))
+    transform_3x3 = transform[:3, :3]
+
+    if bake_channel == "location":
+        values = values @ transform_3x3.T + transform[:3, 3]
+        data_type = gltf2_io_constants.DataType.Vec3
+    elif bake_channel == "scale":
+        # Same as transform_scale(): Matrix.to_scale() gives the (always positive) lengths of the axes.
+        scaled = transform_3x3[np.newaxis] * values[:, np.newaxis, :]
+        values = np.linalg.norm(scaled, axis=1)
+        data_type = gltf2_io_constants.DataType.Vec3
+    else:
+        rotation_matrices = transform_3x3 @ __quaternions_to_matrices(values)
+        rotations = gltf2_blender_math.matrices_to_quaternions(rotation_matrices)
+        rotations = gltf2_blender_math.quaternions_make_continuous(rotations)
+        # Blender has w-first quaternion notation
+        values = rotations[:, [1, 2, 3, 0]]
+        data_type = gltf2_io_constants.DataType.Vec4
+
+    component_type = gltf2_io_constants.ComponentType.Float
+    return gltf2_io.Accessor(
+        buffer_view=gltf2_io_binary_data.BinaryData(values.astype(np.float32).tobytes()),
+        byte_offset=None,
+        component_type=component_type,
+        count=len(values),
+        extensions=None,
+        extras=None,
+        max=None,
+        min=None,
+        name=None,
+        normalized=None,
+        sparse=None,
+        type=data_type
+    )
+
+
+def __quaternions_to_matrices(quaternions: np.ndarray) -> np.ndarray:
+    """Same as Quaternion.to_matrix() for an array of (w first) quaternions, normalizing them first."""
+    q = quaternions / np.linalg.norm(quaternions, axis=-1, keepdims=True)
+    w, x, y, z = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+    return np.stack((
+        np.stack((1.0 - 2.0 * (y * y + z * z), 2.0 * (x * y - w * z), 2.0 * (x * z + w * y)), axis=-1),
+        np.stack((2.0 * (x * y + w * z), 1.0 - 2.0 * (x * x + z * z), 2.0 * (y * z - w * x)), axis=-1),
+        np.stack((2.0 * (x * z - w * y), 2.0 * (y * z + w * x), 1.0 - 2.0 * (x * x + y * y)), axis=-1),
+    ), axis=-2)
+
+
+def __reduce_keyframes(sampler: gltf2_io.AnimationSampler,
+                       channels: typing.Tuple[bpy.types.FCurve],
+                       bake_channel: typing.Union[str, None],
+                       export_settings):
+    """Remove the keyframes of the sampler that interpolation can reconstruct within tolerance."""
+    if sampler.interpolation not in ('LINEAR', 'STEP'):
+        # Cubic splines come from actual Blender keyframes, not from sampling.
+        return
+
+    if bake_channel is None:
+        target = get_target_property_name([c for c in channels if c is not None][0].data_path)
+    else:
+        target = bake_channel
+    kind, tolerance_key = {
+        "delta_location": ("translation", gltf2_blender_export_keys.KEYFRAME_REDUCTION_LOCATION_TOLERANCE),
+        "location": ("translation", gltf2_blender_export_keys.KEYFRAME_REDUCTION_LOCATION_TOLERANCE),
+        "delta_rotation_euler": ("rotation", gltf2_blender_export_keys.KEYFRAME_REDUCTION_ROTATION_TOLERANCE),
+        "rotation_axis_angle": ("rotation", gltf2_blender_export_keys.KEYFRAME_REDUCTION_ROTATION_TOLERANCE),
+        "rotation_euler": ("rotation", gltf2_blender_export_keys.KEYFRAME_REDUCTION_ROTATION_TOLERANCE),
+        "rotation_quaternion": ("rotation", gltf2_blender_export_keys.KEYFRAME_REDUCTION_ROTATION_TOLERANCE),
+        "scale": ("scale", gltf2_blender_export_keys.KEYFRAME_REDUCTION_SCALE_TOLERANCE),
+    }.get(target, (None, None))
+    if kind is None:
+        # Shape key weights are kept as sampled.
+        return
+
+    times = np.frombuffer(sampler.input.buffer_view.data, dtype=np.float32)
+    values = np.frombuffer(sampler.output.buffer_view.data, dtype=np.float32).reshape(len(times), -1)
+    keep = gltf2_io_keyframe_reduction.reduce_keyframes(times, values, sampler.interpolation,
+                                                        export_settings[tolerance_key], kind == "rotation")
+
+    stats = export_settings.get(gltf2_blender_export_keys.KEYFRAME_REDUCTION_STATS)
+    if stats is not None:
+        kind_stats = stats.setdefault(kind, [0, 0])
+        kind_stats[0] += len(times)
+        kind_stats[1] += len(keep)
+
+    if len(keep) == len(times):
+        return
+
+    times = times[keep]
+    values = values[keep]
+    sampler.input = gltf2_blender_gather_accessors.gather_accessor(
+        gltf2_io_binary_data.BinaryData(times.tobytes()),
+        gltf2_io_constants.ComponentType.Float,
+        len(times),
+        tuple([float(times.max())]),
+        tuple([float(times.min())]),
+        gltf2_io_constants.DataType.Scalar,
+        export_settings
+    )
+    sampler.output = gltf2_io.Accessor(
+        buffer_view=gltf2_io_binary_data.BinaryData(values.tobytes()),
+        byte_offset=None,
+        component_type=sampler.output.component_type,
+        count=len(values),
+        extensions=None,
+        extras=None,
+        max=None,
+        min=None,
+        name=None,
+        normalized=None,
+        sparse=None,
+        type=sampler.output.type
+    )
@@ -13,16 +13,78 @@
 # limitations under the License.
 
 import functools
+
 import bpy
 from io_scene_gltf2.blender.exp import gltf2_blender_get
+from io_scene_gltf2.blender.exp import gltf2_blender_export_keys
+
+
+# Blender types used by name in the cache keys.
+_BY_NAME = (bpy.types.Object, bpy.types.Scene, bpy.types.Material, bpy.types.Action, bpy.types.Mesh,
+             bpy.types.PoseBone)
+
+# Reset functions of the caches not stored in the export session, called when the session is cleared.
+_reset_cache_functions = []
+
+
+class FunctionCache:
+    """Results of a cached gather function, with usage statistics."""
+
+    def __init__(self, name):
+        self.name = name
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        result = self.entries.get(key, default)
+        if result is default:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def set(self, key, result):
+        self.entries[key] = result
+
+
+class GatherCache:
+    """
+    Cache of the gather functions results, scoped to one export session.
+
+    It lives in the export settings (see gltf2_blender_export_keys.GATHER_CACHE), and is cleared at the end of
+    the export. Each function is cached independently.
+    Results are never dropped during the export: caching is also what ensures that a same Blender data
+    (node, mesh, skin, material...) is only exported once, and referenced by identity.
+    """
+
+    def __init__(self):
+        self.functions = {}
+
+    def function_cache(self, func):
+        function_cache = self.functions.get(func)
+        if function_cache is None:
+            function_cache = self.functions[func] = FunctionCache(func.__qualname__)
+        return function_cache
+
+    def stats(self):
+        """Return a (name, hits, misses, size) tuple for each cached function, sorted by name."""
+        return sorted((fc.name, fc.hits, fc.misses, len(fc.entries)) for fc in self.functions.values())
+
+    def clear(self):
+        self.functions.clear()
+        for reset_cache in _reset_cache_functions:
+            reset_cache()
 
 
 def cached(func):
     """
     Decorate the cache gather functions results.
 
-    The gather function is only executed if its result isn't in the cache yet
-    :param func: the function to be decorated. It will have a static __cache member afterwards
+    The gather function is only executed if its result isn't in the cache yet.
+    Results are stored in the export session cache if the export settings have one, otherwise in a
+    static __cache member of the function, invalidated when export settings change.
+    :param func: the function to be decorated.
     :return:
     """
     @functools.wraps(func)
@@ -39,21 +101,28 @@ def cached(func):
             export_settings = args[-1]
             cache_key_args = args[:-1]
 
-        __by_name = [bpy.types.Object, bpy.types.Scene, bpy.types.Material, bpy.types.Action, bpy.types.Mesh, bpy.types.PoseBone]
-
         # we make a tuple from the function arguments so that they can be used as a key to the cache
         cache_key = ()
         for i in cache_key_args:
-            if type(i) in __by_name:
+            if type(i) in _BY_NAME:
                 cache_key += (i.name,)
             else:
                 cache_key += (i,)
         for i in cache_key_kwargs.values():
-            if type(i) in __by_name:
+            if type(i) in _BY_NAME:
                 cache_key += (i.name,)
             else:
                 cache_key += (i,)
 
+        session_cache = export_settings.get(gltf2_blender_export_keys.GATHER_CACHE)
+        if session_cache is not None:
+            function_cache = session_cache.function_cache(func)
+            result = function_cache.get(cache_key, wrapper_cached)
+            if result is wrapper_cached:
+                result = func(*args)
+                function_cache.set(cache_key, result)
+            return result
+
         # invalidate cache if export settings have changed
         if not hasattr(func, "__export_settings") or export_settings != func.__export_settings:
             func.__cache = {}
@@ -75,6 +144,7 @@ def bonecache(func):
         func.__bonecache = {}
 
     func.reset_cache = reset_cache_bonecache
+    _reset_cache_functions.append(reset_cache_bonecache)
 
     @functools.wraps(func)
     def wrapper_bonecache(*args, **kwargs):
@@ -96,6 +166,33 @@ def bonecache(func):
             return func.__bonecache[args[7]][pose_bone_if_armature.name]
     return wrapper_bonecache
 
+def bakecache(func):
+    """
+    Cache the result of a function baking a whole action (its arguments being the armature and the action).
+
+    Only the result for the latest arguments is kept, as actions are exported one after the other.
+    """
+
+    def reset_cache_bakecache():
+        func.__bakecache_key = None
+        func.__bakecache = None
+
+    func.reset_cache = reset_cache_bakecache
+    _reset_cache_functions.append(reset_cache_bakecache)
+
+    @functools.wraps(func)
+    def wrapper_bakecache(*args):
+        if not hasattr(func, "__bakecache_key"):
+            func.reset_cache()
+        # export_settings (last argument) is not part of the key
+        key = tuple(a.name if type(a) in _BY_NAME else a for a in args[:-1])
+        if key != func.__bakecache_key:
+            func.__bakecache = None  # GC previous action first
+            func.__bakecache = func(*args)
+            func.__bakecache_key = key
+        return func.__bakecache
+    return wrapper_bakecache
+
 # TODO: replace "cached" with "unique" in all cases where the caching is functional and not only for performance reasons
 call_or_fetch = cached
 unique = cached
@@ -107,6 +204,7 @@ def skdriverdiscovercache(func):
         func.__skdriverdiscover = {}
 
     func.reset_cache = reset_cache_skdriverdiscovercache
+    _reset_cache_functions.append(reset_cache_skdriverdiscovercache)
 
     @functools.wraps(func)
     def wrapper_skdriverdiscover(*args, **kwargs):
@@ -128,6 +226,7 @@ def skdrivervalues(func):
         func.__skdrivervalues = {}
 
     func.reset_cache = reset_cache_skdrivervalues
+    _reset_cache_functions.append(reset_cache_skdrivervalues)
 
     @functools.wraps(func)
     def wrapper_skdrivervalues(*args, **kwargs):
@@ -106,7 +106,7 @@ def __filter_image(sockets, export_settings):
 @cached
 def __gather_buffer_view(image_data, mime_type, name, export_settings):
     if export_settings[gltf2_blender_export_keys.FORMAT] != 'GLTF_SEPARATE':
-        return gltf2_io_binary_data.BinaryData(data=image_data.encode(mime_type))
+        return gltf2_io_binary_data.BinaryData(data=image_data.encode_deferred(mime_type))
     return None
 
 
@@ -174,7 +174,7 @@ def __gather_uri(image_data, mime_type, name, export_settings):
     if export_settings[gltf2_blender_export_keys.FORMAT] == 'GLTF_SEPARATE':
         # as usual we just store the data in place instead of already resolving the references
         return gltf2_io_image_data.ImageData(
-            data=image_data.encode(mime_type=mime_type),
+            data=image_data.encode_deferred(mime_type=mime_type),
             mime_type=mime_type,
             name=name
         )
@@ -73,6 +73,9 @@ class GlTF2Exporter:
         self.__buffer = gltf2_io_buffer.Buffer()
         self.__images = {}
 
+        # hashed indices of the lists filled by __append_unique_and_get_index, keyed by id of the list
+        self.__unique_indices = {}
+
         # mapping of all glTFChildOfRootProperty types to their corresponding root level arrays
         self.__childOfRootPropertyTypeLookup = {
             gltf2_io.Accessor: self.__gltf.accessors,
@@ -116,7 +119,11 @@ class GlTF2Exporter:
         return self.__gltf
 
     def finalize_buffer(self, output_path=None, buffer_name=None, is_glb=False):
-        """Finalize the glTF and write buffers."""
+        """
+        Finalize the glTF and write buffers.
+
+        For GLB files, the buffer is returned instead, to be copied into the binary chunk of the file.
+        """
         if self.__finalized:
             raise RuntimeError("Tried to finalize buffers for finalized glTF file")
 
@@ -125,7 +132,7 @@ class GlTF2Exporter:
                 uri = None
             elif output_path and buffer_name:
                 with open(output_path + buffer_name, 'wb') as f:
-                    f.write(self.__buffer.to_bytes())
+                    self.__buffer.write_to(f)
                 uri = buffer_name
             else:
                 uri = self.__buffer.to_embed_string()
@@ -142,7 +149,8 @@ class GlTF2Exporter:
         self.__finalized = True
 
         if is_glb:
-            return self.__buffer.to_bytes()
+            return self.__buffer
+        self.__buffer.clear()
 
     def add_draco_extension(self):
         """
@@ -212,14 +220,11 @@ class GlTF2Exporter:
 
         return self.__append_unique_and_get_index(gltf_list, property)
 
-    @staticmethod
-    def __append_unique_and_get_index(target: list, obj):
-        if obj in target:
-            return target.index(obj)
-        else:
-            index = len(target)
-            target.append(obj)
-            return index
+    def __append_unique_and_get_index(self, target: list, obj):
+        unique_index = self.__unique_indices.get(id(target))
+        if unique_index is None:
+            unique_index = self.__unique_indices[id(target)] = _UniqueIndex(target)
+        return unique_index.append_unique_and_get_index(obj)
 
     def __add_image(self, image: gltf2_io_image_data.ImageData):
         name = image.adjusted_name()
@@ -333,6 +338,53 @@ class GlTF2Exporter:
         # do nothing for any type that does not match a glTF schema (primitives)
         return node
 
+
+class _UniqueIndex:
+    """
+    Hashed index of an (append only) list, giving the same result as `list.index(obj)` in constant time.
+
+    Hashable items are looked up in a dict, so they follow their own equality semantics (identity for
+    glTF properties, value for strings...). Unhashable items (like the dicts of root extensions) are
+    compared by value with the other unhashable items of the list only.
+    Items appended to the list without using this index are taken into account as well.
+    """
+
+    def __init__(self, target: list):
+        self.target = target
+        self.hashed = {}
+        self.unhashable = []
+        self.indexed_count = 0
+
+    def __add(self, obj, index):
+        try:
+            self.hashed.setdefault(obj, index)
+        except TypeError:
+            self.unhashable.append((obj, index))
+
+    def __find(self, obj):
+        try:
+            return self.hashed.get(obj)
+        except TypeError:
+            for item, index in self.unhashable:
+                if item is obj or item == obj:
+                    return index
+            return None
+
+    def append_unique_and_get_index(self, obj):
+        target = self.target
+        for index in range(self.indexed_count, len(target)):
+            self.__add(target[index], index)
+        self.indexed_count = len(target)
+
+        index = self.__find(obj)
+        if index is None:
+            index = len(target)
+            target.append(obj)
+            self.__add(obj, index)
+            self.indexed_count += 1
+        return index
+
+
 def _path_to_uri(path):
     path = os.path.normpath(path)
     path = path.replace(os.sep, '/')
@@ -14,10 +14,18 @@
 
 import bpy
 import os
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Union
 import numpy as np
 import tempfile
 import enum
+import hashlib
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from io_scene_gltf2.io.exp.gltf2_io_binary_data import DeferredData
 
 
 class Channel(enum.IntEnum):
@@ -115,6 +123,16 @@ class ExportImage:
         )
 
     def encode(self, mime_type: Optional[str]) -> bytes:
+        data = self.encode_deferred(mime_type)
+        if isinstance(data, DeferredData):
+            return data.result()
+        return data
+
+    def encode_deferred(self, mime_type: Optional[str]) -> Union[bytes, DeferredData]:
+        """
+        Same as encode(), but images which channels need packing may be compressed by worker threads,
+        in which case the returned DeferredData only gives the encoded image once done.
+        """
         self.file_format = {
             "image/jpeg": "JPEG",
             "image/png": "PNG"
@@ -130,7 +148,7 @@ class ExportImage:
     def __encode_happy(self) -> bytes:
         return self.__encode_from_image(self.blender_image())
 
-    def __encode_unhappy(self) -> bytes:
+    def __encode_unhappy(self) -> Union[bytes, DeferredData]:
         # We need to assemble the image out of channels.
         # Do it with numpy and image.pixels.
 
@@ -172,7 +190,34 @@ class ExportImage:
 
         return self.__encode_from_numpy_array(out_buf, (width, height))
 
-    def __encode_from_numpy_array(self, pixels: np.ndarray, dim: Tuple[int, int]) -> bytes:
+    def __encode_from_numpy_array(self, pixels: np.ndarray, dim: Tuple[int, int]) -> Union[bytes, DeferredData]:
+        # Same conversion to 8 bits as when setting the pixels of a (byte) Blender image.
+        pixels = _float_to_byte(pixels).reshape(dim[1], dim[0], 4)
+        if Channel.A not in self.fills:
+            pixels = pixels[:, :, :3]
+
+        # Identical images (e.g. same channels combination used by several materials) are only encoded once,
+        # and kept in cache for next exports.
+        key = _pixels_key(pixels, self.file_format)
+        data = _encoded_images_cache_get(key)
+        if data is not None:
+            return data
+
+        if self.file_format == 'PNG':
+            # Blender images are stored bottom to top.
+            data = DeferredData(key, _get_encode_executor().submit(_encode_png, pixels[::-1]))
+        else:
+            data = DeferredData(key, Future())
+            data.future.set_result(self.__encode_from_byte_pixels(pixels, dim))
+        _encoded_images_cache_add(key, data)
+        return data
+
+    def __encode_from_byte_pixels(self, pixels: np.ndarray, dim: Tuple[int, int]) -> bytes:
+        if pixels.shape[2] == 3:
+            pixels = np.dstack((pixels, np.full(pixels.shape[:2], 255, np.uint8)))
+        return self.__encode_from_float_pixels(pixels.ravel() / np.float32(255.0), dim)
+
+    def __encode_from_float_pixels(self, pixels: np.ndarray, dim: Tuple[int, int]) -> bytes:
         with TmpImageGuard() as guard:
             guard.image = bpy.data.images.new(
                 "##gltf-export:tmp-image##",
@@ -214,6 +259,159 @@ class ExportImage:
             return _encode_temp_image(tmp_image, self.file_format)
 
 
+def _float_to_byte(pixels: np.ndarray) -> np.ndarray:
+    """Convert float pixels to bytes, rounding and clamping them exactly as Blender does."""
+    pixels = np.asarray(pixels, dtype=np.float32)
+    return np.where(pixels <= 0.0, 0,
+                    np.where(pixels > np.float32(1.0 - 0.5 / 255.0), 255,
+                             pixels * np.float32(255.0) + np.float32(0.5))).astype(np.uint8)
+
+
+def _pixels_key(pixels: np.ndarray, file_format: str):
+    h = hashlib.blake2b(digest_size=20)
+    h.update(np.ascontiguousarray(pixels))
+    return (file_format, pixels.shape, h.digest())
+
+
+def _png_filter_rows(rows: np.ndarray, prev_row: np.ndarray, bpp: int) -> np.ndarray:
+    """
+    Apply the best of the five PNG filters to each of the given rows (a 2D array of bytes),
+    prev_row being the (unfiltered) row before the first one.
+    The filter is chosen per row with the usual 'minimum sum of absolute differences' heuristic.
+    Returns the filtered rows, each prefixed with the byte of the chosen filter type.
+    """
+    rows = rows.astype(np.int16)
+    up = np.empty_like(rows)
+    up[0] = prev_row
+    up[1:] = rows[:-1]
+    left = np.zeros_like(rows)
+    left[:, bpp:] = rows[:, :-bpp]
+    up_left = np.zeros_like(rows)
+    up_left[:, bpp:] = up[:, :-bpp]
+
+    p = left + up - up_left
+    pa = np.abs(p - left)
+    pb = np.abs(p - up)
+    pc = np.abs(p - up_left)
+    paeth = np.where((pa <= pb) & (pa <= pc), left, np.where(pb <= pc, up, up_left))
+
+    filtered = np.stack((rows, rows - left, rows - up, rows - ((left + up) >> 1), rows - paeth)).astype(np.uint8)
+    costs = np.abs(filtered.view(np.int8).astype(np.int32)).sum(axis=2)
+    best = costs.argmin(axis=0)
+
+    out = np.empty((rows.shape[0], rows.shape[1] + 1), np.uint8)
+    out[:, 0] = best
+    out[:, 1:] = filtered[best, np.arange(rows.shape[0])]
+    return out
+
+
+def _encode_png(pixels: np.ndarray) -> bytes:
+    """Encode a (height x width x channels) array of bytes, top row first, as a PNG file."""
+    height, width, channels = pixels.shape
+    color_type = {1: 0, 2: 4, 3: 2, 4: 6}[channels]
+    rows = pixels.reshape(height, width * channels)
+
+    # Filter and compress by bands of rows, to keep memory usage low on big images.
+    compressor = zlib.compressobj(6)
+    idat = []
+    prev_row = np.zeros(width * channels, np.uint8)
+    band_height = max(1, (1 << 20) // max(1, width * channels))
+    for start in range(0, height, band_height):
+        band = rows[start:start + band_height]
+        idat.append(compressor.compress(_png_filter_rows(band, prev_row, channels)))
+        prev_row = band[-1]
+    idat.append(compressor.flush())
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+
+    return b''.join((
+        b'\x89PNG\r\n\x1a\n',
+        chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0)),
+        chunk(b'IDAT', b''.join(idat)),
+        chunk(b'IEND', b''),
+    ))
+
+
+# Images encoded from packed channels, kept for the whole Blender session (bounded by their total size).
+ENCODED_IMAGES_CACHE_MAX_SIZE = 256 * 1024 * 1024
+_encoded_images_cache = OrderedDict()
+# Sizes of the successfully encoded images of the cache, and their total, updated as encoding tasks complete.
+_encoded_images_sizes = {}
+_encoded_images_total_size = 0
+_encoded_images_cache_lock = threading.Lock()
+_encode_executor = None
+_encode_executor_lock = threading.Lock()
+
+
+def _get_encode_executor() -> ThreadPoolExecutor:
+    global _encode_executor
+    with _encode_executor_lock:
+        if _encode_executor is None:
+            _encode_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1,
+                                                  thread_name_prefix="gltf-image-encode")
+        return _encode_executor
+
+
+def shutdown_encode_executor():
+    """Wait for pending image encodings and stop their threads (when the addon is unregistered)."""
+    global _encode_executor
+    with _encode_executor_lock:
+        if _encode_executor is not None:
+            _encode_executor.shutdown(wait=True)
+            _encode_executor = None
+
+
+def _encoded_images_cache_get(key) -> Optional[DeferredData]:
+    with _encoded_images_cache_lock:
+        data = _encoded_images_cache.get(key)
+        if data is not None:
+            if data.future.done() and data.future.exception() is not None:
+                # Do not keep failures around, try again.
+                del _encoded_images_cache[key]
+                return None
+            _encoded_images_cache.move_to_end(key)
+        return data
+
+
+def _encoded_images_cache_done(data: DeferredData):
+    """Account for the size of a cached image once encoded (called from the encoding thread)."""
+    global _encoded_images_total_size
+    future = data.future
+    if future.exception() is not None:
+        return
+    with _encoded_images_cache_lock:
+        # It may have been replaced or evicted in the meantime.
+        if _encoded_images_cache.get(data.key) is not data:
+            return
+        size = len(future.result())
+        _encoded_images_sizes[data.key] = size
+        _encoded_images_total_size += size
+
+        # Drop least recently used encoded images, only accounting for finished ones.
+        if _encoded_images_total_size > ENCODED_IMAGES_CACHE_MAX_SIZE:
+            evicted = []
+            total_size = _encoded_images_total_size
+            for k, d in _encoded_images_cache.items():
+                if total_size <= ENCODED_IMAGES_CACHE_MAX_SIZE:
+                    break
+                if d.future.done():
+                    total_size -= _encoded_images_sizes.get(k, 0)
+                    evicted.append(k)
+            for k in evicted:
+                del _encoded_images_cache[k]
+                _encoded_images_total_size -= _encoded_images_sizes.pop(k, 0)
+
+
+def _encoded_images_cache_add(key, data: DeferredData):
+    global _encoded_images_total_size
+    with _encoded_images_cache_lock:
+        _encoded_images_cache[key] = data
+        _encoded_images_total_size -= _encoded_images_sizes.pop(key, 0)
+    # Outside of the lock, as it is called right away for already finished futures.
+    data.future.add_done_callback(lambda _future: _encoded_images_cache_done(data))
+
+
 def _encode_temp_image(tmp_image: bpy.types.Image, file_format: str) -> bytes:
     with tempfile.TemporaryDirectory() as tmpdirname:
         tmpfilename = tmpdirname + '/img'
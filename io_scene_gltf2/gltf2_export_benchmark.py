@@ -0,0 +1,116 @@
+# Copyright 2018-2021 The glTF-Blender-IO authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Usage
+=====
+
+   blender --background --factory-startup --python gltf2_export_benchmark.py -- [OPTIONS]
+
+Generates scenes of increasingly many objects instancing a few shared meshes and materials,
+and times their glTF export, to check how the exporter scales with the number of nodes.
+
+Options:
+
+   --nodes=N[,N...]    Number of objects of each generated scene (default: 1000,5000,20000).
+   --meshes=N          Number of distinct meshes shared by the objects (default: 10).
+   --materials=N       Number of distinct materials shared by the meshes (default: 5).
+   --format=FORMAT     Export format, GLB or GLTF_SEPARATE (default: GLB).
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import bpy
+
+
+def scene_generate(nbr_nodes, nbr_meshes, nbr_materials):
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    scene = bpy.context.scene
+
+    materials = [bpy.data.materials.new("Material.%d" % i) for i in range(nbr_materials)]
+    meshes = []
+    for i in range(nbr_meshes):
+        me = bpy.data.meshes.new("Mesh.%d" % i)
+        # A cube, slightly different for each mesh.
+        s = 1.0 + i * 0.01
+        verts = [(x * s, y * s, z * s) for x in (-1.0, 1.0) for y in (-1.0, 1.0) for z in (-1.0, 1.0)]
+        faces = [(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)]
+        me.from_pydata(verts, [], faces)
+        me.materials.append(materials[i % nbr_materials])
+        meshes.append(me)
+
+    # Objects are organized in small hierarchies, to also exercise children references.
+    parent = None
+    for i in range(nbr_nodes):
+        ob = bpy.data.objects.new("Object.%d" % i, meshes[i % nbr_meshes])
+        ob.location = (i % 100, (i // 100) % 100, i // 10000)
+        if i % 10 == 0:
+            parent = ob
+        else:
+            ob.parent = parent
+        scene.collection.objects.link(ob)
+
+
+def benchmark(nbr_nodes, nbr_meshes, nbr_materials, export_format):
+    t = time.perf_counter()
+    scene_generate(nbr_nodes, nbr_meshes, nbr_materials)
+    t_generate = time.perf_counter() - t
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filepath = os.path.join(tmp_dir, "benchmark.glb" if export_format == 'GLB' else "benchmark.gltf")
+        t = time.perf_counter()
+        bpy.ops.export_scene.gltf(filepath=filepath, export_format=export_format)
+        t_export = time.perf_counter() - t
+
+    print("%6d nodes: generated in %.3f sec, exported in %.3f sec (%.1f usec per node)"
+          % (nbr_nodes, t_generate, t_export, t_export * 1e6 / nbr_nodes))
+
+
+# ----------------------------------------------------------------------------
+# Command Line
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    if "--help" in argv:
+        print(__doc__)
+        return
+
+    nodes = (1000, 5000, 20000)
+    nbr_meshes = 10
+    nbr_materials = 5
+    export_format = 'GLB'
+    for arg in argv:
+        name, _sep, value = arg.partition("=")
+        if name == "--nodes":
+            nodes = [int(n) for n in value.split(",")]
+        elif name == "--meshes":
+            nbr_meshes = int(value)
+        elif name == "--materials":
+            nbr_materials = int(value)
+        elif name == "--format":
+            export_format = value
+        else:
+            print("Unknown argument %r" % arg)
+            print(__doc__)
+            return
+
+    for nbr_nodes in nodes:
+        benchmark(nbr_nodes, nbr_meshes, nbr_materials, export_format)
+
+
+if __name__ == "__main__":
+    main()
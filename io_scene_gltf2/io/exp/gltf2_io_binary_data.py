@@ -17,19 +17,50 @@ import array
 from io_scene_gltf2.io.com import gltf2_io_constants
 
 
+class DeferredData:
+    """
+    Binary data still being computed (e.g. by a worker thread), identified by a key describing its content.
+
+    Deferred data with equal keys are considered equal, without waiting for their actual data.
+    """
+
+    def __init__(self, key, future):
+        self.key = key
+        self.future = future
+
+    def result(self) -> bytes:
+        return self.future.result()
+
+    def __eq__(self, other):
+        if not isinstance(other, DeferredData):
+            return NotImplemented
+        return self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+
 class BinaryData:
     """Store for gltf binary data that can later be stored in a buffer."""
 
-    def __init__(self, data: bytes):
-        if not isinstance(data, bytes):
+    def __init__(self, data: typing.Union[bytes, DeferredData]):
+        if not isinstance(data, (bytes, DeferredData)):
             raise TypeError("Data is not a bytes array")
-        self.data = data
+        # Equality (and hash) is based on the data as given, it must not change once resolved.
+        self.__key = data
+        self.__data = data
+
+    @property
+    def data(self) -> bytes:
+        if isinstance(self.__data, DeferredData):
+            self.__data = self.__data.result()
+        return self.__data
 
     def __eq__(self, other):
-        return self.data == other.data
+        return self.__key == other.__key
 
     def __hash__(self):
-        return hash(self.data)
+        return hash(self.__key)
 
     @classmethod
     def from_list(cls, lst: typing.List[typing.Any], gltf_component_type: gltf2_io_constants.ComponentType):
@@ -13,28 +13,44 @@
 # limitations under the License.
 
 import base64
+import shutil
+import tempfile
 
 from io_scene_gltf2.io.com import gltf2_io
 from io_scene_gltf2.io.exp import gltf2_io_binary_data
 
 
 class Buffer:
-    """Class representing binary data for use in a glTF file as 'buffer' property."""
+    """
+    Class representing binary data for use in a glTF file as 'buffer' property.
+
+    Buffer views are appended to a temporary file as they get added (when the gathered glTF tree is traversed),
+    and copied from there to the final file, so that no concatenated copy of the whole buffer is built in memory.
+    Note that the data of the buffer views themselves is still gathered in memory before.
+    """
+
+    # Size of the blocks copied from the temporary file, a multiple of 3 so that base64 blocks can be concatenated.
+    COPY_BLOCK_SIZE = 3 * 1024 * 1024
 
     def __init__(self, buffer_index=0):
-        self.__data = bytearray(b"")
+        self.__file = None
+        self.__length = 0
         self.__buffer_index = buffer_index
 
     def add_and_get_view(self, binary_data: gltf2_io_binary_data.BinaryData) -> gltf2_io.BufferView:
         """Add binary data to the buffer. Return a glTF BufferView."""
-        offset = len(self.__data)
-        self.__data.extend(binary_data.data)
+        if self.__file is None:
+            self.__file = tempfile.TemporaryFile(prefix="gltf-export-", suffix=".bin")
+
+        offset = self.__length
+        self.__file.write(binary_data.data)
 
         length = binary_data.byte_length
 
         # offsets should be a multiple of 4 --> therefore add padding if necessary
         padding = (4 - (length % 4)) % 4
-        self.__data.extend(b"\x00" * padding)
+        self.__file.write(b"\x00" * padding)
+        self.__length += length + padding
 
         buffer_view = gltf2_io.BufferView(
             buffer=self.__buffer_index,
@@ -50,13 +66,35 @@ class Buffer:
 
     @property
     def byte_length(self):
-        return len(self.__data)
+        return self.__length
+
+    def __iter_blocks(self):
+        if self.__file is None:
+            return
+        self.__file.flush()
+        self.__file.seek(0)
+        for block in iter(lambda: self.__file.read(self.COPY_BLOCK_SIZE), b""):
+            yield block
+        self.__file.seek(0, 2)
+
+    def write_to(self, file):
+        """Copy the whole buffer into given (binary) file object, at its current position."""
+        if self.__file is None:
+            return
+        self.__file.flush()
+        self.__file.seek(0)
+        shutil.copyfileobj(self.__file, file, self.COPY_BLOCK_SIZE)
+        self.__file.seek(0, 2)
 
     def to_bytes(self):
-        return self.__data
+        return b"".join(self.__iter_blocks())
 
     def to_embed_string(self):
-        return 'data:application/octet-stream;base64,' + base64.b64encode(self.__data).decode('ascii')
+        return 'data:application/octet-stream;base64,' + \
+            "".join(base64.b64encode(block).decode('ascii') for block in self.__iter_blocks())
 
     def clear(self):
-        self.__data = b""
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+        self.__length = 0
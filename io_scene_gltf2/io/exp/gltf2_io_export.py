@@ -19,6 +19,8 @@
 import json
 import struct
 
+from io_scene_gltf2.io.exp.gltf2_io_buffer import Buffer
+
 #
 # Globals
 #
@@ -77,41 +79,47 @@ def save_gltf(gltf, export_settings, encoder, glb_buffer):
             file.close()
 
     else:
-        file = open(export_settings['gltf_filepath'], "wb")
+        with open(export_settings['gltf_filepath'], "wb") as file:
+            __write_glb(file, gltf_encoded.encode(), glb_buffer)
 
-        gltf_data = gltf_encoded.encode()
-        binary = glb_buffer
+    return True
 
-        length_gltf = len(gltf_data)
-        spaces_gltf = (4 - (length_gltf & 3)) & 3
-        length_gltf += spaces_gltf
 
-        length_bin = len(binary)
+def __write_glb(file, gltf_data, binary: Buffer):
+    """
+    Write a GLB file, copying the binary chunk from given buffer (if any).
+    Chunk and file lengths are back-patched once the binary chunk is written.
+    """
+    header = struct.Struct("<4sII")
+    chunk_header = struct.Struct("<I4s")
+
+    length_gltf = len(gltf_data)
+    spaces_gltf = (4 - (length_gltf & 3)) & 3
+    length_gltf += spaces_gltf
+
+    # Header (Version 2), total length is patched at the end.
+    file.write(header.pack(b'glTF', 2, 0))
+
+    # Chunk 0 (JSON)
+    file.write(chunk_header.pack(length_gltf, b'JSON'))
+    file.write(gltf_data)
+    file.write(b' ' * spaces_gltf)
+
+    # Chunk 1 (BIN)
+    if binary is not None and binary.byte_length > 0:
+        bin_chunk_offset = file.tell()
+        file.write(chunk_header.pack(0, b'BIN\0'))
+        binary.write_to(file)
+        length_bin = file.tell() - bin_chunk_offset - chunk_header.size
         zeros_bin = (4 - (length_bin & 3)) & 3
+        file.write(b'\0' * zeros_bin)
         length_bin += zeros_bin
 
-        length = 12 + 8 + length_gltf
-        if length_bin > 0:
-            length += 8 + length_bin
-
-        # Header (Version 2)
-        file.write('glTF'.encode())
-        file.write(struct.pack("I", 2))
-        file.write(struct.pack("I", length))
-
-        # Chunk 0 (JSON)
-        file.write(struct.pack("I", length_gltf))
-        file.write('JSON'.encode())
-        file.write(gltf_data)
-        file.write(b' ' * spaces_gltf)
-
-        # Chunk 1 (BIN)
-        if length_bin > 0:
-            file.write(struct.pack("I", length_bin))
-            file.write('BIN\0'.encode())
-            file.write(binary)
-            file.write(b'\0' * zeros_bin)
-
-        file.close()
+        file.seek(bin_chunk_offset)
+        file.write(chunk_header.pack(length_bin, b'BIN\0'))
+        file.seek(0, 2)
 
-    return True
+    length = file.tell()
+    file.seek(0)
+    file.write(header.pack(b'glTF', 2, length))
+    file.seek(0, 2)
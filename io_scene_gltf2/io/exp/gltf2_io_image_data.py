@@ -12,6 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import re
+import typing
+
+from io_scene_gltf2.io.exp.gltf2_io_binary_data import DeferredData
 
 
 class ImageData:
@@ -19,16 +22,18 @@ class ImageData:
     # FUTURE_WORK: as a method to allow the node graph to be better supported, we could model some of
     # the node graph elements with numpy functions
 
-    def __init__(self, data: bytes, mime_type: str, name: str):
+    def __init__(self, data: typing.Union[bytes, DeferredData], mime_type: str, name: str):
+        # Equality (and hash) is based on the data as given, it must not change once resolved.
+        self._key = data
         self._data = data
         self._mime_type = mime_type
         self._name = name
 
     def __eq__(self, other):
-        return self._data == other.data
+        return self._key == other._key
 
     def __hash__(self):
-        return hash(self._data)
+        return hash(self._key)
 
     def adjusted_name(self):
         regex_dot = re.compile("\.")
@@ -38,6 +43,8 @@ class ImageData:
 
     @property
     def data(self):
+        if isinstance(self._data, DeferredData):
+            self._data = self._data.result()
         return self._data
 
     @property
@@ -0,0 +1,115 @@
+# Copyright 2018-2021 The glTF-Blender-IO authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+
+def reduce_keyframes(times: np.ndarray,
+                     values: np.ndarray,
+                     interpolation: str,
+                     tolerance: float,
+                     is_rotation: bool = False) -> np.ndarray:
+    """
+    Find the keyframes of a sampled animation channel that are needed to reconstruct it within given tolerance.
+
+    :param times: key times, of shape (n,).
+    :param values: key values, of shape (n, components). Rotations are (x, y, z, w) quaternions.
+    :param interpolation: glTF interpolation of the channel, 'LINEAR' or 'STEP'.
+    :param tolerance: maximum distance between the original and the reconstructed values
+                      (an angle in radians for rotations).
+    :param is_rotation: whether values are quaternions, interpolated with slerp.
+    :return: sorted indices of the keyframes to keep, always including the first and last ones.
+    """
+    count = len(times)
+    if count <= 2:
+        return np.arange(count)
+
+    values = np.asarray(values, dtype=np.float64).reshape(count, -1)
+
+    if interpolation == 'STEP':
+        # A key is only needed if it changes the value held since the last kept key.
+        # Compare against that value, not the previous sample, or slow drifts would lose all their keys.
+        # Samples are scanned in growing windows, so that both long holds and frequent changes stay cheap.
+        keep = np.zeros(count, dtype=bool)
+        keep[0] = keep[-1] = True
+        held = 0
+        start = 1
+        window = 16
+        while start < count:
+            end = min(start + window, count)
+            distances = __distances(values[start:end], values[held][np.newaxis], is_rotation)
+            changes = np.flatnonzero(distances > tolerance)
+            if len(changes):
+                held = start + int(changes[0])
+                keep[held] = True
+                start = held + 1
+                window = 16
+            else:
+                start = end
+                window *= 2
+        return np.flatnonzero(keep)
+
+    # Ramer-Douglas-Peucker: split each segment at its worst reconstructed key, until all are within tolerance.
+    times = np.asarray(times, dtype=np.float64)
+    keep = np.zeros(count, dtype=bool)
+    keep[0] = keep[-1] = True
+    segments = [(0, count - 1)]
+    while segments:
+        first, last = segments.pop()
+        if last - first < 2:
+            continue
+        inner = slice(first + 1, last)
+        duration = times[last] - times[first]
+        if duration > 0.0:
+            factors = (times[inner] - times[first]) / duration
+        else:
+            factors = np.zeros(last - first - 1)
+        interpolated = __interpolate(values[first], values[last], factors, is_rotation)
+        errors = __distances(interpolated, values[inner], is_rotation)
+        worst = int(np.argmax(errors))
+        if errors[worst] > tolerance:
+            split = first + 1 + worst
+            keep[split] = True
+            segments.append((first, split))
+            segments.append((split, last))
+
+    return np.flatnonzero(keep)
+
+
+def __interpolate(start, end, factors, is_rotation):
+    factors = factors[:, np.newaxis]
+    if not is_rotation:
+        return start + (end - start) * factors
+
+    # Slerp, taking the shortest path as glTF viewers do.
+    dot = np.dot(start, end)
+    if dot < 0.0:
+        end = -end
+        dot = -dot
+    if dot > 0.9995:
+        # Quaternions are very close, linear interpolation is accurate enough (and stable).
+        result = start + (end - start) * factors
+    else:
+        theta = np.arccos(dot)
+        result = (np.sin((1.0 - factors) * theta) * start + np.sin(factors * theta) * end) / np.sin(theta)
+    return result / np.linalg.norm(result, axis=1, keepdims=True)
+
+
+def __distances(a, b, is_rotation):
+    if not is_rotation:
+        return np.linalg.norm(a - b, axis=1)
+    # Angle of the rotation between both orientations.
+    dots = np.abs(np.sum(a * b, axis=1))
+    norms = np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1)
+    return 2.0 * np.arccos(np.clip(dots / norms, 0.0, 1.0))
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+
+# Copyright 2018-2021 The glTF-Blender-IO authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# XXX Not really nice, but that hack is needed to allow execution of that test
+#     from both automated CTest and by directly running the file manually.
+if __name__ == '__main__':
+    from gltf2_io_keyframe_reduction import reduce_keyframes
+else:
+    from .gltf2_io_keyframe_reduction import reduce_keyframes
+import math
+import unittest
+
+import numpy as np
+
+
+def axis_angle_quaternions(axis, angles):
+    """(x, y, z, w) quaternions of rotations around given axis."""
+    axis = np.asarray(axis, dtype=np.float64)
+    axis = axis / np.linalg.norm(axis)
+    angles = np.asarray(angles, dtype=np.float64)[:, np.newaxis]
+    return np.hstack((axis * np.sin(angles / 2.0), np.cos(angles / 2.0)))
+
+
+def rotation_angles(a, b):
+    """Angles of the rotations between two arrays of quaternions."""
+    dots = np.abs(np.sum(a * b, axis=1)) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+    return 2.0 * np.arccos(np.clip(dots, 0.0, 1.0))
+
+
+def slerp(start, end, factor):
+    """Reference slerp of a single pair of quaternions, taking the shortest path."""
+    dot = float(np.dot(start, end))
+    if dot < 0.0:
+        end, dot = -end, -dot
+    if dot > 1.0 - 1e-9:
+        result = start + (end - start) * factor
+    else:
+        theta = math.acos(dot)
+        result = (math.sin((1.0 - factor) * theta) * start + math.sin(factor * theta) * end) / math.sin(theta)
+    return result / np.linalg.norm(result)
+
+
+def reconstruct(times, values, indices, interpolation, is_rotation):
+    """Values of the animation at all given times, from its keyframes at given indices only."""
+    key_times, key_values = times[indices], values[indices]
+    if interpolation == 'STEP':
+        return key_values[np.searchsorted(key_times, times, side='right') - 1]
+    if not is_rotation:
+        return np.stack([np.interp(times, key_times, channel) for channel in key_values.T], axis=1)
+    result = []
+    for time in times:
+        i = min(max(np.searchsorted(key_times, time, side='right') - 1, 0), len(key_times) - 2)
+        factor = (time - key_times[i]) / (key_times[i + 1] - key_times[i])
+        result.append(slerp(key_values[i], key_values[i + 1], factor))
+    return np.array(result)
+
+
+class ReduceKeyframesTest(unittest.TestCase):
+    def assertReconstructed(self, times, values, interpolation, tolerance, is_rotation=False):
+        """Check the kept keyframes reproduce the animation within tolerance, return their indices."""
+        times = np.asarray(times, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64).reshape(len(times), -1)
+        indices = reduce_keyframes(times, values, interpolation, tolerance, is_rotation)
+        self.assertEqual(indices.tolist(), sorted(set(indices.tolist())))
+        self.assertEqual(indices[0], 0)
+        self.assertEqual(indices[-1], len(times) - 1)
+        result = reconstruct(times, values, indices, interpolation, is_rotation)
+        if is_rotation:
+            errors = rotation_angles(result, values)
+        else:
+            errors = np.linalg.norm(result - values, axis=1)
+        # A little slack for the float rounding of interpolation.
+        self.assertLessEqual(errors.max(), tolerance * (1.0 + 1e-6) + 1e-12)
+        return indices
+
+    def test_few_keys(self):
+        for count in range(3):
+            self.assertEqual(reduce_keyframes(np.arange(count), np.zeros((count, 3)), 'LINEAR', 1e-3).tolist(),
+                             list(range(count)))
+
+    def test_step_constant(self):
+        indices = self.assertReconstructed(range(30), np.ones((30, 3)), 'STEP', 1e-4)
+        self.assertEqual(indices.tolist(), [0, 29])
+
+    def test_step_changes(self):
+        values = [[0.0]] * 10 + [[1.0]] * 10 + [[0.0]] * 10
+        indices = self.assertReconstructed(range(30), values, 'STEP', 1e-4)
+        self.assertEqual(indices.tolist(), [0, 10, 20, 29])
+
+    def test_step_drift(self):
+        # Each step is below tolerance, but the held value must not drift away from the samples.
+        values = np.linspace(0.0, 1e-2, 101)[:, np.newaxis]
+        indices = self.assertReconstructed(range(101), values, 'STEP', 1e-3)
+        self.assertGreater(len(indices), 9)
+
+    def test_step_rotation_drift(self):
+        quaternions = axis_angle_quaternions((0.0, 0.0, 1.0), np.linspace(0.0, 1e-3, 21))
+        indices = self.assertReconstructed(range(21), quaternions, 'STEP', 1e-4, is_rotation=True)
+        self.assertGreater(len(indices), 2)
+
+    def test_step_long(self):
+        # Both frequent changes and long holds.
+        values = np.concatenate((np.arange(500.0), np.full(1000, 500.0), np.arange(500.0, 1000.0, 0.25)))
+        self.assertReconstructed(np.arange(len(values)), values[:, np.newaxis], 'STEP', 0.3)
+
+    def test_linear_straight(self):
+        times = np.linspace(0.0, 2.0, 50)
+        values = np.stack((times * 3.0, -times, np.full(50, 5.0)), axis=1)
+        indices = self.assertReconstructed(times, values, 'LINEAR', 1e-6)
+        self.assertEqual(indices.tolist(), [0, 49])
+
+    def test_linear_polyline(self):
+        # Corners of a piecewise linear curve must be kept, and nothing else.
+        times = np.arange(31.0)
+        values = np.interp(times, (0.0, 10.0, 20.0, 30.0), (0.0, 4.0, -2.0, -2.0))[:, np.newaxis]
+        indices = self.assertReconstructed(times, values, 'LINEAR', 1e-6)
+        self.assertEqual(indices.tolist(), [0, 10, 20, 30])
+
+    def test_linear_sine(self):
+        times = np.linspace(0.0, 4.0, 200)
+        values = np.stack((np.sin(times * 3.0), np.cos(times) * 10.0), axis=1)
+        counts = [len(self.assertReconstructed(times, values, 'LINEAR', tolerance))
+                  for tolerance in (1e-1, 1e-2, 1e-4)]
+        self.assertLess(counts[0], counts[1])
+        self.assertLess(counts[1], len(times) // 2)
+
+    def test_linear_uneven_times(self):
+        times = np.cumsum(np.random.RandomState(42).uniform(0.01, 0.2, 100))
+        values = np.stack((np.sin(times), times ** 2), axis=1)
+        self.assertReconstructed(times, values, 'LINEAR', 1e-3)
+
+    def test_slerp_constant_speed(self):
+        # Samples of a single slerp are reproduced by its two ends.
+        quaternions = axis_angle_quaternions((1.0, 2.0, 0.5), np.linspace(0.0, 2.5, 40))
+        indices = self.assertReconstructed(range(40), quaternions, 'LINEAR', 1e-5, is_rotation=True)
+        self.assertEqual(indices.tolist(), [0, 39])
+
+    def test_slerp_sign_flips(self):
+        # q and -q are the same rotation, sampled quaternions may switch hemisphere.
+        quaternions = axis_angle_quaternions((0.0, 1.0, 0.0), np.linspace(0.0, 1.0, 20))
+        quaternions[1::2] *= -1.0
+        indices = self.assertReconstructed(range(20), quaternions, 'LINEAR', 1e-5, is_rotation=True)
+        self.assertEqual(indices.tolist(), [0, 19])
+
+    def test_slerp_varying(self):
+        angles = np.sin(np.linspace(0.0, 6.0, 120)) * 2.0
+        quaternions = axis_angle_quaternions((0.3, 0.0, 1.0), angles)
+        for tolerance in (1e-2, 1e-4):
+            indices = self.assertReconstructed(range(120), quaternions, 'LINEAR', tolerance, is_rotation=True)
+            self.assertLess(len(indices), 120)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -43,7 +43,7 @@ class BinaryData():
 
     @staticmethod
     def get_buffer_view(gltf, buffer_view_idx):
-        """Get binary data for buffer view."""
+        """Get binary data for buffer view, as a memoryview (no data is copied)."""
         buffer_view = gltf.data.buffer_views[buffer_view_idx]
 
         if buffer_view.buffer in gltf.buffers.keys():
@@ -61,11 +61,18 @@ class BinaryData():
 
     @staticmethod
     def get_data_from_accessor(gltf, accessor_idx, cache=False):
-        """Get data from accessor."""
+        """
+        Get data from accessor, as a 2D numpy array (count x num_components).
+
+        Unlike decode_accessor(), floating point data is returned in double precision, so that
+        computations made on its items give the same results as with python floats.
+        """
         if accessor_idx in gltf.accessor_cache:
             return gltf.accessor_cache[accessor_idx]
 
-        data = BinaryData.decode_accessor(gltf, accessor_idx).tolist()
+        data = BinaryData.decode_accessor(gltf, accessor_idx)
+        if data.dtype.kind == 'f':
+            data = data.astype(np.float64)
 
         if cache:
             gltf.accessor_cache[accessor_idx] = data
@@ -76,13 +83,13 @@ class BinaryData():
     def decode_accessor(gltf, accessor_idx, cache=False):
         """Decodes accessor to 2D numpy array (count x num_components)."""
         if accessor_idx in gltf.decode_accessor_cache:
-            return gltf.accessor_cache[accessor_idx]
+            return gltf.decode_accessor_cache[accessor_idx]
 
         accessor = gltf.data.accessors[accessor_idx]
         array = BinaryData.decode_accessor_obj(gltf, accessor)
 
         if cache:
-            gltf.accessor_cache[accessor_idx] = array
+            gltf.decode_accessor_cache[accessor_idx] = array
             # Prevent accidentally modifying cached arrays
             array.flags.writeable = False
 
@@ -16,6 +16,7 @@ from ..com.gltf2_io import gltf_from_dict
 from ..com.gltf2_io_debug import Log
 import logging
 import json
+import mmap
 import struct
 import base64
 from os.path import dirname, join, isfile
@@ -139,8 +140,7 @@ class glTFImporter():
         if not isfile(self.filename):
             raise ImportError("Please select a file")
 
-        with open(self.filename, 'rb') as f:
-            content = memoryview(f.read())
+        content = glTFImporter.map_file(self.filename)
 
         if content[:4] == b'glTF':
             gltf, self.glb_buffer = self.load_glb(content)
@@ -157,6 +157,21 @@ class glTFImporter():
             traceback.print_exc()
             raise ImportError("Couldn't parse glTF. Check that the file is valid")
 
+    @staticmethod
+    def map_file(path):
+        """
+        Memory-map a file, and return a read-only memoryview of its content.
+
+        Slicing the view (e.g. to get buffer views) does not copy any data, and pages are only read when
+        actually accessed. The file stays mapped as long as any view of it is alive.
+        """
+        with open(path, 'rb') as f:
+            try:
+                return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            except (ValueError, OSError):
+                # Empty files (or some special file systems) cannot be mapped.
+                return memoryview(f.read())
+
     def load_buffer(self, buffer_idx):
         """Load buffer."""
         buffer = self.data.buffers[buffer_idx]
@@ -184,8 +199,7 @@ class glTFImporter():
 
         path = join(dirname(self.filename), unquote(uri))
         try:
-            with open(path, 'rb') as f_:
-                return memoryview(f_.read())
+            return glTFImporter.map_file(path)
         except Exception:
             self.log.error("Couldn't read file: " + path)
             return None
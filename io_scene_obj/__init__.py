@@ -21,7 +21,7 @@
 bl_info = {
     "name": "Wavefront OBJ format",
     "author": "Campbell Barton, Bastien Montagne",
-    "version": (3, 8, 1),
+    "version": (3, 8, 5),
     "blender": (2, 81, 6),
     "location": "File > Import-Export",
     "description": "Import-Export OBJ, Import OBJ mesh, UV's, materials and textures",
@@ -103,6 +103,13 @@ class ImportOBJ(bpy.types.Operator, ImportHelper):
         default=True,
     )
 
+    use_multiprocessing: BoolProperty(
+        name="Parallel Parsing",
+        description="Parse large files in several processes, one per CPU core "
+        "(not used for files requiring line by line parsing)",
+        default=False,
+    )
+
     split_mode: EnumProperty(
         name="Split",
         items=(
@@ -178,6 +185,7 @@ class OBJ_PT_import_include(bpy.types.Panel):
         layout.prop(operator, 'use_image_search')
         layout.prop(operator, 'use_smooth_groups')
         layout.prop(operator, 'use_edges')
+        layout.prop(operator, 'use_multiprocessing')
 
 
 class OBJ_PT_import_transform(bpy.types.Panel):
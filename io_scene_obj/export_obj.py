@@ -21,6 +21,7 @@
 import os
 
 import bpy
+import numpy as np
 from mathutils import Matrix, Vector, Color
 from bpy_extras import io_utils, node_shader_utils
 
@@ -30,6 +31,12 @@ from bpy_extras.wm_utils.progress_report import (
 )
 
 
+# Size of the buffer of written files.
+WRITE_BUFFER_SIZE = 4 * 1024 * 1024
+# Number of lines formatted at once when writing arrays.
+WRITE_BLOCK_LINES = 64 * 1024
+
+
 def name_compat(name):
     if name is None:
         return 'None'
@@ -46,6 +53,48 @@ def mesh_triangulate(me):
     bm.free()
 
 
+def veckeys(vectors):
+    """
+    Array version of rounding vectors components to 4 digits, to use as keys for merging them.
+    Values being single precision floats, their product by 10000 is exact in double precision,
+    so this gives the same results as round(value, 4).
+    """
+    return np.rint(vectors.astype(np.float64) * 10000.0) + 0.0  # Also merges -0.0 and 0.0.
+
+
+def unique_first_use(keys):
+    """
+    Return (indices of the first occurrence of each unique row of keys, in order of first occurrence,
+    and for each row the index of its unique row in that order).
+    """
+    if not len(keys):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    _unique, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    remap = np.empty(len(first), dtype=np.int64)
+    remap[order] = np.arange(len(first))
+    return first[order], remap[inverse.ravel()]
+
+
+def write_lines(fw, line_fmt, values):
+    """Write a line formatted with line_fmt for each row of values (a 2D array)."""
+    for i in range(0, len(values), WRITE_BLOCK_LINES):
+        block = values[i:i + WRITE_BLOCK_LINES]
+        fw((line_fmt * len(block)) % tuple(block.ravel().tolist()))
+
+
+def write_faces(fw, loop_fmt, faces_loop_total, loops_values):
+    """Write a face line for each number of loops in faces_loop_total, each loop formatted with loop_fmt."""
+    loop_start = 0
+    for i in range(0, len(faces_loop_total), WRITE_BLOCK_LINES):
+        block_loop_total = faces_loop_total[i:i + WRITE_BLOCK_LINES].tolist()
+        face_fmts = {n: "f" + loop_fmt * n + "\n" for n in set(block_loop_total)}
+        loop_end = loop_start + sum(block_loop_total)
+        fw("".join(map(face_fmts.__getitem__, block_loop_total)) %
+           tuple(loops_values[loop_start:loop_end].ravel().tolist()))
+        loop_start = loop_end
+
+
 def write_mtl(scene, filepath, path_mode, copy_set, mtl_dict):
     source_dir = os.path.dirname(bpy.data.filepath)
     dest_dir = os.path.dirname(filepath)
@@ -263,13 +312,7 @@ def write_file(filepath, objects, depsgraph, scene,
     if EXPORT_GLOBAL_MATRIX is None:
         EXPORT_GLOBAL_MATRIX = Matrix()
 
-    def veckey3d(v):
-        return round(v.x, 4), round(v.y, 4), round(v.z, 4)
-
-    def veckey2d(v):
-        return round(v[0], 4), round(v[1], 4)
-
-    def findVertexGroupName(face, vWeightMap):
+    def findVertexGroupName(face_vertices, vWeightMap):
         """
         Searches the vertexDict to see what groups is assigned to a given face.
         We use a frequency system in order to sort out the name because a given vertex can
@@ -279,7 +322,7 @@ def write_file(filepath, objects, depsgraph, scene,
         of vertices is the face's group
         """
         weightDict = {}
-        for vert_index in face.vertices:
+        for vert_index in face_vertices:
             vWeights = vWeightMap[vert_index]
             for vGroupName, weight in vWeights:
                 weightDict[vGroupName] = weightDict.get(vGroupName, 0.0) + weight
@@ -290,7 +333,7 @@ def write_file(filepath, objects, depsgraph, scene,
             return '(null)'
 
     with ProgressReportSubstep(progress, 2, "OBJ Export path: %r" % filepath, "OBJ Export Finished") as subprogress1:
-        with open(filepath, "w", encoding="utf8", newline="\n") as f:
+        with open(filepath, "w", encoding="utf8", newline="\n", buffering=WRITE_BUFFER_SIZE) as f:
             fw = f.write
 
             # Write Header
@@ -368,32 +411,30 @@ def write_file(filepath, objects, depsgraph, scene,
                         if EXPORT_UV:
                             faceuv = len(me.uv_layers) > 0
                             if faceuv:
-                                uv_layer = me.uv_layers.active.data[:]
+                                uv_layer = me.uv_layers.active.data
                         else:
                             faceuv = False
 
-                        me_verts = me.vertices[:]
-
-                        # Make our own list so it can be sorted to reduce context switching
-                        face_index_pairs = [(face, index) for index, face in enumerate(me.polygons)]
+                        nbr_verts = len(me.vertices)
+                        nbr_faces = len(me.polygons)
 
                         if EXPORT_EDGES:
                             edges = me.edges
                         else:
                             edges = []
 
-                        if not (len(face_index_pairs) + len(edges) + len(me.vertices)):  # Make sure there is something to write
+                        if not (nbr_faces + len(edges) + nbr_verts):  # Make sure there is something to write
                             # clean up
                             ob_for_convert.to_mesh_clear()
                             continue  # dont bother with this mesh.
 
-                        if EXPORT_NORMALS and face_index_pairs:
+                        if EXPORT_NORMALS and nbr_faces:
                             me.calc_normals_split()
                             # No need to call me.free_normals_split later, as this mesh is deleted anyway!
 
                         loops = me.loops
 
-                        if (EXPORT_SMOOTH_GROUPS or EXPORT_SMOOTH_GROUPS_BITFLAGS) and face_index_pairs:
+                        if (EXPORT_SMOOTH_GROUPS or EXPORT_SMOOTH_GROUPS_BITFLAGS) and nbr_faces:
                             smooth_groups, smooth_groups_tot = me.calc_smooth_groups(use_bitflags=EXPORT_SMOOTH_GROUPS_BITFLAGS)
                             if smooth_groups_tot <= 1:
                                 smooth_groups, smooth_groups_tot = (), 0
@@ -408,28 +449,48 @@ def write_file(filepath, objects, depsgraph, scene,
                             materials = [None]
                             material_names = [name_compat(None)]
 
+                        faces_material_index = np.empty(nbr_faces, dtype=np.int32)
+                        me.polygons.foreach_get("material_index", faces_material_index)
+                        faces_use_smooth = np.empty(nbr_faces, dtype=bool)
+                        me.polygons.foreach_get("use_smooth", faces_use_smooth)
+                        faces_loop_start = np.empty(nbr_faces, dtype=np.int32)
+                        me.polygons.foreach_get("loop_start", faces_loop_start)
+                        faces_loop_total = np.empty(nbr_faces, dtype=np.int32)
+                        me.polygons.foreach_get("loop_total", faces_loop_total)
+                        loops_vertex_index = np.empty(len(loops), dtype=np.int32)
+                        loops.foreach_get("vertex_index", loops_vertex_index)
+
+                        # Smooth value of each face, as compared and written in the file:
+                        # its smooth group if any, else whether it is smooth.
+                        if smooth_groups:
+                            faces_smooth = np.where(faces_use_smooth, np.asarray(smooth_groups, dtype=np.int64), 0)
+                        else:
+                            faces_smooth = faces_use_smooth.astype(np.int64)
+
                         # Sort by Material, then images
                         # so we dont over context switch in the obj file.
                         if EXPORT_KEEP_VERT_ORDER:
-                            pass
+                            faces_order = np.arange(nbr_faces)
                         else:
                             if len(materials) > 1:
-                                if smooth_groups:
-                                    sort_func = lambda a: (a[0].material_index,
-                                                           smooth_groups[a[1]] if a[0].use_smooth else False)
-                                else:
-                                    sort_func = lambda a: (a[0].material_index,
-                                                           a[0].use_smooth)
+                                sort_keys = faces_material_index * (faces_smooth.max(initial=0) + 1) + faces_smooth
                             else:
                                 # no materials
                                 if smooth_groups:
-                                    sort_func = lambda a: smooth_groups[a[1] if a[0].use_smooth else False]
+                                    # Non-smooth faces are sorted with the smooth group of the first face.
+                                    sort_keys = np.where(faces_use_smooth, faces_smooth, smooth_groups[0])
                                 else:
-                                    sort_func = lambda a: a[0].use_smooth
+                                    sort_keys = faces_smooth
+                            faces_order = np.argsort(sort_keys, kind='stable')
 
-                            face_index_pairs.sort(key=sort_func)
+                            del sort_keys
 
-                            del sort_func
+                        # Loops in the order they are written, i.e. following sorted faces.
+                        faces_loop_total = faces_loop_total[faces_order]
+                        faces_loop_offset = np.cumsum(faces_loop_total) - faces_loop_total
+                        loops_order = (np.repeat(faces_loop_start[faces_order] - faces_loop_offset, faces_loop_total) +
+                                       np.arange(faces_loop_total.sum()))
+                        loops_vertex_index = loops_vertex_index[loops_order]
 
                         # Set the default mat to no material and no image.
                         contextMat = 0, 0  # Can never be this, so we will label a new material the first chance we get.
@@ -451,80 +512,88 @@ def write_file(filepath, objects, depsgraph, scene,
                         subprogress2.step()
 
                         # Vert
-                        for v in me_verts:
-                            fw('v %.6f %.6f %.6f\n' % v.co[:])
+                        verts_co = np.empty(nbr_verts * 3, dtype=np.float32)
+                        me.vertices.foreach_get("co", verts_co)
+                        write_lines(fw, 'v %.6f %.6f %.6f\n', verts_co.reshape(-1, 3))
+                        del verts_co
 
                         subprogress2.step()
 
                         # UV
                         if faceuv:
-                            # in case removing some of these dont get defined.
-                            uv = f_index = uv_index = uv_key = uv_val = uv_ls = None
-
-                            uv_face_mapping = [None] * len(face_index_pairs)
-
-                            uv_dict = {}
-                            uv_get = uv_dict.get
-                            for f, f_index in face_index_pairs:
-                                uv_ls = uv_face_mapping[f_index] = []
-                                for uv_index, l_index in enumerate(f.loop_indices):
-                                    uv = uv_layer[l_index].uv
-                                    # include the vertex index in the key so we don't share UV's between vertices,
-                                    # allowed by the OBJ spec but can cause issues for other importers, see: T47010.
-
-                                    # this works too, shared UV's for all verts
-                                    #~ uv_key = veckey2d(uv)
-                                    uv_key = loops[l_index].vertex_index, veckey2d(uv)
-
-                                    uv_val = uv_get(uv_key)
-                                    if uv_val is None:
-                                        uv_val = uv_dict[uv_key] = uv_unique_count
-                                        fw('vt %.6f %.6f\n' % uv[:])
-                                        uv_unique_count += 1
-                                    uv_ls.append(uv_val)
-
-                            del uv_dict, uv, f_index, uv_index, uv_ls, uv_get, uv_key, uv_val
-                            # Only need uv_unique_count and uv_face_mapping
+                            loops_uv = np.empty(len(loops) * 2, dtype=np.float32)
+                            uv_layer.foreach_get("uv", loops_uv)
+                            loops_uv = loops_uv.reshape(-1, 2)[loops_order]
+                            # include the vertex index in the key so we don't share UV's between vertices,
+                            # allowed by the OBJ spec but can cause issues for other importers, see: T47010.
+                            uv_keys = np.column_stack((loops_vertex_index, veckeys(loops_uv)))
+                            uv_first, loops_uv_index = unique_first_use(uv_keys)
+                            write_lines(fw, 'vt %.6f %.6f\n', loops_uv[uv_first])
+                            uv_unique_count = len(uv_first)
+                            del loops_uv, uv_first
 
                         subprogress2.step()
 
                         # NORMAL, Smooth/Non smoothed.
                         if EXPORT_NORMALS:
-                            no_key = no_val = None
-                            normals_to_idx = {}
-                            no_get = normals_to_idx.get
-                            loops_to_normals = [0] * len(loops)
-                            for f, f_index in face_index_pairs:
-                                for l_idx in f.loop_indices:
-                                    no_key = veckey3d(loops[l_idx].normal)
-                                    no_val = no_get(no_key)
-                                    if no_val is None:
-                                        no_val = normals_to_idx[no_key] = no_unique_count
-                                        fw('vn %.4f %.4f %.4f\n' % no_key)
-                                        no_unique_count += 1
-                                    loops_to_normals[l_idx] = no_val
-                            del normals_to_idx, no_get, no_key, no_val
-                        else:
-                            loops_to_normals = []
+                            loops_no = np.empty(len(loops) * 3, dtype=np.float32)
+                            loops.foreach_get("normal", loops_no)
+                            loops_no = loops_no.reshape(-1, 3)[loops_order]
+                            no_first, loops_no_index = unique_first_use(veckeys(loops_no))
+                            write_lines(fw, 'vn %.4f %.4f %.4f\n', loops_no[no_first])
+                            no_unique_count = len(no_first)
+                            del loops_no, no_first
 
                         subprogress2.step()
 
                         # XXX
+                        vgroup_of_faces = None
                         if EXPORT_POLYGROUPS:
                             # Retrieve the list of vertex groups
                             vertGroupNames = ob.vertex_groups.keys()
                             if vertGroupNames:
                                 currentVGroup = ''
                                 # Create a dictionary keyed by face id and listing, for each vertex, the vertex groups it belongs to
-                                vgroupsMap = [[] for _i in range(len(me_verts))]
-                                for v_idx, v_ls in enumerate(vgroupsMap):
-                                    v_ls[:] = [(vertGroupNames[g.group], g.weight) for g in me_verts[v_idx].groups]
-
-                        for f, f_index in face_index_pairs:
-                            f_smooth = f.use_smooth
-                            if f_smooth and smooth_groups:
-                                f_smooth = smooth_groups[f_index]
-                            f_mat = min(f.material_index, len(materials) - 1)
+                                vgroupsMap = [[(vertGroupNames[g.group], g.weight) for g in v.groups]
+                                              for v in me.vertices]
+                                # find what vertext group each face belongs to
+                                faces_vertices = np.split(loops_vertex_index, np.cumsum(faces_loop_total)[:-1])
+                                vgroup_of_faces = [findVertexGroupName(face_vertices, vgroupsMap)
+                                                   for face_vertices in faces_vertices]
+                                del vgroupsMap, faces_vertices
+
+                        # Indices written for each loop (vertex, then uv and normal if any) and their format.
+                        loops_indices = [totverts + loops_vertex_index.astype(np.int64)]
+                        if faceuv:
+                            loops_indices.append(totuvco + loops_uv_index)
+                        if EXPORT_NORMALS:
+                            loops_indices.append(totno + loops_no_index)
+                        loops_indices = np.column_stack(loops_indices)
+                        if faceuv:
+                            loop_fmt = " %d/%d/%d" if EXPORT_NORMALS else " %d/%d"
+                        else:
+                            loop_fmt = " %d//%d" if EXPORT_NORMALS else " %d"
+
+                        # Faces are written by blocks sharing the same material, smooth group and vertex group,
+                        # only the first face of each block may switch context.
+                        name_ids = {}
+                        material_name_ids = np.array([name_ids.setdefault(name, len(name_ids))
+                                                      for name in material_names])
+                        faces_material = np.minimum(faces_material_index[faces_order], len(materials) - 1)
+                        faces_smooth = faces_smooth[faces_order]
+                        faces_switch = np.ones(nbr_faces, dtype=bool)
+                        faces_name_id = material_name_ids[faces_material]
+                        faces_switch[1:] = (faces_name_id[1:] != faces_name_id[:-1]) | (faces_smooth[1:] != faces_smooth[:-1])
+                        if vgroup_of_faces is not None:
+                            faces_switch[1:] |= np.array([a != b for a, b in zip(vgroup_of_faces[1:], vgroup_of_faces[:-1])],
+                                                         dtype=bool)
+                        blocks_start = np.flatnonzero(faces_switch)
+                        blocks_end = np.append(blocks_start[1:], nbr_faces)
+                        faces_loop_end = np.cumsum(faces_loop_total)
+
+                        for block_start, block_end in zip(blocks_start.tolist(), blocks_end.tolist()):
+                            f_smooth = faces_smooth[block_start].item()
+                            f_mat = faces_material[block_start].item()
 
                             # MAKE KEY
                             key = material_names[f_mat], None  # No image, use None instead.
@@ -532,8 +601,7 @@ def write_file(filepath, objects, depsgraph, scene,
                             # Write the vertex group
                             if EXPORT_POLYGROUPS:
                                 if vertGroupNames:
-                                    # find what vertext group the face belongs to
-                                    vgroup_of_face = findVertexGroupName(f, vgroupsMap)
+                                    vgroup_of_face = vgroup_of_faces[block_start]
                                     if vgroup_of_face != currentVGroup:
                                         currentVGroup = vgroup_of_face
                                         fw('g %s\n' % vgroup_of_face)
@@ -586,7 +654,6 @@ def write_file(filepath, objects, depsgraph, scene,
                             if f_smooth != contextSmooth:
                                 if f_smooth:  # on now off
                                     if smooth_groups:
-                                        f_smooth = smooth_groups[f_index]
                                         fw('s %d\n' % f_smooth)
                                     else:
                                         fw('s 1\n')
@@ -594,45 +661,23 @@ def write_file(filepath, objects, depsgraph, scene,
                                     fw('s off\n')
                                 contextSmooth = f_smooth
 
-                            f_v = [(vi, me_verts[v_idx], l_idx)
-                                   for vi, (v_idx, l_idx) in enumerate(zip(f.vertices, f.loop_indices))]
-
-                            fw('f')
-                            if faceuv:
-                                if EXPORT_NORMALS:
-                                    for vi, v, li in f_v:
-                                        fw(" %d/%d/%d" % (totverts + v.index,
-                                                          totuvco + uv_face_mapping[f_index][vi],
-                                                          totno + loops_to_normals[li],
-                                                          ))  # vert, uv, normal
-                                else:  # No Normals
-                                    for vi, v, li in f_v:
-                                        fw(" %d/%d" % (totverts + v.index,
-                                                       totuvco + uv_face_mapping[f_index][vi],
-                                                       ))  # vert, uv
-
-                                face_vert_index += len(f_v)
-
-                            else:  # No UV's
-                                if EXPORT_NORMALS:
-                                    for vi, v, li in f_v:
-                                        fw(" %d//%d" % (totverts + v.index, totno + loops_to_normals[li]))
-                                else:  # No Normals
-                                    for vi, v, li in f_v:
-                                        fw(" %d" % (totverts + v.index))
-
-                            fw('\n')
+                            loop_start = faces_loop_end[block_start] - faces_loop_total[block_start]
+                            write_faces(fw, loop_fmt, faces_loop_total[block_start:block_end],
+                                        loops_indices[loop_start:faces_loop_end[block_end - 1]])
 
                         subprogress2.step()
 
                         # Write edges.
-                        if EXPORT_EDGES:
-                            for ed in edges:
-                                if ed.is_loose:
-                                    fw('l %d %d\n' % (totverts + ed.vertices[0], totverts + ed.vertices[1]))
+                        if EXPORT_EDGES and len(edges):
+                            edges_is_loose = np.empty(len(edges), dtype=bool)
+                            edges.foreach_get("is_loose", edges_is_loose)
+                            edges_vertices = np.empty(len(edges) * 2, dtype=np.int32)
+                            edges.foreach_get("vertices", edges_vertices)
+                            edges_vertices = edges_vertices.reshape(-1, 2)[edges_is_loose].astype(np.int64)
+                            write_lines(fw, 'l %d %d\n', totverts + edges_vertices)
 
                         # Make the indices global rather then per mesh
-                        totverts += len(me_verts)
+                        totverts += nbr_verts
                         totuvco += uv_unique_count
                         totno += no_unique_count
 
@@ -36,11 +36,14 @@ import os
 import time
 import bpy
 import mathutils
+import numpy as np
 
 from bpy_extras.io_utils import unpack_list
 from bpy_extras.image_utils import load_image
 from bpy_extras.wm_utils.progress_report import ProgressReport
 
+from . import parse_obj
+
 
 def line_value(line_split):
     """
@@ -486,6 +489,16 @@ def face_is_edge(face):
     return len(face_vert_nor_indices) == 1 or len(face_vert_loc_indices) == 2
 
 
+def key_to_name(key, filename):
+    # if the key is a tuple, join it to make a string
+    if not key:
+        return filename  # assume its a string. make sure this is true if the splitting code is changed
+    elif isinstance(key, bytes):
+        return key.decode('utf-8', 'replace')
+    else:
+        return "_".join(k.decode('utf-8', 'replace') for k in key)
+
+
 def split_mesh(verts_loc, faces, unique_materials, filepath, SPLIT_OB_OR_GROUP):
     """
     Takes vert_loc and faces, and separates into multiple sets of
@@ -500,15 +513,6 @@ def split_mesh(verts_loc, faces, unique_materials, filepath, SPLIT_OB_OR_GROUP):
         # use the filename for the object name since we aren't chopping up the mesh.
         return [(verts_loc, faces, unique_materials, filename, use_verts_nor, use_verts_tex)]
 
-    def key_to_name(key):
-        # if the key is a tuple, join it to make a string
-        if not key:
-            return filename  # assume its a string. make sure this is true if the splitting code is changed
-        elif isinstance(key, bytes):
-            return key.decode('utf-8', 'replace')
-        else:
-            return "_".join(k.decode('utf-8', 'replace') for k in key)
-
     # Return a key that makes the faces unique.
     face_split_dict = {}
 
@@ -554,7 +558,8 @@ def split_mesh(verts_loc, faces, unique_materials, filepath, SPLIT_OB_OR_GROUP):
         faces_split.append(face)
 
     # remove one of the items and reorder
-    return [(verts_split, faces_split, unique_materials_split, key_to_name(key), bool(use_vnor), bool(use_vtex))
+    return [(verts_split, faces_split, unique_materials_split, key_to_name(key, filename),
+             bool(use_vnor), bool(use_vtex))
             for key, (verts_split, faces_split, unique_materials_split, _, use_vnor, use_vtex)
             in face_split_dict.items()]
 
@@ -792,6 +797,138 @@ def create_mesh(new_objects,
         group.add(group_indices, 1.0, 'REPLACE')
 
 
+def first_use_order(indices):
+    """
+    Return (unique items of indices in order of first use, indices remapped to positions in that list).
+    """
+    items, first_index, inverse = np.unique(indices, return_index=True, return_inverse=True)
+    order = np.argsort(first_index, kind='stable')
+    remap = np.empty(len(items), dtype=np.int64)
+    remap[order] = np.arange(len(items))
+    return items[order], remap[inverse.ravel()]
+
+
+def split_parsed(parsed, unique_materials, filepath, SPLIT_OB_OR_GROUP):
+    """
+    Array version of split_mesh(), for data from parse_obj.
+    Yields (verts_loc, face_counts, loops_loc, loops_nor, loops_tex, face_materials, face_smooth_groups,
+    materials, dataname) for each mesh to create.
+    """
+    filename = os.path.splitext((os.path.basename(filepath)))[0]
+    materials_all = list(unique_materials.values())
+    face_counts = parsed.face_counts
+
+    if not SPLIT_OB_OR_GROUP or not len(face_counts):
+        yield (parsed.verts_loc, face_counts, parsed.loops_loc, parsed.loops_nor, parsed.loops_tex,
+               parsed.face_materials, parsed.face_smooth_groups, materials_all, filename)
+        return
+
+    # Faces of each object, objects being ordered by their first face, and faces keeping their order.
+    keys, face_splits = first_use_order(parsed.face_object_keys)
+    faces_order = np.argsort(face_splits, kind='stable')
+    loops_order = np.argsort(np.repeat(face_splits, face_counts), kind='stable')
+    split_faces = np.bincount(face_splits, minlength=len(keys))
+    split_loops = np.bincount(face_splits, weights=face_counts, minlength=len(keys)).astype(np.int64)
+
+    face_start = loop_start = 0
+    for key, nbr_faces, nbr_loops in zip(keys, split_faces, split_loops):
+        faces_split = faces_order[face_start:face_start + nbr_faces]
+        loops_split = loops_order[loop_start:loop_start + nbr_loops]
+        face_start += nbr_faces
+        loop_start += nbr_loops
+
+        verts_split, loops_loc = first_use_order(parsed.loops_loc[loops_split])
+        materials_split, face_materials = first_use_order(parsed.face_materials[faces_split])
+
+        yield (parsed.verts_loc[verts_split], face_counts[faces_split], loops_loc,
+               parsed.loops_nor[loops_split], parsed.loops_tex[loops_split],
+               face_materials, parsed.face_smooth_groups[faces_split],
+               [materials_all[i] for i in materials_split], key_to_name(parsed.object_keys[key], filename))
+
+
+def create_mesh_arrays(new_objects,
+                       verts_loc,
+                       verts_nor,
+                       verts_tex,
+                       face_counts,
+                       loops_loc,
+                       loops_nor,
+                       loops_tex,
+                       face_materials,
+                       face_smooth_groups,
+                       materials,
+                       use_smooth_groups,
+                       dataname,
+                       ):
+    """
+    Array version of create_mesh(), for data from parse_obj (no ngons to tessellate, no edges, no vertex groups).
+    """
+    me = bpy.data.meshes.new(dataname)
+
+    for material in materials:
+        me.materials.append(material)
+
+    me.vertices.add(len(verts_loc))
+    me.loops.add(len(loops_loc))
+    me.polygons.add(len(face_counts))
+
+    me.vertices.foreach_set("co", verts_loc.astype(np.float32).ravel())
+    me.loops.foreach_set("vertex_index", loops_loc.astype(np.int32))
+    faces_loop_start = np.cumsum(face_counts) - face_counts
+    me.polygons.foreach_set("loop_start", faces_loop_start.astype(np.int32))
+    me.polygons.foreach_set("loop_total", face_counts.astype(np.int32))
+    me.polygons.foreach_set("material_index", face_materials.astype(np.int32))
+    me.polygons.foreach_set("use_smooth", face_smooth_groups >= 0)
+
+    if len(verts_nor) and me.loops:
+        # Note: we store 'temp' normals in loops, since validate() may alter final mesh,
+        #       we can only set custom lnors *after* calling it.
+        me.create_normals_split()
+        me.loops.foreach_set("normal", verts_nor[loops_nor].astype(np.float32).ravel())
+
+    if len(verts_tex) and me.polygons:
+        me.uv_layers.new(do_init=False)
+        me.uv_layers[0].data.foreach_set("uv", verts_tex[loops_tex].astype(np.float32).ravel())
+
+    me.validate(clean_customdata=False)  # *Very* important to not remove lnors here!
+    me.update(calc_edges=False, calc_edges_loose=False)
+
+    if use_smooth_groups and len(face_counts):
+        # Edges used only once by the faces of a smooth group are on its boundary, hence sharp.
+        loops_next = np.arange(1, len(loops_loc) + 1)
+        loops_next[faces_loop_start + face_counts - 1] = faces_loop_start
+        edge_keys = np.sort(np.stack((loops_loc, loops_loc[loops_next]), axis=1), axis=1)
+        edge_keys = edge_keys[:, 0] * len(verts_loc) + edge_keys[:, 1]
+        loops_smooth_group = np.repeat(face_smooth_groups, face_counts)
+        smooth = loops_smooth_group >= 0
+        group_edge_keys = np.stack((loops_smooth_group[smooth], edge_keys[smooth]), axis=1)
+        group_edge_keys, users = np.unique(group_edge_keys, axis=0, return_counts=True)
+        sharp_edges = group_edge_keys[users == 1, 1]
+
+        if len(sharp_edges):
+            # XXX If validate changes the geometry, this is likely to be broken...
+            edges = np.empty(len(me.edges) * 2, dtype=np.int32)
+            me.edges.foreach_get("vertices", edges)
+            edges = np.sort(edges.reshape(-1, 2), axis=1).astype(np.int64)
+            use_edge_sharp = np.empty(len(me.edges), dtype=bool)
+            me.edges.foreach_get("use_edge_sharp", use_edge_sharp)
+            use_edge_sharp |= np.isin(edges[:, 0] * len(verts_loc) + edges[:, 1], sharp_edges)
+            me.edges.foreach_set("use_edge_sharp", use_edge_sharp)
+
+    if len(verts_nor):
+        clnors = np.empty(len(me.loops) * 3, dtype=np.float32)
+        me.loops.foreach_get("normal", clnors)
+
+        if not use_smooth_groups:
+            me.polygons.foreach_set("use_smooth", np.ones(len(me.polygons), dtype=bool))
+
+        me.normals_split_custom_set(clnors.reshape(-1, 3))
+        me.use_auto_smooth = True
+
+    ob = bpy.data.objects.new(me.name, me)
+    new_objects.append(ob)
+
+
 def create_nurbs(context_nurbs, vert_loc, new_objects):
     """
     Add nurbs object to blender, only support one type at the moment
@@ -902,6 +1039,87 @@ def any_number_as_int(svalue):
     return int(float(svalue))
 
 
+def link_new_objects(context, new_objects, global_matrix, global_clamp_size):
+    """Link the imported objects to the scene, and scale them down if needed."""
+    view_layer = context.view_layer
+    collection = view_layer.active_layer_collection.collection
+
+    # Create new obj
+    for obj in new_objects:
+        collection.objects.link(obj)
+        obj.select_set(True)
+
+        # we could apply this anywhere before scaling.
+        obj.matrix_world = global_matrix
+
+    view_layer.update()
+
+    axis_min = [1000000000] * 3
+    axis_max = [-1000000000] * 3
+
+    if global_clamp_size:
+        # Get all object bounds
+        for ob in new_objects:
+            for v in ob.bound_box:
+                for axis, value in enumerate(v):
+                    if axis_min[axis] > value:
+                        axis_min[axis] = value
+                    if axis_max[axis] < value:
+                        axis_max[axis] = value
+
+        # Scale objects
+        max_axis = max(axis_max[0] - axis_min[0], axis_max[1] - axis_min[1], axis_max[2] - axis_min[2])
+        scale = 1.0
+
+        while global_clamp_size < max_axis * scale:
+            scale = scale / 10.0
+
+        for obj in new_objects:
+            obj.scale = scale, scale, scale
+
+
+def load_parsed(progress, parsed, filepath, relpath, use_image_search, SPLIT_OB_OR_GROUP):
+    """Create materials and meshes from data parsed in bulk by parse_obj, return the new objects."""
+    progress.step("Done, loading materials and images...")
+
+    material_libs = set()
+    for line in parsed.mtllib_lines:
+        material_libs |= {os.fsdecode(f) for f in filenames_group_by_ext(line, b'.mtl')}
+
+    unique_materials = {name: None for name in parsed.materials}
+    create_materials(filepath, relpath, material_libs, unique_materials,
+                     use_image_search, get_float_func(filepath))
+
+    progress.step("Done, building geometries (verts:%i faces:%i materials: %i smoothgroups:%i) ..." %
+                  (len(parsed.verts_loc), len(parsed.face_counts), len(unique_materials), len(parsed.smooth_groups)))
+
+    # deselect all
+    if bpy.ops.object.select_all.poll():
+        bpy.ops.object.select_all(action='DESELECT')
+
+    new_objects = []  # put new objects here
+
+    for data in split_parsed(parsed, unique_materials, filepath, SPLIT_OB_OR_GROUP):
+        (verts_loc_split, face_counts, loops_loc, loops_nor, loops_tex,
+         face_materials, face_smooth_groups, materials, dataname) = data
+        create_mesh_arrays(new_objects,
+                           verts_loc_split,
+                           parsed.verts_nor,
+                           parsed.verts_tex,
+                           face_counts,
+                           loops_loc,
+                           loops_nor,
+                           loops_tex,
+                           face_materials,
+                           face_smooth_groups,
+                           materials,
+                           bool(parsed.smooth_groups),
+                           dataname,
+                           )
+
+    return new_objects
+
+
 def load(context,
          filepath,
          *,
@@ -912,6 +1130,7 @@ def load(context,
          use_split_groups=False,
          use_image_search=True,
          use_groups_as_vgroups=False,
+         use_multiprocessing=False,
          relpath=None,
          global_matrix=None
          ):
@@ -1016,6 +1235,25 @@ def load(context,
         skip_quick_vert = False
 
         progress.enter_substeps(3, "Parsing OBJ file...")
+
+        # Most files can be parsed in bulk, much faster, only use the line by line parser when needed.
+        parsed = None
+        if not use_groups_as_vgroups:
+            try:
+                parsed = parse_obj.parse(filepath, use_split_objects, use_split_groups, use_smooth_groups, use_edges,
+                                         jobs=(os.cpu_count() or 1) if use_multiprocessing else 1)
+            except parse_obj.FallbackError as e:
+                print("\tUsing regular OBJ parser (%s)" % e)
+
+        if parsed is not None:
+            new_objects = load_parsed(progress, parsed, filepath, relpath, use_image_search,
+                                      bool(use_split_objects or use_split_groups))
+            link_new_objects(context, new_objects, global_matrix, global_clamp_size)
+
+            progress.leave_substeps("Done.")
+            progress.leave_substeps("Finished importing: %r" % filepath)
+            return {'FINISHED'}
+
         with open(filepath, 'rb') as f:
             for line in f:
                 line_split = line.split()
@@ -1281,41 +1519,7 @@ def load(context,
         for context_nurbs in nurbs:
             create_nurbs(context_nurbs, verts_loc, new_objects)
 
-        view_layer = context.view_layer
-        collection = view_layer.active_layer_collection.collection
-
-        # Create new obj
-        for obj in new_objects:
-            collection.objects.link(obj)
-            obj.select_set(True)
-
-            # we could apply this anywhere before scaling.
-            obj.matrix_world = global_matrix
-
-        view_layer.update()
-
-        axis_min = [1000000000] * 3
-        axis_max = [-1000000000] * 3
-
-        if global_clamp_size:
-            # Get all object bounds
-            for ob in new_objects:
-                for v in ob.bound_box:
-                    for axis, value in enumerate(v):
-                        if axis_min[axis] > value:
-                            axis_min[axis] = value
-                        if axis_max[axis] < value:
-                            axis_max[axis] = value
-
-            # Scale objects
-            max_axis = max(axis_max[0] - axis_min[0], axis_max[1] - axis_min[1], axis_max[2] - axis_min[2])
-            scale = 1.0
-
-            while global_clamp_size < max_axis * scale:
-                scale = scale / 10.0
-
-            for obj in new_objects:
-                obj.scale = scale, scale, scale
+        link_new_objects(context, new_objects, global_matrix, global_clamp_size)
 
         progress.leave_substeps("Done.")
         progress.leave_substeps("Finished importing: %r" % filepath)
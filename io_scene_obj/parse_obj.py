@@ -0,0 +1,550 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""
+Bulk parsing of 'simple' Wavefront OBJ files, without Blender dependency.
+
+The file is read by large blocks, consecutive lines of a same kind ('v', 'vn', 'vt' or 'f') are converted at once
+with NumPy, and faces are stored as flat arrays of indices.
+
+Only the common subset of the format is handled here (polygonal geometry, objects, groups, materials and
+smooth groups). Anything else (multi-line continuations, nurbs, polylines, comma decimal separators, ngons
+using a same vertex more than once...) raises a FallbackError, the caller is then expected to use the
+regular (line by line) parser.
+"""
+
+__all__ = (
+    "parse",
+    "parse_section",
+    "merge_sections",
+    "scan_sections",
+    "FallbackError",
+    "ParsedOBJ",
+    )
+
+import os
+import re
+import sys
+
+import numpy as np
+
+# Size of the blocks read from the file.
+BLOCK_SIZE = 64 * 1024 * 1024
+# Minimum size of the sections of a file parsed in parallel.
+MIN_SECTION_SIZE = 8 * 1024 * 1024
+
+# One match per run of consecutive 'v', 'vn', 'vt' or 'f' lines, or per any other single line.
+_RUNS_RE = re.compile(
+    rb'((?:v[ \t][^\n]*\n)+)|((?:vn[ \t][^\n]*\n)+)|((?:vt[ \t][^\n]*\n)+)|((?:f[ \t][^\n]*\n)+)|([^\n]*\n)'
+)
+_RUN_V, _RUN_VN, _RUN_VT, _RUN_F, _RUN_OTHER = range(1, 6)
+
+# Lines ending with a backslash continue on next line.
+_MULTI_LINE_RE = re.compile(rb'\\[ \t\r]*\n')
+
+# Object and group lines, preferred places to split a file into sections.
+_SECTION_LINE_RE = re.compile(rb'\n[og][ \t]')
+# Vertex lines with leading spaces, which prevent fast counting of vertices.
+_INDENTED_VERTS_RE = re.compile(rb'(?:^|\n)[ \t]+v')
+
+# Keywords that the regular parser handles, but not this one.
+_UNSUPPORTED = {b'cstype', b'curv', b'parm', b'deg', b'end'}
+
+
+class FallbackError(Exception):
+    """Raised when the file uses OBJ features not supported by the bulk parser."""
+
+
+class ParsedOBJ:
+    """
+    Geometry of an OBJ file, as flat arrays.
+
+    Faces are described by their number of vertices (face_counts), and their loops by indices into
+    verts_loc, verts_nor and verts_tex (as the regular parser does, missing normal or UV indices are 0).
+    Each face also has indices into materials (None being the default material), smooth_groups (-1 for none)
+    and object_keys.
+    """
+    __slots__ = (
+        "verts_loc", "verts_nor", "verts_tex",
+        "face_counts", "loops_loc", "loops_nor", "loops_tex",
+        "face_materials", "face_smooth_groups", "face_object_keys",
+        "materials", "smooth_groups", "object_keys", "mtllib_lines",
+        )
+
+
+def unique_name(existing_names, name_orig):
+    i = 0
+    if name_orig is None:
+        name_orig = b"ObjObject"
+    name = name_orig
+    while name in existing_names:
+        name = b"%s.%03d" % (name_orig, i)
+        i += 1
+    existing_names.add(name)
+    return name
+
+
+def line_value(line_split):
+    length = len(line_split)
+    if length == 1:
+        return None
+    elif length == 2:
+        return line_split[1]
+    return b' '.join(line_split[1:])
+
+
+def iter_blocks(f, size=-1, block_size=BLOCK_SIZE):
+    """
+    Yield blocks of complete lines (each ending with a newline) read from given binary file,
+    up to size bytes (or the end of the file if negative).
+    """
+    remainder = b''
+    while size:
+        data = f.read(block_size if size < 0 else min(block_size, size))
+        if not data:
+            break
+        if size > 0:
+            size -= len(data)
+        data = remainder + data
+        end = data.rfind(b'\n') + 1
+        if end == 0:
+            remainder = data
+            continue
+        remainder = data[end:]
+        yield data[:end]
+    if remainder:
+        yield remainder + b'\n'
+
+
+def parse_vectors(run, tag, size):
+    """Convert a run of 'v', 'vn' or 'vt' lines to a (lines x size) array, extra values are ignored."""
+    # Some files do not explicitly write the 'v' value when it's 0.0, see T68249...
+    min_size = 1 if tag == b'vt' else size
+    tokens = np.array(run.split())
+    nbr_lines = run.count(b'\n')
+    stride = len(tokens) // nbr_lines
+    try:
+        if len(tokens) == nbr_lines * stride and (tokens[::stride] == tag).all():
+            if stride - 1 < min_size:
+                raise FallbackError("missing values in %r lines" % tag)
+            values = tokens.reshape(nbr_lines, stride)[:, 1:size + 1].astype(np.float64)
+            if values.shape[1] < size:
+                values = np.pad(values, ((0, 0), (0, size - values.shape[1])))
+            return values
+
+        # Lines with varying number of values, e.g. some vertices with colors and some without.
+        lines = [line.split()[1:size + 1] for line in run.splitlines()]
+        if min(map(len, lines)) < min_size:
+            raise FallbackError("missing values in %r lines" % tag)
+        return np.array([list(map(float, line)) + [0.0] * (size - len(line)) for line in lines], dtype=np.float64)
+    except ValueError:
+        raise FallbackError("invalid numbers in %r lines" % tag)
+
+
+def _fix_indices(indices, nbr_items):
+    # Negative indices are relative to the end of the data defined so far, 0 means 'undefined'.
+    return np.where(indices < 0, indices + nbr_items, np.where(indices == 0, 0, indices - 1))
+
+
+def parse_faces(run, nbr_loc, nbr_tex, nbr_nor):
+    """
+    Convert a run of 'f' lines to (face_counts, loops_loc, loops_tex, loops_nor) arrays,
+    nbr_* being the number of each kind of vertex data defined so far in the file.
+    """
+    tokens = np.array(run.split())
+    is_face = tokens == b'f'
+    starts = np.flatnonzero(is_face)
+    if len(starts) != run.count(b'\n') or starts[0] != 0:
+        raise FallbackError("unexpected 'f' lines layout")
+    face_counts = np.diff(np.append(starts, len(tokens))) - 1
+    if face_counts.min() < 3:
+        raise FallbackError("faces with less than three vertices")
+
+    verts = tokens[~is_face]
+    verts_slashes = np.char.count(verts, b'/')
+    nbr_slashes = verts_slashes.max()
+    if nbr_slashes > 2:
+        raise FallbackError("invalid face vertices")
+    if verts_slashes.min() != nbr_slashes:
+        # Mix of 'v', 'v/vt', 'v/vt/vn' or 'v//vn' items, give them all three fields.
+        verts = np.char.add(verts, np.array([b'/0/0', b'/0', b''])[verts_slashes])
+        nbr_slashes = 2
+    try:
+        if nbr_slashes:
+            # 'v/vt', 'v/vt/vn' or 'v//vn' items.
+            fields = b' '.join(verts).replace(b'//', b'/0/').replace(b'/', b' ').split()
+            if len(fields) != len(verts) * (nbr_slashes + 1):
+                raise FallbackError("invalid face vertices")
+            fields = np.array(fields).astype(np.int64).reshape(len(verts), nbr_slashes + 1)
+        else:
+            fields = verts.astype(np.int64).reshape(len(verts), 1)
+    except ValueError:
+        raise FallbackError("invalid face vertices")
+
+    loops_loc = fields[:, 0]
+    if not loops_loc.all():
+        raise FallbackError("invalid 0 vertex index")
+    loops_loc = _fix_indices(loops_loc, nbr_loc)
+    if nbr_slashes >= 1:
+        loops_tex = _fix_indices(fields[:, 1], nbr_tex)
+    else:
+        loops_tex = np.zeros(len(verts), dtype=np.int64)
+    if nbr_slashes == 2:
+        loops_nor = _fix_indices(fields[:, 2], nbr_nor)
+    else:
+        loops_nor = np.zeros(len(verts), dtype=np.int64)
+    return face_counts, loops_loc, loops_tex, loops_nor
+
+
+def _concatenate(arrays, shape, dtype):
+    return np.concatenate(arrays) if arrays else np.empty(shape, dtype=dtype)
+
+
+class SectionData:
+    """
+    Geometry of a section (a range of lines) of an OBJ file.
+
+    Materials, smooth groups and object keys of faces are indices into the lists of this section
+    (the 'o' and 'g' lines it contains, for object keys), -1 meaning the context inherited from previous sections.
+    """
+    __slots__ = (
+        "verts_loc", "verts_nor", "verts_tex",
+        "face_counts", "loops_loc", "loops_nor", "loops_tex",
+        "face_materials", "face_smooth_groups", "face_object_keys",
+        "materials", "smooth_groups", "object_lines", "mtllib_lines",
+        "last_material", "last_smooth_group", "last_object_key",
+        )
+
+
+def parse_section(filepath, start=0, end=None, verts_offsets=(0, 0, 0),
+                  use_split_objects=True, use_split_groups=False, use_smooth_groups=True, use_edges=True):
+    """
+    Parse the lines of the OBJ file between start and end byte offsets (both at the start of a line),
+    verts_offsets being the numbers of (v, vt, vn) lines before start. Returns a SectionData.
+    Raises FallbackError when the section cannot be handled by this parser.
+    """
+    verts = {_RUN_V: [], _RUN_VN: [], _RUN_VT: []}
+    nbr_verts = {_RUN_V: verts_offsets[0], _RUN_VT: verts_offsets[1], _RUN_VN: verts_offsets[2]}
+    vec_sizes = {_RUN_V: (b'v', 3), _RUN_VN: (b'vn', 3), _RUN_VT: (b'vt', 2)}
+    line_kinds = {b'v': _RUN_V, b'vn': _RUN_VN, b'vt': _RUN_VT, b'f': _RUN_F}
+
+    faces = []  # (face_counts, loops_loc, loops_tex, loops_nor) for each run of faces.
+    faces_context = []  # (number of faces, material, smooth group, object key) for each run of faces.
+
+    materials = {}
+    smooth_groups = {}
+    object_lines = []
+    mtllib_lines = []
+
+    context_material = -1
+    context_smooth_group = -1
+    context_object_key = -1
+
+    with open(filepath, 'rb') as f:
+        f.seek(start)
+        for block in iter_blocks(f, size=-1 if end is None else end - start):
+            if _MULTI_LINE_RE.search(block):
+                raise FallbackError("multi-line statements")
+
+            for match in _RUNS_RE.finditer(block):
+                kind = match.lastindex
+                run = match.group(kind)
+
+                if kind == _RUN_OTHER:
+                    line_split = run.split()
+                    if not line_split:
+                        continue
+                    line_start = line_split[0]
+                    if len(line_split) == 1 and line_start != b'end':
+                        print("WARNING, skipping malformatted line: %s" % run.decode('UTF-8', 'replace').rstrip())
+                        continue
+                    # Vertex or face line with some unusual spacing.
+                    kind = line_kinds.get(line_start, _RUN_OTHER)
+                    run = b' '.join(line_split) + b'\n'
+
+                if kind in verts:
+                    tag, size = vec_sizes[kind]
+                    data = parse_vectors(run, tag, size)
+                    verts[kind].append(data)
+                    nbr_verts[kind] += len(data)
+
+                elif kind == _RUN_F:
+                    data = parse_faces(run, nbr_verts[_RUN_V], nbr_verts[_RUN_VT], nbr_verts[_RUN_VN])
+                    faces.append(data)
+                    faces_context.append((len(data[0]), context_material, context_smooth_group, context_object_key))
+
+                elif line_start == b'l':
+                    if use_edges:
+                        raise FallbackError("polylines")
+
+                elif line_start == b's':
+                    if use_smooth_groups:
+                        value = line_value(line_split)
+                        if value == b'off' or not value:
+                            value = None
+                        context_smooth_group = smooth_groups.setdefault(value, len(smooth_groups))
+
+                elif line_start == b'o':
+                    if use_split_objects:
+                        context_object_key = len(object_lines)
+                        object_lines.append((b'o', line_value(line_split)))
+
+                elif line_start == b'g':
+                    if use_split_groups:
+                        context_object_key = len(object_lines)
+                        object_lines.append((b'g', line_value(line_split)))
+
+                elif line_start == b'usemtl':
+                    name = line_value(line_split)
+                    context_material = materials.setdefault(name, len(materials))
+
+                elif line_start == b'mtllib':
+                    mtllib_lines.append(run.lstrip()[7:].strip())
+
+                elif line_start in _UNSUPPORTED:
+                    raise FallbackError("nurbs")
+
+    section = SectionData()
+    section.verts_loc = _concatenate(verts[_RUN_V], (0, 3), np.float64)
+    section.verts_nor = _concatenate(verts[_RUN_VN], (0, 3), np.float64)
+    section.verts_tex = _concatenate(verts[_RUN_VT], (0, 2), np.float64)
+
+    section.face_counts = _concatenate([data[0] for data in faces], (0,), np.int64)
+    section.loops_loc = _concatenate([data[1] for data in faces], (0,), np.int64)
+    section.loops_tex = _concatenate([data[2] for data in faces], (0,), np.int64)
+    section.loops_nor = _concatenate([data[3] for data in faces], (0,), np.int64)
+
+    nbr_faces = [c[0] for c in faces_context]
+    section.face_materials = np.repeat(np.array([c[1] for c in faces_context], dtype=np.int64), nbr_faces)
+    section.face_smooth_groups = np.repeat(np.array([c[2] for c in faces_context], dtype=np.int64), nbr_faces)
+    section.face_object_keys = np.repeat(np.array([c[3] for c in faces_context], dtype=np.int64), nbr_faces)
+
+    section.materials = list(materials.keys())
+    section.smooth_groups = list(smooth_groups.keys())
+    section.object_lines = object_lines
+    section.mtllib_lines = mtllib_lines
+    section.last_material = context_material
+    section.last_smooth_group = context_smooth_group
+    section.last_object_key = context_object_key
+
+    check_faces(section.face_counts, section.loops_loc)
+    return section
+
+
+def merge_sections(sections):
+    """Merge the SectionData of consecutive sections of an OBJ file into a ParsedOBJ."""
+    materials = {}
+    smooth_groups = {}
+    object_keys = {None: 0}
+    objects_names = set()
+    mtllib_lines = []
+
+    context_material = -1  # default material
+    context_smooth_group = -1
+    context_object_key = 0
+    context_object_obpart = None
+
+    face_materials = []
+    face_smooth_groups = []
+    face_object_keys = []
+
+    for section in sections:
+        # Map local indices to global ones, the extra last item being the context inherited from previous sections.
+        materials_map = [materials.setdefault(name, len(materials)) for name in section.materials]
+        materials_map.append(context_material)
+        smooth_groups_map = [-1 if value is None else smooth_groups.setdefault(value, len(smooth_groups))
+                             for value in section.smooth_groups]
+        smooth_groups_map.append(context_smooth_group)
+        object_keys_map = []
+        for line_start, value in section.object_lines:
+            if line_start == b'o':
+                key = unique_name(objects_names, value)
+                context_object_obpart = key
+            else:
+                key = (context_object_obpart, value) if context_object_obpart else value
+            object_keys_map.append(object_keys.setdefault(key, len(object_keys)))
+        object_keys_map.append(context_object_key)
+
+        materials_map = np.array(materials_map, dtype=np.int64)
+        smooth_groups_map = np.array(smooth_groups_map, dtype=np.int64)
+        object_keys_map = np.array(object_keys_map, dtype=np.int64)
+        face_materials.append(materials_map[section.face_materials])
+        face_smooth_groups.append(smooth_groups_map[section.face_smooth_groups])
+        face_object_keys.append(object_keys_map[section.face_object_keys])
+        context_material = materials_map[section.last_material]
+        context_smooth_group = smooth_groups_map[section.last_smooth_group]
+        context_object_key = object_keys_map[section.last_object_key]
+        mtllib_lines += section.mtllib_lines
+
+    parsed = ParsedOBJ()
+    parsed.verts_loc = _concatenate([s.verts_loc for s in sections], (0, 3), np.float64)
+    parsed.verts_nor = _concatenate([s.verts_nor for s in sections], (0, 3), np.float64)
+    parsed.verts_tex = _concatenate([s.verts_tex for s in sections], (0, 2), np.float64)
+
+    parsed.face_counts = _concatenate([s.face_counts for s in sections], (0,), np.int64)
+    parsed.loops_loc = _concatenate([s.loops_loc for s in sections], (0,), np.int64)
+    parsed.loops_tex = _concatenate([s.loops_tex for s in sections], (0,), np.int64)
+    parsed.loops_nor = _concatenate([s.loops_nor for s in sections], (0,), np.int64)
+
+    parsed.face_materials = _concatenate(face_materials, (0,), np.int64)
+    parsed.face_smooth_groups = _concatenate(face_smooth_groups, (0,), np.int64)
+    parsed.face_object_keys = _concatenate(face_object_keys, (0,), np.int64)
+
+    parsed.materials = list(materials.keys())
+    if (parsed.face_materials == -1).any():
+        # Faces without material use the default one, always last.
+        if None not in materials:
+            materials[None] = len(materials)
+            parsed.materials.append(None)
+        parsed.face_materials[parsed.face_materials == -1] = materials[None]
+    parsed.smooth_groups = list(smooth_groups.keys())
+    parsed.object_keys = list(object_keys.keys())
+    parsed.mtllib_lines = mtllib_lines
+
+    check_indices(parsed)
+    return parsed
+
+
+def check_faces(face_counts, loops_loc):
+    """Check that no face uses a same vertex more than once, such ngons need to be tessellated by the regular importer."""
+    if not len(loops_loc):
+        return
+    face_indices = np.repeat(np.arange(len(face_counts), dtype=np.int64), face_counts)
+    loops_min = loops_loc.min()
+    keys = np.sort(face_indices * (loops_loc.max() - loops_min + 1) + (loops_loc - loops_min))
+    if (keys[1:] == keys[:-1]).any():
+        raise FallbackError("faces using a same vertex more than once")
+
+
+def check_indices(parsed):
+    """Check that all indices are valid."""
+    loops_loc = parsed.loops_loc
+    if len(loops_loc) and (loops_loc.min() < 0 or loops_loc.max() >= len(parsed.verts_loc)):
+        raise FallbackError("invalid vertex indices")
+    for loops, items in ((parsed.loops_tex, parsed.verts_tex), (parsed.loops_nor, parsed.verts_nor)):
+        if len(items) and len(loops) and (loops.min() < 0 or loops.max() >= len(items)):
+            raise FallbackError("invalid normal or UV indices")
+
+
+def _count_verts(data):
+    """Return the numbers of (v, vt, vn) lines in given data (starting at the beginning of a line)."""
+    if _INDENTED_VERTS_RE.search(data):
+        raise FallbackError("indented vertex lines")
+    counts = []
+    for tag in (b'v', b'vt', b'vn'):
+        counts.append(data.count(b'\n' + tag + b' ') + data.count(b'\n' + tag + b'\t') +
+                      (data.startswith(tag + b' ') or data.startswith(tag + b'\t')))
+    return counts
+
+
+def scan_sections(filepath, nbr_sections):
+    """
+    Split the OBJ file into about nbr_sections sections, cut on 'o' or 'g' lines when possible.
+    Returns a list of (start, end, verts_offsets) parameters for parse_section().
+    """
+    section_size = max(os.path.getsize(filepath) // nbr_sections, MIN_SECTION_SIZE)
+    # How far after the ideal cut position to look for an object or group line.
+    search_size = section_size // 4
+
+    sections = []
+    counts = [0, 0, 0]
+    start = 0
+    start_counts = (0, 0, 0)
+    offset = 0
+    with open(filepath, 'rb') as f:
+        for block in iter_blocks(f):
+            pos = 0
+            while start + section_size < offset + len(block):
+                target = start + section_size - offset
+                match = _SECTION_LINE_RE.search(block, target, target + search_size)
+                cut = match.start() + 1 if match else block.find(b'\n', target) + 1
+                counts = [c + n for c, n in zip(counts, _count_verts(block[pos:cut]))]
+                sections.append((start, offset + cut, start_counts))
+                start = offset + cut
+                start_counts = tuple(counts)
+                pos = cut
+            counts = [c + n for c, n in zip(counts, _count_verts(block[pos:]))]
+            offset += len(block)
+    if offset > start:
+        sections.append((start, offset, start_counts))
+    return sections
+
+
+# Run first in spawned processes: register the add-on package without executing its __init__ (which requires bpy),
+# so that this module gets imported there under its usual name (and exceptions raised there are of the same classes).
+_WORKER_INIT = """
+import sys, types
+package = types.ModuleType(%r)
+package.__path__ = [%r]
+sys.modules[package.__name__] = package
+"""
+
+
+def can_spawn_processes():
+    """
+    Whether new Python processes can be spawned, which requires sys.executable to be a Python interpreter.
+    Before 2.91, Blender sets it to its own binary, which would be started in each process instead.
+    """
+    return os.path.basename(sys.executable).lower().startswith("python")
+
+
+def parse_sections_parallel(filepath, sections, options, jobs):
+    """Run parse_section() for all given sections in a pool of jobs processes."""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    package_name = __name__.rpartition('.')[0]
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    with ProcessPoolExecutor(jobs, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=exec, initargs=(_WORKER_INIT % (package_name, package_dir), {})) as executor:
+        futures = [executor.submit(parse_section, filepath, start, end, verts_offsets, *options)
+                   for start, end, verts_offsets in sections]
+        try:
+            return [future.result() for future in futures]
+        except FallbackError:
+            for future in futures:
+                future.cancel()
+            raise
+
+
+def parse(filepath, use_split_objects=True, use_split_groups=False, use_smooth_groups=True, use_edges=True, jobs=1):
+    """
+    Parse the OBJ file, returns a ParsedOBJ.
+    With several jobs, large files are split into sections parsed in parallel by as many processes.
+    Raises FallbackError when the file cannot be handled by this parser.
+    """
+    options = (use_split_objects, use_split_groups, use_smooth_groups, use_edges)
+    sections = ()
+    if jobs > 1 and not can_spawn_processes():
+        print("\tNo Python interpreter to run parsing processes (%r), parsing on a single process" % sys.executable)
+        jobs = 1
+    if jobs > 1 and os.path.getsize(filepath) >= MIN_SECTION_SIZE * 2:
+        try:
+            # A few sections per process, so that they all stay busy until the end.
+            sections = scan_sections(filepath, jobs * 4)
+        except FallbackError as e:
+            print("\tOBJ file cannot be split (%s), parsing on a single process" % e)
+        if len(sections) > 1:
+            try:
+                return merge_sections(parse_sections_parallel(filepath, sections, options, jobs))
+            except (OSError, RuntimeError) as e:
+                # E.g. process pool broken or unavailable on this system.
+                print("\tOBJ parallel parsing failed (%s), parsing on a single process" % e)
+    return merge_sections([parse_section(filepath, 0, None, (0, 0, 0), *options)])
@@ -22,11 +22,13 @@ DEBUG = False
 
 # This should work without a blender at all
 import os
-import shlex
+import re
 import math
 from math import sin, cos, pi
 from itertools import chain
 
+import numpy as np
+
 texture_cache = {}
 material_cache = {}
 
@@ -63,304 +65,101 @@ def imageConvertCompat(path):
 
 # =============================== VRML Spesific
 
-def vrml_split_fields(value):
+# Tokens of VRML data, comments and commas (white space in VRML) are skipped.
+# The content of arrays made of numbers only (point, coordIndex...) is matched at once,
+# so it can be read in a single pass instead of word by word.
+VRML_TOKEN = re.compile(r"""
+    (?P<array>\[[-+.\dxXa-fA-F\s,]*\])
+    |(?P<skip>[\s,]+|\#[^\n\r]*)
+    |(?P<string>"(?:[^"\\]|\\.)*"?)
+    |(?P<word>[^\s,"{}\[\]\#]+)
+    |(?P<bracket>[{}\[\]])
+    """, re.VERBOSE)
+
+# Keywords starting a field declaration (in PROTO interfaces and Script nodes).
+FIELD_DECLARATIONS = {
+    'field', 'exposedField', 'eventIn', 'eventOut',
+    'initializeOnly', 'inputOutput', 'inputOnly', 'outputOnly',
+}
+
+
+def vrml_is_value(word):
     """
-    key 0.0 otherkey 1,2,3 opt1 opt1 0.0
-        -> [key 0.0], [otherkey 1,2,3], [opt1 opt1 0.0]
+    Values are numbers, strings and constants, other words are keys (node types, field names...).
     """
-    def iskey(k):
-        if k[0] != '"' and k[0].isalpha() and k.upper() not in {'TRUE', 'FALSE'}:
-            return True
-        return False
-
-    field_list = []
-    field_context = []
-
-    for v in value:
-        if iskey(v):
-            if field_context:
-                field_context_len = len(field_context)
-                if (field_context_len > 2) and (field_context[-2] in {'DEF', 'USE'}):
-                    field_context.append(v)
-                elif (not iskey(field_context[-1])) or ((field_context_len == 3 and field_context[1] == 'IS')):
-                    # this IS a key but the previous value was not a key, or it was a defined field.
-                    field_list.append(field_context)
-                    field_context = [v]
-                else:
-                    # The last item was not a value, multiple keys are needed in some cases.
-                    field_context.append(v)
-            else:
-                # Is empty, just add this on
-                field_context.append(v)
-        else:
-            # Add a value to the list
-            field_context.append(v)
-
-    if field_context:
-        field_list.append(field_context)
-
-    return field_list
+    return word[0] in '"+-.0123456789' or word in {'TRUE', 'FALSE', 'NULL'}
 
 
-def vrmlFormat(data):
+def vrml_parse_numbers(text):
     """
-    Keep this as a valid vrml file, but format in a way we can predict.
-    """
-    # Strip all comments - # not in strings - warning multiline strings are ignored.
-    def strip_comment(l):
-        #l = ' '.join(l.split())
-        l = l.strip()
-
-        if l.startswith('#'):
-            return ''
-
-        i = l.find('#')
-
-        if i == -1:
-            return l
-
-        # Most cases accounted for! if we have a comment at the end of the line do this...
-        #j = l.find('url "')
-        j = l.find('"')
-
-        if j == -1:  # simple no strings
-            return l[:i].strip()
+    "0 1 2, 3 4 5" -> array([0, 1, 2, 3, 4, 5])
 
-        q = False
-        for i, c in enumerate(l):
-            if c == '"':
-                q = not q  # invert
-
-            elif c == '#':
-                if q is False:
-                    return l[:i - 1]
-
-        return l
-
-    data = '\n'.join([strip_comment(l) for l in data.split('\n')])  # remove all whitespace
-
-    EXTRACT_STRINGS = True  # only needed when strings or filename contains ,[]{} chars :/
-
-    if EXTRACT_STRINGS:
-
-        # We need this so we can detect URL's
-        data = '\n'.join([' '.join(l.split()) for l in data.split('\n')])  # remove all whitespace
-
-        string_ls = []
-
-        #search = 'url "'
-        search = '"'
-
-        ok = True
-        last_i = 0
-        while ok:
-            ok = False
-            i = data.find(search, last_i)
-            if i != -1:
-
-                start = i + len(search)  # first char after end of search
-                end = data.find('"', start)
-                if end != -1:
-                    item = data[start:end]
-                    string_ls.append(item)
-                    data = data[:start] + data[end:]
-                    ok = True  # keep looking
-
-                    last_i = (end - len(item)) + 1
-                    # print(last_i, item, '|' + data[last_i] + '|')
-
-    # done with messy extracting strings part
-
-    # Bad, dont take strings into account
-    '''
-    data = data.replace('#', '\n#')
-    data = '\n'.join([ll for l in data.split('\n') for ll in (l.strip(),) if not ll.startswith('#')]) # remove all whitespace
-    '''
-    data = data.replace('{', '\n{\n')
-    data = data.replace('}', '\n}\n')
-    data = data.replace('[', '\n[\n')
-    data = data.replace(']', '\n]\n')
-    data = data.replace(',', ' , ')  # make sure comma's separate
-
-    # We need to write one property (field) per line only, otherwise we fail later to detect correctly new nodes.
-    # See T45195 for details.
-    data = '\n'.join([' '.join(value) for l in data.split('\n') for value in vrml_split_fields(l.split())])
-
-    if EXTRACT_STRINGS:
-        # add strings back in
-
-        search = '"'  # fill in these empty strings
-
-        ok = True
-        last_i = 0
-        while ok:
-            ok = False
-            i = data.find(search + '"', last_i)
-            # print(i)
-            if i != -1:
-                start = i + len(search)  # first char after end of search
-                item = string_ls.pop(0)
-                # print(item)
-                data = data[:start] + item + data[start:]
-
-                last_i = start + len(item) + 1
-
-                ok = True
-
-    # More annoying obscure cases where USE or DEF are placed on a newline
-    # data = data.replace('\nDEF ', ' DEF ')
-    # data = data.replace('\nUSE ', ' USE ')
-
-    data = '\n'.join([' '.join(l.split()) for l in data.split('\n')])  # remove all whitespace
-
-    # Better to parse the file accounting for multiline arrays
-    '''
-    data = data.replace(',\n', ' , ') # remove line endings with commas
-    data = data.replace(']', '\n]\n') # very very annoying - but some comma's are at the end of the list, must run this again.
-    '''
-
-    return [l for l in data.split('\n') if l]
-
-NODE_NORMAL = 1  # {}
-NODE_ARRAY = 2  # []
-NODE_REFERENCE = 3  # USE foobar
-# NODE_PROTO = 4 #
-
-lines = []
-
-
-def getNodePreText(i, words):
-    # print(lines[i])
-    use_node = False
-    while len(words) < 5:
-
-        if i >= len(lines):
-            break
-            '''
-        elif lines[i].startswith('PROTO'):
-            return NODE_PROTO, i+1
-            '''
-        elif lines[i] == '{':
-            # words.append(lines[i]) # no need
-            # print("OK")
-            return NODE_NORMAL, i + 1
-        elif lines[i].count('"') % 2 != 0:  # odd number of quotes? - part of a string.
-            # print('ISSTRING')
-            break
-        else:
-            new_words = lines[i].split()
-            if 'USE' in new_words:
-                use_node = True
-
-            words.extend(new_words)
-            i += 1
-
-        # Check for USE node - no {
-        # USE #id - should always be on the same line.
-        if use_node:
-            # print('LINE', i, words[:words.index('USE')+2])
-            words[:] = words[:words.index('USE') + 2]
-            if lines[i] == '{' and lines[i + 1] == '}':
-                # USE sometimes has {} after it anyway
-                i += 2
-            return NODE_REFERENCE, i
-
-    # print("error value!!!", words)
-    return 0, -1
-
-
-def is_nodeline(i, words):
-
-    if not lines[i][0].isalpha():
-        return 0, 0
-
-    #if lines[i].startswith('field'):
-    #   return 0, 0
-
-    # Is this a prototype??
-    if lines[i].startswith('PROTO'):
-        words[:] = lines[i].split()
-        return NODE_NORMAL, i + 1  # TODO - assumes the next line is a '[\n', skip that
-    if lines[i].startswith('EXTERNPROTO'):
-        words[:] = lines[i].split()
-        return NODE_ARRAY, i + 1  # TODO - assumes the next line is a '[\n', skip that
-
-    '''
-    proto_type, new_i = is_protoline(i, words, proto_field_defs)
-    if new_i != -1:
-        return proto_type, new_i
-    '''
-
-    # Simple "var [" type
-    if lines[i + 1] == '[':
-        if lines[i].count('"') % 2 == 0:
-            words[:] = lines[i].split()
-            return NODE_ARRAY, i + 2
-
-    node_type, new_i = getNodePreText(i, words)
-
-    if not node_type:
-        if DEBUG:
-            print("not node_type", lines[i])
-        return 0, 0
-
-    # Ok, we have a { after some values
-    # Check the values are not fields
-    for i, val in enumerate(words):
-        if i != 0 and words[i - 1] in {'DEF', 'USE'}:
-            # ignore anything after DEF, it is a ID and can contain any chars.
-            pass
-        elif val[0].isalpha() and val not in {'TRUE', 'FALSE'}:
+    Read white space (or comma) separated numbers as an int64 array if they are all integers,
+    as a float64 array otherwise. Return None if some of the values are not numbers.
+    """
+    words = text.replace(',', ' ').split()
+    for dtype in (np.int64, np.float64):
+        try:
+            return np.array(words, dtype=dtype)
+        except (ValueError, OverflowError):
             pass
-        else:
-            # There is a number in one of the values, therefor we are not a node.
-            return 0, 0
 
-    #if node_type==NODE_REFERENCE:
-    #   print(words, "REF_!!!!!!!")
-    return node_type, new_i
+    # Slow path, for hexadecimal values (e.g. in PixelTexture).
+    try:
+        return np.array([int(v, 0) for v in words], dtype=np.int64)
+    except (ValueError, OverflowError):
+        return None
 
 
-def is_numline(i):
+def vrml_tokenize(data):
     """
-    Does this line start with a number?
+    Split VRML data into words, strings (with their quotes) and brackets. The numbers between
+    the brackets of an array are returned as a single array token (see vrml_parse_numbers()).
+    Return the list of tokens and the list of their line numbers.
     """
+    tokens = []
+    linenos = []
+    lineno = 1
+    pos = 0
+    for m in VRML_TOKEN.finditer(data):
+        kind = m.lastgroup
+        if kind == 'skip':
+            continue
 
-    # Works but too slow.
-    '''
-    l = lines[i]
-    for w in l.split():
-        if w==',':
-            pass
+        start = m.start()
+        lineno += data.count('\n', pos, start)
+        pos = start
+
+        if kind == 'array':
+            values = vrml_parse_numbers(m.group()[1:-1])
+            if values is None:
+                # Not only numbers (e.g. a list of USE'd nodes), tokenize the content of the array.
+                tokens.append('[')
+                linenos.append(lineno)
+                for m_word in VRML_TOKEN.finditer(data, start + 1, m.end() - 1):
+                    if m_word.lastgroup == 'word':
+                        lineno += data.count('\n', pos, m_word.start())
+                        pos = m_word.start()
+                        tokens.append(m_word.group())
+                        linenos.append(lineno)
+            else:
+                tokens.extend(('[', values))
+                linenos.extend((lineno, lineno))
+            lineno += data.count('\n', pos, m.end())
+            pos = m.end()
+            tokens.append(']')
+            linenos.append(lineno)
         else:
-            try:
-                float(w)
-                return True
-
-            except:
-                return False
-
-    return False
-    '''
+            tokens.append(m.group())
+            linenos.append(lineno)
 
-    l = lines[i]
+    return tokens, linenos
 
-    line_start = 0
 
-    if l.startswith(', '):
-        line_start += 2
-
-    line_end = len(l) - 1
-    line_end_new = l.find(' ', line_start)  # comma's always have a space before them
-
-    if line_end_new != -1:
-        line_end = line_end_new
-
-    try:
-        float(l[line_start:line_end])  # works for a float or int
-        return True
-    except:
-        return False
+NODE_NORMAL = 1  # {}
+NODE_ARRAY = 2  # []
+NODE_REFERENCE = 3  # USE foobar
+# NODE_PROTO = 4 #
 
 
 class vrmlNode(object):
@@ -779,7 +578,7 @@ class vrmlNode(object):
             st = f[0]
 
         # X3D HACK
-        if self.x3dNode:
+        if self.x3dNode is not None:
             return st
 
         if st[0] == '"' and st[-1] == '"':
@@ -788,90 +587,50 @@ class vrmlNode(object):
             print('\tvalue "%s" could not be used as a string for field "%s"' % (f[0], field))
             return default
 
-    def getFieldAsArray(self, field, group, ancestry):
+    def getFieldAsNumbers(self, field, ancestry):
         """
-        For this parser arrays are children
+        Get the numbers of a field not written as an array, as an int or float array
         """
+        f = self.getFieldName(field, ancestry, SPLIT_COMMAS=True)
+        if not f:
+            return []
 
-        def array_as_number(array_string):
-            array_data = []
-            try:
-                array_data = [int(val, 0) for val in array_string]
-            except:
-                try:
-                    array_data = [float(val) for val in array_string]
-                except:
-                    print('\tWarning, could not parse array data from field')
-
-            return array_data
+        array_data = vrml_parse_numbers(' '.join(f))
+        if array_data is None:
+            print('\tWarning, could not parse array data from field')
+            return []
+        return array_data
 
+    def getFieldAsArray(self, field, group, ancestry):
+        """
+        For this parser arrays are children
+        """
         self_real = self.getRealNode()  # in case we're an instance
 
         child_array = self_real.getFieldName(field, ancestry, True, SPLIT_COMMAS=True)
 
-        #if type(child_array)==list: # happens occasionally
-        #   array_data = child_array
-
-        if child_array is None:
+        if child_array is None or type(child_array) == list:
             # For x3d, should work ok with vrml too
             # for x3d arrays are fields, vrml they are nodes, annoying but not too bad.
-            data_split = self.getFieldName(field, ancestry, SPLIT_COMMAS=True)
-            if not data_split:
-                return []
-
-            array_data = array_as_number(data_split)
-
-        elif type(child_array) == list:
-            # x3d creates these
-            array_data = array_as_number(child_array)
+            array_data = self_real.getFieldAsNumbers(field, ancestry)
         else:
-            # print(child_array)
             # Normal vrml
             array_data = child_array.array_data
 
-        # print('array_data', array_data)
-        if group == -1 or len(array_data) == 0:
-            return array_data
-
-        # We want a flat list
-        flat = True
-        for item in array_data:
-            if type(item) == list:
-                flat = False
-                break
-
-        # make a flat array
-        if flat:
-            flat_array = array_data  # we are already flat.
-        else:
-            flat_array = []
-
-            def extend_flat(ls):
-                for item in ls:
-                    if type(item) == list:
-                        extend_flat(item)
-                    else:
-                        flat_array.append(item)
-
-            extend_flat(array_data)
+        if len(array_data) == 0:
+            return []
 
         # We requested a flat array
-        if group == 0:
-            return flat_array
+        if group <= 0:
+            return array_data.tolist()
 
-        new_array = []
-        sub_array = []
+        remainder = len(array_data) % group
+        if remainder:
+            print('\twarning, array was not aligned to requested grouping', group,
+                  'remaining value', array_data[-remainder:].tolist())
+            array_data = array_data[:-remainder]
 
-        for item in flat_array:
-            sub_array.append(item)
-            if len(sub_array) == group:
-                new_array.append(sub_array)
-                sub_array = []
-
-        if sub_array:
-            print('\twarning, array was not aligned to requested grouping', group, 'remaining value', sub_array)
-
-        return new_array
+        return array_data.reshape(-1, group).tolist()
 
     def getFieldAsStringArray(self, field, ancestry):
         """
@@ -958,8 +717,8 @@ class vrmlNode(object):
 
         return text
 
-    def parse(self, i, IS_PROTO_DATA=False):
-        new_i = self.__parse(i, IS_PROTO_DATA)
+    def parse(self, tokens, linenos, i, IS_PROTO_DATA=False):
+        new_i = self.__parse(tokens, linenos, i, IS_PROTO_DATA)
 
         # print(self.id, self.getFilename())
 
@@ -1034,22 +793,12 @@ class vrmlNode(object):
                             # Tricky - inline another VRML
                             print('\tLoading Inline:"%s"...' % url)
 
-                            # Watch it! - backup lines
-                            lines_old = lines[:]
-
-                            lines[:] = vrmlFormat(data)
-
-                            lines.insert(0, '{')
-                            lines.insert(0, 'root_node____')
-                            lines.append('}')
-                            '''
-                            ff = open('/tmp/test.txt', 'w')
-                            ff.writelines([l+'\n' for l in lines])
-                            '''
+                            inline_tokens, inline_linenos = vrml_tokenize(data)
 
                             child = vrmlNode(self, NODE_NORMAL, -1)
                             child.setRoot(url)  # initialized dicts
-                            child.parse(0)
+                            child.id = ('root_node____',)
+                            child.parse(['{'] + inline_tokens + ['}'], [0] + inline_linenos + [0], 0)
 
                             # if self.getExternprotoName():
                             if self.getExternprotoName():
@@ -1072,181 +821,193 @@ class vrmlNode(object):
                                     else:
                                         print("\tEXTERNPROTO ID not found!:", extern_key)
 
-                            # Watch it! - restore lines
-                            lines[:] = lines_old
-
         return new_i
 
-    def __parse(self, i, IS_PROTO_DATA=False):
-        '''
-        print('parsing at', i, end="")
-        print(i, self.id, self.lineno)
-        '''
-        l = lines[i]
-
-        if l == '[':
-            # An anonymous list
-            self.id = None
-            i += 1
-        else:
-            words = []
-
-            node_type, new_i = is_nodeline(i, words)
-            if not node_type:  # fail for parsing new node.
-                print("Failed to parse new node")
-                raise ValueError
-
-            if self.node_type == NODE_REFERENCE:
-                # Only assign the reference and quit
-                key = words[words.index('USE') + 1]
-                self.id = (words[0],)
-
-                self.reference = self.getDefDict()[key]
-                return new_i
-
-            self.id = tuple(words)
-
-            # fill in DEF/USE
-            key = self.getDefName()
-            if key is not None:
-                self.getDefDict()[key] = self
+    def __parse(self, tokens, linenos, i, IS_PROTO_DATA=False):
+        """
+        Parse the content of this node, its id is set from the words before it by the parent.
+        i is the index of the opening bracket (of the interface for PROTO's),
+        return the index of the token following the node.
+        """
+        # fill in DEF/USE
+        key = self.getDefName()
+        if key is not None:
+            self.getDefDict()[key] = self
 
-            key = self.getProtoName()
-            if not key:
-                key = self.getExternprotoName()
+        key = self.getProtoName()
+        if not key:
+            key = self.getExternprotoName()
 
-            proto_dict = self.getProtoDict()
-            if key is not None:
-                proto_dict[key] = self
+        proto_dict = self.getProtoDict()
+        if key is not None:
+            proto_dict[key] = self
 
-                # Parse the proto nodes fields
-                self.proto_node = vrmlNode(self, NODE_ARRAY, new_i)
-                new_i = self.proto_node.parse(new_i)
+            # Parse the proto nodes fields
+            self.proto_node = vrmlNode(self, NODE_ARRAY, self.lineno)
+            i = self.proto_node.parse(tokens, linenos, i)
 
-                self.children.remove(self.proto_node)
+            self.children.remove(self.proto_node)
 
-                # print(self.proto_node)
+            # print(self.proto_node)
 
-                new_i += 1  # skip past the {
+            if self.node_type == NODE_ARRAY and i < len(tokens) and type(tokens[i]) is str and tokens[i] != '[':
+                # EXTERNPROTO with a single url.
+                self.fields.append([tokens[i]])
+                return i + 1
 
-            else:  # If we're a proto instance, add the proto node as our child.
-                spec = self.getSpec()
-                try:
-                    self.children.append(proto_dict[spec])
-                    #pass
-                except:
-                    pass
+        else:  # If we're a proto instance, add the proto node as our child.
+            spec = self.getSpec()
+            if spec in proto_dict:
+                self.children.append(proto_dict[spec])
 
-                del spec
+            del spec
 
-            del proto_dict, key
+        del proto_dict, key
 
-            i = new_i
+        if i < len(tokens) and type(tokens[i]) is str and tokens[i] in {'{', '['}:
+            i += 1
 
-        # print(self.id)
-        ok = True
-        while ok:
-            if i >= len(lines):
-                return len(lines) - 1
+        array_data = []
+        while i < len(tokens):
+            token = tokens[i]
 
-            l = lines[i]
-            # print('\tDEBUG:', i, self.node_type, l)
-            if l == '':
+            if type(token) is not str:
+                # Numbers of an array, see vrml_tokenize().
+                array_data.append(token)
                 i += 1
-                continue
 
-            if l == '}':
-                if self.node_type != NODE_NORMAL:  # also ends proto nodes, we may want a type for these too.
-                    print('wrong node ending, expected an } ' + str(i) + ' ' + str(self.node_type))
+            elif token in {'}', ']'}:
+                if token != ('}' if self.node_type == NODE_NORMAL else ']'):
+                    # also ends proto nodes, we may want a type for these too.
+                    print('wrong node ending %s at line %d, node type %d' % (token, linenos[i], self.node_type))
                     if DEBUG:
                         raise ValueError
-                ### print("returning", i)
-                return i + 1
-            if l == ']':
-                if self.node_type != NODE_ARRAY:
-                    print('wrong node ending, expected a ] ' + str(i) + ' ' + str(self.node_type))
-                    if DEBUG:
-                        raise ValueError
-                ### print("returning", i)
-                return i + 1
+                i += 1
+                break
 
-            node_type, new_i = is_nodeline(i, [])
-            if node_type:  # check text\n{
-                child = vrmlNode(self, node_type, i)
-                i = child.parse(i)
+            elif token in {'[', '{'}:  # some files have these anonymous lists
+                child = vrmlNode(self, NODE_ARRAY if token == '[' else NODE_NORMAL, linenos[i])
+                i = child.parse(tokens, linenos, i)
+
+            elif token[0] in '+-.0123456789':
+                # Numbers which could not be read with the rest of their array (e.g. commented ones).
+                j = i + 1
+                while j < len(tokens) and type(tokens[j]) is str and tokens[j][0] in '+-.0123456789':
+                    j += 1
+                values = vrml_parse_numbers(' '.join(tokens[i:j]))
+                if values is None:
+                    self.fields.extend([value] for value in tokens[i:j])
+                else:
+                    array_data.append(values)
+                i = j
 
-            elif l == '[':  # some files have these anonymous lists
-                child = vrmlNode(self, NODE_ARRAY, i)
-                i = child.parse(i)
+            elif vrml_is_value(token):
+                # Each string of a string array is its own field.
+                self.fields.append([token])
+                i += 1
 
-            elif is_numline(i):
-                l_split = l.split(',')
+            else:
+                i = self.__parse_statement(tokens, linenos, i)
 
-                values = None
-                # See if each item is a float?
+        if array_data:
+            self.array_data = array_data[0] if len(array_data) == 1 else np.concatenate(array_data)
 
-                for num_type in (int, float):
-                    try:
-                        values = [num_type(v) for v in l_split]
-                        break
-                    except:
-                        pass
+        return i
 
-                    try:
-                        values = [[num_type(v) for v in segment.split()] for segment in l_split]
-                        break
-                    except:
-                        pass
+    def __parse_statement(self, tokens, linenos, i):
+        """
+        Parse what starts with a key word at index i: a child node (possibly the value of a field),
+        a field, a field declaration or a ROUTE. Return the index of the token following it.
+        """
+        def word(i):
+            # Arrays of numbers are never expected here, only in the body of nodes.
+            if i < len(tokens) and type(tokens[i]) is str:
+                return tokens[i]
+            return None
 
-                if values is None:  # dont parse
-                    values = l_split
+        token = tokens[i]
+        lineno = linenos[i]
+
+        if token == 'ROUTE':
+            # ROUTE vpTs.fraction_changed TO vpPI.set_fraction
+            self.fields.append([w for w in tokens[i:i + 4] if type(w) is str])
+            return i + 4
+
+        if token in {'PROTO', 'EXTERNPROTO'}:
+            child = vrmlNode(self, NODE_NORMAL if token == 'PROTO' else NODE_ARRAY, lineno)
+            child.id = (token, word(i + 1))
+            return child.parse(tokens, linenos, i + 2)
+
+        # The words before the value: the field name (or the field declaration), if any.
+        if token in FIELD_DECLARATIONS:
+            # field SFColor legColor .8 .4 .7
+            words = [w for w in tokens[i:i + 3] if type(w) is str]
+            i += 3
+        elif token in {'DEF', 'USE'} or word(i + 1) == '{':
+            words = []
+        else:
+            words = [token]
+            i += 1
 
-                # This should not extend over multiple lines however it is possible
-                # print(self.array_data)
-                if values:
-                    self.array_data.extend(values)
-                i += 1
-            else:
-                words = l.split()
-                if len(words) > 2 and words[1] == 'USE':
-                    vrmlNode(self, NODE_REFERENCE, i)
-                else:
+        token = word(i)
 
-                    # print("FIELD", i, l)
-                    #
-                    #words = l.split()
-                    ### print('\t\ttag', i)
-                    # this is a tag/
-                    # print(words, i, l)
-                    value = l
-                    # print(i)
-                    # javastrips can exist as values.
-                    quote_count = l.count('"')
-                    if quote_count % 2:  # odd number?
-                        # print('MULTILINE')
-                        while 1:
-                            i += 1
-                            l = lines[i]
-                            quote_count = l.count('"')
-                            if quote_count % 2:  # odd number?
-                                value += '\n' + l[:l.rfind('"')]
-                                break  # assume
-                            else:
-                                value += '\n' + l
+        if token == '[':
+            child = vrmlNode(self, NODE_ARRAY, lineno)
+            child.id = tuple(words)
+            return child.parse(tokens, linenos, i)
 
-                    # use shlex so we get '"a b" "b v"' --> '"a b"', '"b v"'
-                    value_all = shlex.split(value, posix=False)
+        if token == 'USE':
+            key = word(i + 1)
+            i += 2
+            if word(i) == '{' and word(i + 1) == '}':
+                # USE sometimes has {} after it anyway
+                i += 2
+            reference = self.getDefDict().get(key)
+            if reference is None:
+                print('\tWarning: reference', key, 'not found')
+            else:
+                # For references, only the parent and ID are needed
+                child = vrmlNode(self, NODE_REFERENCE, lineno)
+                child.id = (words[0] if words else 'USE',)
+                child.reference = reference
+            return i
+
+        if token == 'DEF':
+            # DEF name Type {
+            words.extend((token, word(i + 1), word(i + 2)))
+            i += 3
+        elif token not in {None, 'IS', '{', '}', '[', ']'} and not vrml_is_value(token) and word(i + 1) == '{':
+            # Type {
+            words.append(token)
+            i += 1
 
-                    for value in vrml_split_fields(value_all):
-                        # Split
+        if word(i) == '{':
+            child = vrmlNode(self, NODE_NORMAL, lineno)
+            child.id = tuple(words)
+            return child.parse(tokens, linenos, i)
 
-                        if value[0] == 'field':
-                            # field SFFloat creaseAngle 4
-                            self.proto_field_defs.append(value)
-                        else:
-                            self.fields.append(value)
+        if token == 'IS':
+            # diffuseColor IS legColor
+            words.extend((token, word(i + 1)))
+            i += 2
+        else:
+            # The values, which can be strings (e.g. "javascript:..." on several lines).
+            while word(i) is not None and vrml_is_value(tokens[i]):
+                words.append(tokens[i])
                 i += 1
 
+        if words and words[0] == 'field':
+            # field SFFloat creaseAngle 4
+            self.proto_field_defs.append(words)
+        elif words:
+            self.fields.append(words)
+        else:
+            # Not a valid statement, skip it.
+            print('\tWarning: unexpected %r at line %d' % (token, lineno))
+            i += 1
+
+        return i
+
     # This is a prerequisite for DEF/USE-based material caching
     def canHaveReferences(self):
         return self.node_type == NODE_NORMAL and self.getDefName()
@@ -1267,7 +1028,7 @@ def gzipOpen(path):
 
     if data is None:
         try:
-            filehandle = open(path, 'rU', encoding='utf-8', errors='surrogateescape')
+            filehandle = open(path, 'r', encoding='utf-8', errors='surrogateescape')
             data = filehandle.read()
             filehandle.close()
         except:
@@ -1289,35 +1050,18 @@ def vrml_parse(path):
     if data is None:
         return None, 'Failed to open file: ' + path
 
-    # Stripped above
-    lines[:] = vrmlFormat(data)
-
-    lines.insert(0, '{')
-    lines.insert(0, 'dymmy_node')
-    lines.append('}')
-    # Use for testing our parsed output, so we can check on line numbers.
-
-    '''
-    ff = open('/tmp/test.txt', 'w')
-    ff.writelines([l+'\n' for l in lines])
-    ff.close()
-    '''
-
-    # Now evaluate it
-    node_type, new_i = is_nodeline(0, [])
-    if not node_type:
-        return None, 'Error: VRML file has no starting Node'
+    tokens, linenos = vrml_tokenize(data)
 
     # Trick to make sure we get all root nodes.
-    lines.insert(0, '{')
-    lines.insert(0, 'root_node____')  # important the name starts with an ascii char
-    lines.append('}')
+    tokens = ['{', 'dymmy_node', '{'] + tokens + ['}', '}']
+    linenos = [0, 0, 0] + linenos + [0, 0]
 
     root = vrmlNode(None, NODE_NORMAL, -1)
     root.setRoot(path)  # we need to set the root so we have a namespace and know the path in case of inlineing
+    root.id = ('root_node____',)  # important the name starts with an ascii char
 
     # Parse recursively
-    root.parse(0)
+    root.parse(tokens, linenos, 0)
 
     # This prints a load of text
     if DEBUG:
@@ -1337,49 +1081,41 @@ class x3dNode(vrmlNode):
         self.x3dNode = x3dNode
 
     def parse(self, IS_PROTO_DATA=False):
-        # print(self.x3dNode.tagName)
-        self.lineno = self.x3dNode.parse_position[0]
-
-        define = self.x3dNode.getAttributeNode('DEF')
-        if define:
-            self.getDefDict()[define.value] = self
+        """
+        Register the DEF name of this node, or resolve its USE reference.
+        Children are added by x3d_parse() while reading the document,
+        return False when the content of this node must be skipped.
+        """
+        define = self.x3dNode.get('DEF')
+        if define is not None:
+            self.getDefDict()[define] = self
         else:
-            use = self.x3dNode.getAttributeNode('USE')
-            if use:
+            use = self.x3dNode.get('USE')
+            if use is not None:
                 try:
-                    self.reference = self.getDefDict()[use.value]
+                    self.reference = self.getDefDict()[use]
                     self.node_type = NODE_REFERENCE
                 except:
-                    print('\tWarning: reference', use.value, 'not found')
+                    print('\tWarning: reference', use, 'not found')
                     self.parent.children.remove(self)
 
-                return
-
-        for x3dChildNode in self.x3dNode.childNodes:
-            if x3dChildNode.nodeType in {x3dChildNode.TEXT_NODE, x3dChildNode.COMMENT_NODE, x3dChildNode.CDATA_SECTION_NODE}:
-                continue
-
-            node_type = NODE_NORMAL
-            # print(x3dChildNode, dir(x3dChildNode))
-            if x3dChildNode.getAttributeNode('USE'):
-                node_type = NODE_REFERENCE
-
-            child = x3dNode(self, node_type, x3dChildNode)
-            child.parse()
+                return False
 
         # TODO - x3d Inline
 
+        return True
+
     def getSpec(self):
-        return self.x3dNode.tagName  # should match vrml spec
+        return self.x3dNode.tag  # should match vrml spec
 
     # Used to retain object identifiers from X3D to Blender
     def getDefName(self):
-        node_id = self.x3dNode.getAttributeNode('DEF')
-        if node_id:
-            return node_id.value
-        node_id = self.x3dNode.getAttributeNode('USE')
-        if node_id:
-            return "USE_" + node_id.value
+        node_id = self.x3dNode.get('DEF')
+        if node_id is not None:
+            return node_id
+        node_id = self.x3dNode.get('USE')
+        if node_id is not None:
+            return "USE_" + node_id
         return None
 
     # Other funcs operate from vrml, but this means we can wrap XML fields, still use nice utility funcs
@@ -1387,11 +1123,8 @@ class x3dNode(vrmlNode):
     def getFieldName(self, field, ancestry, AS_CHILD=False, SPLIT_COMMAS=False):
         # ancestry and AS_CHILD are ignored, only used for VRML now
 
-        self_real = self.getRealNode()  # in case we're an instance
-        field_xml = self.x3dNode.getAttributeNode(field)
-        if field_xml:
-            value = field_xml.value
-
+        value = self.x3dNode.get(field)
+        if value is not None:
             # We may want to edit. for x3d specific stuff
             # Sucks a bit to return the field name in the list but vrml excepts this :/
             if SPLIT_COMMAS:
@@ -1400,11 +1133,24 @@ class x3dNode(vrmlNode):
         else:
             return None
 
+    def getFieldAsNumbers(self, field, ancestry):
+        # Read the attribute at once, without splitting it first.
+        value = self.x3dNode.get(field)
+        if not value:
+            return []
+
+        array_data = vrml_parse_numbers(value)
+        if array_data is None:
+            print('\tWarning, could not parse array data from field')
+            return []
+        return array_data
+
     def canHaveReferences(self):
-        return self.x3dNode.getAttributeNode('DEF')
+        return self.x3dNode.get('DEF') is not None
 
     def desc(self):
-        return self.getRealNode().x3dNode.toxml()
+        import xml.etree.ElementTree as ET
+        return ET.tostring(self.getRealNode().x3dNode, encoding='unicode')
 
 
 def x3d_parse(path):
@@ -1412,51 +1158,54 @@ def x3d_parse(path):
     Sets up the root node and returns it so load_web3d() can deal with the blender side of things.
     Return root (x3dNode, '') or (None, 'Error String')
     """
-    import xml.dom.minidom
-    import xml.sax
-    from xml.sax import handler
+    import gzip
+    import xml.etree.ElementTree as ET
 
-    '''
-    try:    doc = xml.dom.minidom.parse(path)
-    except: return None, 'Could not parse this X3D file, XML error'
-    '''
+    try:
+        with open(path, 'rb') as f:
+            is_gzip = f.read(2) == b'\x1f\x8b'
+        source = gzip.open(path, 'rb') if is_gzip else open(path, 'rb')
+    except OSError:
+        return None, 'Failed to open file: ' + path
 
-    # Could add a try/except here, but a console error is more useful.
-    data = gzipOpen(path)
+    # Nodes are created as the elements are read. The stack has the node of each open element,
+    # None for elements outside of the X3D one, or inside a USE reference.
+    root = None
+    stack = []
 
-    if data is None:
-        return None, 'Failed to open file: ' + path
+    # Could add a try/except here, but a console error is more useful.
+    with source:
+        for event, elem in ET.iterparse(source, events=('start', 'end')):
+            if event == 'end':
+                stack.pop()
+                # The text after an element is not part of it, nor of its description, see desc().
+                elem.tail = None
+                continue
 
-    # Enable line number reporting in the parser - kinda brittle
-    def set_content_handler(dom_handler):
-        def startElementNS(name, tagName, attrs):
-            orig_start_cb(name, tagName, attrs)
-            cur_elem = dom_handler.elementStack[-1]
-            cur_elem.parse_position = (parser._parser.CurrentLineNumber, parser._parser.CurrentColumnNumber)
+            # Namespaces are not part of the spec of nodes.
+            elem.tag = elem.tag.rpartition('}')[2]
 
-        orig_start_cb = dom_handler.startElementNS
-        dom_handler.startElementNS = startElementNS
-        orig_set_content_handler(dom_handler)
+            node = None
+            parent = stack[-1] if stack else None
+            if parent is not None:
+                node_type = NODE_NORMAL
+                if elem.get('USE') is not None and elem.get('DEF') is None:
+                    node_type = NODE_REFERENCE
 
-    parser = xml.sax.make_parser()
-    orig_set_content_handler = parser.setContentHandler
-    parser.setFeature(handler.feature_external_ges, False)
-    parser.setFeature(handler.feature_external_pes, False)
-    parser.setContentHandler = set_content_handler
+                node = x3dNode(parent, node_type, elem)
+                if not node.parse():
+                    node = None
+            elif root is None and elem.tag == 'X3D':
+                node = root = x3dNode(None, NODE_NORMAL, elem)
+                root.setRoot(path)  # so images and Inline's we load have a relative path
 
-    doc = xml.dom.minidom.parseString(data, parser)
+            stack.append(node)
 
-    try:
-        x3dnode = doc.getElementsByTagName('X3D')[0]
-    except:
+    if root is None:
         return None, 'Not a valid x3d document, cannot import'
 
     bpy.ops.object.select_all(action='DESELECT')
 
-    root = x3dNode(None, NODE_NORMAL, x3dnode)
-    root.setRoot(path)  # so images and Inline's we load have a relative path
-    root.parse()
-
     return root, ''
 
 ## f = open('/_Cylinder.wrl', 'r')
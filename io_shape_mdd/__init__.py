@@ -21,7 +21,7 @@
 bl_info = {
     "name": "NewTek MDD format",
     "author": "Bill L.Nieuwendorp",
-    "version": (1, 0, 1),
+    "version": (1, 1, 0),
     "blender": (2, 80, 0),
     "location": "File > Import-Export",
     "description": "Import-Export MDD as mesh shape keys",
@@ -72,6 +72,12 @@ class ImportMDD(bpy.types.Operator, ImportHelper):
             min=1, max=1000,
             default=1,
             )
+    use_cache: BoolProperty(
+            name="Stream from File",
+            description="Read the frames from the file while playing the animation, "
+                        "instead of creating a shape key for each of them (for large caches)",
+            default=False,
+            )
 
     @classmethod
     def poll(cls, context):
@@ -170,14 +176,25 @@ classes = (
 )
 
 def register():
+    from . import import_mdd
+
     for cls in classes:
         bpy.utils.register_class(cls)
 
     bpy.types.TOPBAR_MT_file_import.append(menu_func_import)
     bpy.types.TOPBAR_MT_file_export.append(menu_func_export)
 
+    bpy.app.handlers.frame_change_pre.append(import_mdd.cache_frame_change)
+    bpy.app.handlers.load_post.append(import_mdd.cache_load_post)
+
 
 def unregister():
+    from . import import_mdd
+
+    bpy.app.handlers.frame_change_pre.remove(import_mdd.cache_frame_change)
+    bpy.app.handlers.load_post.remove(import_mdd.cache_load_post)
+    import_mdd.cache_clear()
+
     for cls in classes:
         bpy.utils.unregister_class(cls)
 
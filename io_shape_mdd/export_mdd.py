@@ -31,7 +31,37 @@ Be sure not to use modifiers that change the number or order of verts in the mes
 
 import bpy
 import mathutils
-from struct import pack
+import numpy as np
+
+# Size (in bytes) of the blocks of frames accumulated before writing them to file.
+WRITE_BLOCK_SIZE = 1 << 24
+
+
+class FrameWriter:
+    """
+    Accumulate the vertex coordinates of consecutive frames,
+    and write them to file by blocks of frames.
+    """
+    __slots__ = ("file", "co", "block", "count")
+
+    def __init__(self, file, numverts, numframes, dtype='>f4'):
+        self.file = file
+        # foreach_get needs a native float32 buffer, conversion to the file type is done when copying to the block.
+        self.co = np.empty(numverts * 3, dtype=np.float32)
+        block_size = max(1, min(numframes, WRITE_BLOCK_SIZE // max(1, self.co.nbytes)))
+        self.block = np.empty((block_size, numverts * 3), dtype=dtype)
+        self.count = 0
+
+    def add(self, mesh):
+        mesh.vertices.foreach_get("co", self.co)
+        self.block[self.count] = self.co
+        self.count += 1
+        if self.count == len(self.block):
+            self.flush()
+
+    def flush(self):
+        self.block[:self.count].tofile(self.file)
+        self.count = 0
 
 
 def zero_file(filepath):
@@ -87,35 +117,40 @@ def save(context, filepath="", frame_start=1, frame_end=300, fps=25.0, use_rest_
     if use_rest_frame:
         numframes += 1
 
-    f = open(filepath, 'wb')  # no Errors yet:Safe to create file
+    # Objects may stream their animation from the file being replaced.
+    from . import import_mdd
+    import_mdd.cache_drop(filepath)
 
-    # Write the header
-    f.write(pack(">2i", numframes, numverts))
+    with open(filepath, 'wb') as f:  # no Errors yet:Safe to create file
+        # Write the header
+        np.array((numframes, numverts), dtype='>i4').tofile(f)
 
-    # Write the frame times (should we use the time IPO??)
-    f.write(pack(">%df" % (numframes), *[frame / fps for frame in range(numframes)]))  # seconds
+        # Write the frame times (should we use the time IPO??)
+        (np.arange(numframes) / fps).astype('>f4').tofile(f)  # seconds
 
-    if use_rest_frame:
-        check_vertcount(me, numverts)
-        me.transform(mat_flip @ obj.matrix_world)
-        f.write(pack(">%df" % (numverts * 3), *[axis for v in me.vertices for axis in v.co]))
+        writer = FrameWriter(f, numverts, numframes)
 
-    obj_eval.to_mesh_clear()
+        if use_rest_frame:
+            check_vertcount(me, numverts)
+            me.transform(mat_flip @ obj.matrix_world)
+            writer.add(me)
 
-    for frame in range(frame_start, frame_end + 1):  # in order to start at desired frame
-        scene.frame_set(frame)
-        depsgraph = context.evaluated_depsgraph_get()
-        obj_eval = obj.evaluated_get(depsgraph)
-        me = obj_eval.to_mesh()
-        check_vertcount(me, numverts)
-        me.transform(mat_flip @ obj.matrix_world)
+        obj_eval.to_mesh_clear()
 
-        # Write the vertex data
-        f.write(pack(">%df" % (numverts * 3), *[axis for v in me.vertices for axis in v.co]))
+        for frame in range(frame_start, frame_end + 1):  # in order to start at desired frame
+            scene.frame_set(frame)
+            depsgraph = context.evaluated_depsgraph_get()
+            obj_eval = obj.evaluated_get(depsgraph)
+            me = obj_eval.to_mesh()
+            check_vertcount(me, numverts)
+            me.transform(mat_flip @ obj.matrix_world)
 
-        obj_eval.to_mesh_clear()
+            # Write the vertex data
+            writer.add(me)
+
+            obj_eval.to_mesh_clear()
 
-    f.close()
+        writer.flush()
 
     print('MDD Exported: %r frames:%d\n' % (filepath, numframes - 1))
     scene.frame_set(orig_frame)
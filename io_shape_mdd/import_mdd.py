@@ -31,56 +31,170 @@
 # Please send any fixes,updates,bugs to Slow67_at_Gmail.com
 # Bill Niewuendorp
 
-import bpy
-from struct import unpack
-
-def set_linear_interpolation(obj, shapekey):
-    anim_data = obj.data.shape_keys.animation_data
-    data_path = "key_blocks[\"" + shapekey.name + "\"].value"
-
-    for fcu in anim_data.action.fcurves:
-        if fcu.data_path == data_path:
-            for keyframe in fcu.keyframe_points:
-                keyframe.interpolation = 'LINEAR'
-
-
-def obj_update_frame(file, scene, obj, start, fr, step):
-
-    # Insert new shape key
-    new_shapekey = obj.shape_key_add()
-    new_shapekey.name = ("frame_%.4d" % fr)
-    new_shapekey_index = len(obj.data.shape_keys.key_blocks) - 1
-
-    obj.active_shape_key_index = new_shapekey_index
-    obj.show_only_shape_key = True
-
-    verts = new_shapekey.data
-
-    for v in verts:  # 12 is the size of 3 floats
-        v.co[:] = unpack('>3f', file.read(12))
-
-    # me.update()
-    obj.show_only_shape_key = False
-
-    # insert keyframes
-    new_shapekey = obj.data.shape_keys.key_blocks[new_shapekey_index]
-    frame = start + fr*step
-
-    new_shapekey.value = 0.0
-    new_shapekey.keyframe_insert("value", frame=frame - step)
-
-    new_shapekey.value = 1.0
-    new_shapekey.keyframe_insert("value", frame=frame)
-
-    new_shapekey.value = 0.0
-    new_shapekey.keyframe_insert("value", frame=frame + step)
-
-    set_linear_interpolation(obj, new_shapekey)
-
-    obj.data.update()
+import os
 
+import bpy
+import numpy as np
+from bpy.app.handlers import persistent
 
-def load(context, filepath, frame_start=0, frame_step=1):
+# Name of the shape key, and of the object property holding its settings,
+# for objects streaming their animation from an MDD file.
+CACHE_SHAPE_KEY = "MDD"
+CACHE_PROPERTY = "mdd_cache"
+
+
+class MDDReader:
+    """
+    Access to the frames of an MDD file, only the frames actually used are read from disk.
+
+    Frames are read on demand (not memory mapped), so that a file rewritten or truncated meanwhile
+    (e.g. by exporting over it) gives an error instead of crashing.
+    """
+    __slots__ = ("filepath", "stat", "times", "points")
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.stat = file_stat(filepath)
+        with open(filepath, 'rb') as file:
+            header = np.fromfile(file, dtype='>i4', count=2)
+            if len(header) != 2 or (header < 0).any():
+                raise ValueError("Invalid MDD file %r" % filepath)
+            frames, self.points = (int(v) for v in header)
+            self.times = np.fromfile(file, dtype='>f4', count=frames)
+        if len(self.times) != frames or self.stat[0] < self._offset(frames):
+            raise ValueError("MDD file %r is truncated" % filepath)
+
+    def __len__(self):
+        return len(self.times)
+
+    def _offset(self, index):
+        return 8 + len(self.times) * 4 + index * self.points * 12
+
+    def _read(self, file, index):
+        file.seek(self._offset(index))
+        coords = np.fromfile(file, dtype='>f4', count=self.points * 3)
+        if len(coords) != self.points * 3:
+            raise ValueError("MDD file %r is truncated" % self.filepath)
+        return coords.astype(np.float32)
+
+    def frame_coords(self, index):
+        """Flat, native float32 coordinates of a frame, as expected by foreach_set."""
+        with open(self.filepath, 'rb') as file:
+            return self._read(file, index)
+
+    def iter_frames(self):
+        """Coordinates of all frames, in order, as frame_coords() gives them."""
+        with open(self.filepath, 'rb') as file:
+            for index in range(len(self)):
+                yield self._read(file, index)
+
+    def coords_at(self, frame, frame_start, frame_step):
+        """Coordinates at a (sub)frame of the scene, interpolated between the cached frames."""
+        if not len(self):
+            return None
+        position = min(max((frame - frame_start) / frame_step, 0.0), len(self) - 1)
+        index = int(position)
+        factor = position - index
+        with open(self.filepath, 'rb') as file:
+            coords = self._read(file, index)
+            if factor > 0.0:
+                coords += (self._read(file, index + 1) - coords) * np.float32(factor)
+        return coords
+
+
+def file_stat(filepath):
+    st = os.stat(filepath)
+    return st.st_size, st.st_mtime_ns
+
+
+_readers = {}
+# Whether some objects stream their animation from a file, None when unknown (e.g. after loading a blend file).
+_cache_in_use = None
+
+
+def cache_reader(filepath):
+    """Reader of given file, created again when the file changed since it was last read."""
+    reader = _readers.get(filepath)
+    if reader is None or reader.stat != file_stat(filepath):
+        reader = _readers[filepath] = MDDReader(filepath)
+    return reader
+
+
+def cache_drop(filepath):
+    """Forget the reader of given file, e.g. before writing it."""
+    _readers.pop(bpy.path.abspath(filepath), None)
+
+
+def cache_clear():
+    global _cache_in_use
+    _readers.clear()
+    _cache_in_use = None
+
+
+@persistent
+def cache_load_post(dummy):
+    cache_clear()
+
+
+@persistent
+def cache_frame_change(scene, depsgraph=None):
+    """Update the objects streaming an MDD file to the current frame."""
+    global _cache_in_use
+    if _cache_in_use is None:
+        _cache_in_use = any(CACHE_PROPERTY in obj for obj in bpy.data.objects)
+    if not _cache_in_use:
+        return
+
+    frame = scene.frame_current_final
+    for obj in scene.objects:
+        settings = obj.get(CACHE_PROPERTY)
+        if settings is None or obj.type != 'MESH' or obj.data.shape_keys is None:
+            continue
+        key_block = obj.data.shape_keys.key_blocks.get(CACHE_SHAPE_KEY)
+        if key_block is None:
+            continue
+        try:
+            reader = cache_reader(bpy.path.abspath(settings["filepath"]))
+            if reader.points != len(key_block.data):
+                continue
+            coords = reader.coords_at(frame, settings["frame_start"], settings["frame_step"])
+        except (OSError, ValueError):
+            continue
+        if coords is not None:
+            key_block.data.foreach_set("co", coords)
+            obj.data.update()
+
+
+def add_shape_key_fcurves(shape_keys, key_blocks, start, step):
+    """Key each shape key to 1.0 at its frame, and 0.0 one step before and after."""
+    anim_data = shape_keys.animation_data
+    if anim_data is None:
+        anim_data = shape_keys.animation_data_create()
+    action = anim_data.action
+    if action is None:
+        action = anim_data.action = bpy.data.actions.new(name=shape_keys.name + "Action")
+
+    linear = bpy.types.Keyframe.bl_rna.properties['interpolation'].enum_items['LINEAR'].value
+    interpolation = np.full(3, linear, dtype=np.int32)
+    offsets = np.array((-step, 0.0, step), dtype=np.float32)
+    co = np.array(((0.0, 0.0), (0.0, 1.0), (0.0, 0.0)), dtype=np.float32)
+
+    for fr, key_block in enumerate(key_blocks):
+        data_path = "key_blocks[\"" + key_block.name + "\"].value"
+        # Shape key names are unique, a curve already using this one was left by a removed shape key.
+        fcu = action.fcurves.find(data_path)
+        if fcu is not None:
+            action.fcurves.remove(fcu)
+        fcu = action.fcurves.new(data_path)
+        co[:, 0] = (start + fr * step) + offsets
+        fcu.keyframe_points.add(3)
+        fcu.keyframe_points.foreach_set("co", co.ravel())
+        fcu.keyframe_points.foreach_set("interpolation", interpolation)
+        fcu.update()
+
+
+def load(context, filepath, frame_start=0, frame_step=1, use_cache=False):
+    global _cache_in_use
 
     scene = context.scene
     obj = context.object
@@ -90,20 +204,49 @@ def load(context, filepath, frame_start=0, frame_step=1):
     if bpy.ops.object.mode_set.poll():
         bpy.ops.object.mode_set(mode='OBJECT')
 
-    file = open(filepath, 'rb')
-    frames, points = unpack(">2i", file.read(8))
-    time = unpack((">%df" % frames), file.read(frames * 4))
+    reader = MDDReader(filepath)
+    frames, points = len(reader), reader.points
 
     print('\tpoints:%d frames:%d' % (points, frames))
     print('\tstart frame:%d step:%d' % (frame_start, frame_step))
 
+    if points != len(obj.data.vertices):
+        print('\tmdd has %d points but the mesh has %d vertices, cancelled' % (points, len(obj.data.vertices)))
+        return {'CANCELLED'}
+
     # If target object doesn't have Basis shape key, create it.
     if not obj.data.shape_keys:
         basis = obj.shape_key_add()
         basis.name = "Basis"
         obj.data.update()
 
-    for i in range(frames):
-        obj_update_frame(file, scene, obj, frame_start, i, frame_step)
+    if use_cache:
+        # A single shape key, updated from the (memory mapped) file on frame change.
+        key_block = obj.data.shape_keys.key_blocks.get(CACHE_SHAPE_KEY)
+        if key_block is None:
+            key_block = obj.shape_key_add(name=CACHE_SHAPE_KEY)
+        key_block.value = 1.0
+        obj[CACHE_PROPERTY] = {
+            "filepath": filepath,
+            "frame_start": frame_start,
+            "frame_step": frame_step,
+        }
+        # The file may have changed since it was last read.
+        _readers[bpy.path.abspath(filepath)] = reader
+        _cache_in_use = True
+        cache_frame_change(scene)
+    else:
+        key_blocks = []
+        for fr, coords in enumerate(reader.iter_frames()):
+            # Insert new shape key
+            new_shapekey = obj.shape_key_add(name="frame_%.4d" % fr)
+            new_shapekey.data.foreach_set("co", coords)
+            new_shapekey.value = 0.0
+            key_blocks.append(new_shapekey)
+
+        add_shape_key_fcurves(obj.data.shape_keys, key_blocks, frame_start, frame_step)
+
+    obj.active_shape_key_index = len(obj.data.shape_keys.key_blocks) - 1
+    obj.data.update()
 
     return {'FINISHED'}